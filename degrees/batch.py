@@ -0,0 +1,162 @@
+"""
+Answers many degrees-of-separation queries at once.
+
+Reads (source, target) pairs, one per line separated by a tab, from a
+file or from standard input. Each side may be a name or a person_id.
+Queries are grouped by source so that a single breadth-first search from
+each distinct source answers every target paired with it, and distinct
+sources are searched in parallel across a process pool. Each query is
+written to standard output as one line of JSON.
+
+Usage: python batch.py directory [pairs] [workers]
+"""
+
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from cache import load_graph
+from graph import NamesView
+from treecache import BFSTreeCache
+
+# Graph loaded once by each worker process, and the cache of search trees
+# over it used for single queries
+worker_graph = None
+worker_cache = None
+
+
+def main():
+    if len(sys.argv) < 2 or len(sys.argv) > 4:
+        sys.exit("Usage: python batch.py directory [pairs] [workers]")
+    directory = sys.argv[1]
+    pairs_file = sys.argv[2] if len(sys.argv) > 2 else "-"
+    workers = int(sys.argv[3]) if len(sys.argv) > 3 else os.cpu_count()
+
+    # Builds the on-disk cache if needed, so workers only memory-map it
+    graph = load_graph(directory)
+
+    if pairs_file == "-":
+        pairs = read_pairs(sys.stdin)
+    else:
+        with open(pairs_file, encoding="utf-8") as f:
+            pairs = read_pairs(f)
+
+    for result in run_batch(graph, directory, pairs, workers):
+        print(json.dumps(result))
+
+
+def read_pairs(f):
+    """
+    Returns the (source, target) pairs in a tab-separated file, skipping
+    blank lines and lines starting with '#'.
+    """
+    pairs = []
+    for line_number, line in enumerate(f, 1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        fields = line.split("\t")
+        if len(fields) != 2:
+            sys.exit(f"Line {line_number}: expected source and target separated by a tab")
+        pairs.append((fields[0].strip(), fields[1].strip()))
+    return pairs
+
+
+def run_batch(graph, directory, pairs, workers):
+    """
+    Yields one result dictionary per (source, target) pair, in order.
+
+    Pairs are grouped by source, and each distinct source is searched
+    once, in a pool of `workers` processes that load the graph from the
+    cache in `directory`.
+    """
+    names = NamesView(graph)
+    resolved = []
+    groups = {}
+    for source, target in pairs:
+        source_index, source_error = resolve(graph, names, source)
+        target_index, target_error = resolve(graph, names, target)
+        error = source_error or target_error
+        resolved.append((source_index, target_index, error))
+        if error is None:
+            groups.setdefault(source_index, set()).add(target_index)
+
+    sources = list(groups)
+    tasks = [(source, sorted(groups[source])) for source in sources]
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=init_worker, initargs=(directory,)
+    ) as executor:
+        paths = dict(zip(sources, executor.map(search, tasks, chunksize=4)))
+
+    for (source, target), (source_index, target_index, error) in zip(pairs, resolved):
+        result = {"source": source, "target": target}
+        if error is not None:
+            result["error"] = error
+        else:
+            path = paths[source_index][target_index]
+            result["degrees"] = None if path is None else len(path)
+            result["path"] = path
+        yield result
+
+
+def resolve(graph, names, name):
+    """
+    Returns the person index for a person_id or an unambiguous name, and
+    None as the error, or None and a message explaining the failure.
+    """
+    try:
+        return graph.person_index[name], None
+    except KeyError:
+        pass
+    person_ids = names.get(name.lower())
+    if not person_ids:
+        return None, f"Person not found: {name}"
+    if len(person_ids) > 1:
+        return None, f"Ambiguous name: {name} matches {len(person_ids)} people"
+    return graph.person_index[next(iter(person_ids))], None
+
+
+def init_worker(directory):
+    """
+    Loads the graph for the searches run in this worker process.
+    """
+    global worker_graph, worker_cache
+    worker_graph = load_graph(directory)
+    worker_cache = BFSTreeCache(worker_graph)
+
+
+def search(task):
+    """
+    Runs one breadth-first search from a source, stopping once every one
+    of its targets is reached.
+
+    Returns a dictionary mapping each target to its list of
+    (movie_id, person_id) pairs, or None if it is not connected.
+    """
+    source, targets = task
+    parent_person, parent_movie = worker_graph.bfs(source, targets)
+    return {
+        target: worker_graph.path(parent_person, parent_movie, source, target)
+        for target in targets
+    }
+
+
+def cached_search(pair):
+    """
+    Answers one (source, target) query through this worker's cache of
+    search trees.
+
+    Returns the list of (movie_id, person_id) pairs, or None if they are
+    not connected, along with the process id of the worker and its cache
+    info.
+    """
+    source, target = pair
+    path = worker_cache.shortest_path(
+        worker_graph.person_ids[source], worker_graph.person_ids[target]
+    )
+    return path, os.getpid(), worker_cache.info()
+
+
+if __name__ == "__main__":
+    main()
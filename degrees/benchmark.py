@@ -0,0 +1,269 @@
+"""
+Benchmark suite for degrees.
+
+For each scale, generates a synthetic dataset with generate.py (reusing
+one already generated with the same size and seed), then times
+
+- loading it with each loader: the dictionaries of degrees.py, the
+  CSRGraph built from the CSV files, the on-disk cache when it is built
+  and when it is memory-mapped, and the streaming loader;
+- the same seeded queries with every search implementation, checking
+  each against the path lengths of CSRGraph.bfs.
+
+The results are printed as tables and written to a JSON report, so that
+runs on different commits or machines can be compared.
+
+Usage: python benchmark.py [--credits=N,N...] [--queries=Q] [--seed=S]
+                           [--searches=NAME,NAME...] [--data=DIR] [--output=FILE]
+"""
+
+import contextlib
+import importlib
+import json
+import os
+import platform
+import random
+import sys
+import time
+
+import numpy as np
+
+import generate
+
+SCALES = (10_000, 100_000, 1_000_000)
+QUERIES = 20
+DATA_DIRECTORY = ".benchmark"
+REPORT = "benchmark.json"
+
+# The dictionary-based searches are too slow to be worth running on the
+# largest datasets unless asked for by name
+DICT_LIMIT = 1_000_000
+
+
+def main():
+    options = {}
+    for arg in sys.argv[1:]:
+        key, _, value = arg.partition("=")
+        if not key.startswith("--") or key[2:] not in (
+            "credits", "queries", "seed", "searches", "data", "output"
+        ):
+            sys.exit("Usage: python benchmark.py [--credits=N,N...] [--queries=Q] "
+                     "[--seed=S] [--searches=NAME,NAME...] [--data=DIR] [--output=FILE]")
+        options[key[2:]] = value
+
+    scales = [int(float(n)) for n in options["credits"].split(",")] \
+        if "credits" in options else SCALES
+    queries = int(options.get("queries", QUERIES))
+    seed = int(options.get("seed", generate.SEED))
+    names = options["searches"].split(",") if "searches" in options else None
+    unknown = set(names or ()) - set(SEARCHES)
+    if unknown:
+        sys.exit(f"Unknown searches: {', '.join(sorted(unknown))}. "
+                 f"Choose from: {', '.join(SEARCHES)}")
+
+    report = {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "seed": seed,
+        "queries": queries,
+        "scales": [],
+    }
+    for credits in scales:
+        directory = os.path.join(options.get("data", DATA_DIRECTORY), f"{credits}-{seed}")
+        result = run_scale(directory, credits, seed, queries, names)
+        print_scale(result)
+        report["scales"].append(result)
+
+    output = options.get("output", REPORT)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nReport written to {output}")
+
+
+def run_scale(directory, credits, seed, queries, names=None):
+    """
+    Generates or reuses the dataset for one scale and benchmarks the
+    loaders and searches on it.
+
+    Returns a dictionary of the results.
+    """
+    if not os.path.exists(os.path.join(directory, "stars.csv")):
+        generate.generate(directory, credits, seed)
+
+    from cache import load_graph
+    from graph import CSRGraph
+    from streaming import load_streaming
+
+    if names is None:
+        names = [
+            name for name in SEARCHES
+            if name not in DICT_SEARCHES or credits <= DICT_LIMIT
+        ]
+
+    loads = {}
+    if any(name in DICT_SEARCHES for name in names):
+        loads["dict"] = timed(lambda: load_module("degrees", directory))
+    loads["csr"] = timed(lambda: CSRGraph.from_csv(directory))
+    loads["cache_build"] = timed(lambda: load_graph(directory, rebuild=True))
+    loads["cache"] = timed(lambda: load_graph(directory))
+    loads["stream"] = timed(lambda: load_streaming(directory))
+
+    graph = load_graph(directory)
+
+    # Only people with credits can be connected, as in degrees.py
+    rng = random.Random(seed)
+    candidates = np.flatnonzero(np.diff(graph.person_offsets)).tolist()
+    pairs = [
+        (graph.person_ids[rng.choice(candidates)], graph.person_ids[rng.choice(candidates)])
+        for _ in range(queries)
+    ]
+    expected = [
+        None if path is None else len(path)
+        for path in (graph.shortest_path(source, target) for source, target in pairs)
+    ]
+
+    searches = {}
+    for name in names:
+        searches[name] = run_search(name, directory, graph, pairs, expected)
+
+    return {
+        "scale": credits,
+        "directory": directory,
+        "people": graph.person_count,
+        "movies": graph.movie_count,
+        "credits": len(graph.person_movies),
+        "load_seconds": loads,
+        "searches": searches,
+    }
+
+
+def run_search(name, directory, graph, pairs, expected):
+    """
+    Sets up one search implementation and times it on every pair.
+
+    Returns the setup time, total and per-query times, and the number of
+    answers whose length differs from `expected`.
+    """
+    with contextlib.ExitStack() as stack:
+        start = time.perf_counter()
+        shortest_path = SEARCHES[name](directory, graph, stack)
+        setup = time.perf_counter() - start
+
+        latencies = []
+        mismatches = 0
+        for (source, target), length in zip(pairs, expected):
+            start = time.perf_counter()
+            path = shortest_path(source, target)
+            latencies.append(time.perf_counter() - start)
+            if (None if path is None else len(path)) != length:
+                mismatches += 1
+
+    if not latencies:
+        latencies = [0.0]
+    # Percentiles by the nearest rank, as loadtest.py reports them
+    return {
+        "setup_seconds": setup,
+        "total_seconds": sum(latencies),
+        "mean_ms": 1000 * sum(latencies) / len(latencies),
+        "p50_ms": 1000 * float(np.percentile(latencies, 50, method="inverted_cdf")),
+        "p99_ms": 1000 * float(np.percentile(latencies, 99, method="inverted_cdf")),
+        "mismatches": mismatches,
+    }
+
+
+def load_module(name, directory):
+    """
+    Imports a fresh copy of one of the dictionary-based degrees modules,
+    whose data lives in module globals, and loads `directory` into it.
+    """
+    module = importlib.reload(importlib.import_module(name))
+    module.load_data(directory)
+    return module
+
+
+def dict_search(name):
+    def setup(directory, graph, stack):
+        return load_module(name, directory).shortest_path
+    return setup
+
+
+def csr_search(directory, graph, stack):
+    return graph.shortest_path
+
+
+def tree_cache_search(directory, graph, stack):
+    from treecache import BFSTreeCache
+    return BFSTreeCache(graph).shortest_path
+
+
+def landmark_search(directory, graph, stack):
+    from landmarks import LandmarkIndex
+    return LandmarkIndex.build(graph).shortest_path
+
+
+def diropt_search(directory, graph, stack):
+    from diropt import direction_optimizing_bfs
+
+    def shortest_path(source_id, target_id):
+        source = graph.person_index[source_id]
+        target = graph.person_index[target_id]
+        if not graph.connected(source, target):
+            return None
+        parent_person, parent_movie, _ = direction_optimizing_bfs(graph, source, target)
+        return graph.path(parent_person, parent_movie, source, target)
+    return shortest_path
+
+
+def parallel_search(directory, graph, stack):
+    from parallel import ParallelBFS
+    return stack.enter_context(ParallelBFS(graph)).shortest_path
+
+
+def year_search(directory, graph, stack):
+    from years import YearIndex
+    return YearIndex(graph).shortest_path
+
+
+# Every search implementation in degrees/, as a function that sets it up
+# and returns its shortest_path(source_id, target_id)
+SEARCHES = {
+    "degrees": dict_search("degrees"),
+    "degrees_one_agent": dict_search("degrees_one_agent"),
+    "degrees_two_agents": dict_search("degrees_two_agents"),
+    "csr": csr_search,
+    "tree_cache": tree_cache_search,
+    "landmarks": landmark_search,
+    "diropt": diropt_search,
+    "parallel": parallel_search,
+    "years": year_search,
+}
+DICT_SEARCHES = ("degrees", "degrees_one_agent", "degrees_two_agents")
+
+
+def timed(function):
+    """
+    Returns the seconds taken to call `function`.
+    """
+    start = time.perf_counter()
+    function()
+    return time.perf_counter() - start
+
+
+def print_scale(result):
+    print(f"\nScale {result['scale']}: {result['people']} people, "
+          f"{result['movies']} movies, {result['credits']} credits")
+    print(f"{'loader':<22}{'seconds':>10}")
+    for name, seconds in result["load_seconds"].items():
+        print(f"{name:<22}{seconds:>10.3f}")
+    print(f"{'search':<22}{'setup s':>10}{'mean ms':>10}{'p50 ms':>10}"
+          f"{'p99 ms':>10}{'wrong':>7}")
+    for name, search in result["searches"].items():
+        print(f"{name:<22}{search['setup_seconds']:>10.3f}{search['mean_ms']:>10.2f}"
+              f"{search['p50_ms']:>10.2f}{search['p99_ms']:>10.2f}"
+              f"{search['mismatches']:>7}")
+
+
+if __name__ == "__main__":
+    main()
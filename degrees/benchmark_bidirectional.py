@@ -0,0 +1,82 @@
+"""
+Compares the one-way search in degrees.py with the bidirectional search
+in degrees_two_agents.py on random pairs of people.
+
+Usage: python benchmark_bidirectional.py [directory] [queries]
+"""
+
+import random
+import sys
+import time
+
+import degrees
+import degrees_two_agents
+
+SEED = 50
+
+
+def main():
+    if len(sys.argv) > 3:
+        sys.exit("Usage: python benchmark_bidirectional.py [directory] [queries]")
+    directory = sys.argv[1] if len(sys.argv) > 1 else "large"
+    queries = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+
+    print("Loading data...")
+    degrees.load_data(directory)
+    degrees_two_agents.load_data(directory)
+    print("Data loaded.")
+
+    # Compare the searches themselves, not answers read from cached trees
+    degrees.tree_cache = None
+
+    # Only people who starred in something can be connected at all
+    candidates = sorted(
+        person_id for person_id in degrees.people
+        if degrees.people[person_id]["movies"]
+    )
+    rng = random.Random(SEED)
+    pairs = [
+        (rng.choice(candidates), rng.choice(candidates))
+        for _ in range(queries)
+    ]
+
+    results = {}
+    for module in (degrees, degrees_two_agents):
+        results[module.__name__] = run(module, pairs)
+
+    print(f"\n{queries} queries on '{directory}'")
+    print(f"{'search':<22}{'expanded':>14}{'per query':>14}"
+          f"{'edges':>14}{'seconds':>10}")
+    for name, (lengths, expanded, scanned, seconds) in results.items():
+        print(f"{name:<22}{expanded:>14}{expanded / queries:>14.1f}"
+              f"{scanned:>14}{seconds:>10.3f}")
+
+    # Both searches must agree on the degrees of separation
+    one_way = results[degrees.__name__][0]
+    two_way = results[degrees_two_agents.__name__][0]
+    mismatches = sum(1 for a, b in zip(one_way, two_way) if a != b)
+    print(f"Path length mismatches: {mismatches}")
+
+
+def run(module, pairs):
+    """
+    Runs `module.search` on every pair, adding up the people expanded and
+    edges scanned from the stats of each search.
+
+    Returns the path lengths, the number of people expanded, the number
+    of edges scanned and the time taken.
+    """
+    expanded = 0
+    scanned = 0
+    lengths = []
+    start = time.perf_counter()
+    for source_id, target_id in pairs:
+        path, stats = module.search(source_id, target_id)
+        lengths.append(None if path is None else len(path))
+        expanded += stats.nodes_expanded
+        scanned += stats.edges_scanned
+    return lengths, expanded, scanned, time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    main()
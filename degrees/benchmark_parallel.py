@@ -0,0 +1,73 @@
+"""
+Compares the throughput of the parallel breadth-first search with 1, 2, 4
+and 8 workers against the sequential queue-frontier search in degrees.py.
+
+Usage: python benchmark_parallel.py [directory] [queries]
+"""
+
+import random
+import sys
+import time
+
+import numpy as np
+
+import degrees
+from graph import CSRGraph
+from parallel import ParallelBFS
+
+SEED = 50
+WORKER_COUNTS = (1, 2, 4, 8)
+
+
+def main():
+    if len(sys.argv) > 3:
+        sys.exit("Usage: python benchmark_parallel.py [directory] [queries]")
+    directory = sys.argv[1] if len(sys.argv) > 1 else "large"
+    queries = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+
+    print("Loading data...")
+    degrees.load_data(directory)
+    graph = CSRGraph.from_data(degrees.people, degrees.movies)
+    print("Data loaded.")
+
+    # Only people with credits can be connected, as in degrees.py
+    rng = random.Random(SEED)
+    candidates = np.flatnonzero(np.diff(graph.person_offsets)).tolist()
+    pairs = [
+        (graph.person_ids[rng.choice(candidates)], graph.person_ids[rng.choice(candidates)])
+        for _ in range(queries)
+    ]
+
+    print(f"\n{queries} queries on '{directory}'")
+    print(f"{'search':<24}{'seconds':>10}{'queries/s':>12}{'speedup':>10}")
+
+    baseline, lengths = run(degrees.shortest_path, pairs)
+    report("sequential degrees.py", baseline, queries, baseline)
+
+    for workers in WORKER_COUNTS:
+        with ParallelBFS(graph, workers) as search:
+            seconds, parallel_lengths = run(search.shortest_path, pairs)
+        report(f"parallel, {workers} workers", seconds, queries, baseline)
+        if parallel_lengths != lengths:
+            print("  path lengths differ from the sequential search")
+
+
+def run(shortest_path, pairs):
+    """
+    Returns the time taken to answer every pair and the path lengths.
+    """
+    lengths = []
+    start = time.perf_counter()
+    for source_id, target_id in pairs:
+        path = shortest_path(source_id, target_id)
+        lengths.append(None if path is None else len(path))
+    return time.perf_counter() - start, lengths
+
+
+def report(name, seconds, queries, baseline):
+    print(f"{name:<24}{seconds:>10.3f}{queries / seconds:>12.2f}"
+          f"{baseline / seconds:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
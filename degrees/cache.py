@@ -0,0 +1,147 @@
+"""
+On-disk cache of the compiled degrees graph.
+
+The first load of a dataset directory parses the CSV files into a
+CSRGraph and saves its arrays as .npy files under `.degrees_cache/` in
+that directory. Later loads memory-map those files directly, as long as
+the size and modification time of every CSV still match the manifest the
+cache was written with; otherwise the cache is rebuilt. Connected
+component labels are computed once and cached along with the graph.
+"""
+
+import json
+import os
+
+import numpy as np
+
+from graph import CSRGraph, SortedIndex, StringTable
+
+CACHE_DIRECTORY = ".degrees_cache"
+CACHE_VERSION = 2
+SOURCES = ("people.csv", "movies.csv", "stars.csv")
+
+ARRAYS = (
+    "person_offsets", "person_movies", "movie_offsets", "movie_people",
+    "person_id_order", "movie_id_order", "name_order", "components",
+)
+STRINGS = (
+    "person_ids", "person_names", "person_births",
+    "movie_ids", "movie_titles", "movie_years",
+)
+
+
+def load_graph(directory, rebuild=False):
+    """
+    Returns the CSRGraph for the CSV files in `directory`, memory-mapped
+    from the cache when it is up to date, and otherwise built from the CSV
+    files and saved to the cache for next time.
+    """
+    path = os.path.join(directory, CACHE_DIRECTORY)
+    manifest = source_manifest(directory)
+    if not rebuild and read_manifest(path) == manifest:
+        return read_graph(path)
+
+    graph = CSRGraph.from_csv(directory)
+    try:
+        write_graph(graph, path, manifest)
+    except OSError:
+        # A read-only dataset directory just means running without a cache
+        return graph
+    return read_graph(path)
+
+
+def source_manifest(directory):
+    """
+    Returns the cache key for `directory`: the size and modification
+    time of each of its CSV files.
+    """
+    sources = {}
+    for filename in SOURCES:
+        stat = os.stat(os.path.join(directory, filename))
+        sources[filename] = [stat.st_size, stat.st_mtime_ns]
+    return {"version": CACHE_VERSION, "sources": sources}
+
+
+def read_manifest(path):
+    """
+    Returns the manifest a cache was written with, or None if there is no
+    complete cache at `path`.
+    """
+    try:
+        with open(os.path.join(path, "manifest.json")) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def write_graph(graph, path, manifest):
+    """
+    Saves the arrays of `graph` under `path`. The manifest is written last,
+    so an interrupted write leaves no cache rather than a corrupt one.
+    """
+    os.makedirs(path, exist_ok=True)
+    manifest_path = os.path.join(path, "manifest.json")
+    if os.path.exists(manifest_path):
+        os.remove(manifest_path)
+
+    person_ids = StringTable.from_strings(graph.person_ids)
+    movie_ids = StringTable.from_strings(graph.movie_ids)
+    arrays = {
+        "person_offsets": graph.person_offsets,
+        "person_movies": graph.person_movies,
+        "movie_offsets": graph.movie_offsets,
+        "movie_people": graph.movie_people,
+        "person_id_order": SortedIndex.build(person_ids).order,
+        "movie_id_order": SortedIndex.build(movie_ids).order,
+        "name_order": graph.name_order,
+        "components": graph.components,
+    }
+    strings = {
+        "person_ids": person_ids,
+        "person_names": StringTable.from_strings(graph.person_names),
+        "person_births": StringTable.from_strings(graph.person_births),
+        "movie_ids": movie_ids,
+        "movie_titles": StringTable.from_strings(graph.movie_titles),
+        "movie_years": StringTable.from_strings(graph.movie_years),
+    }
+
+    for name, array in arrays.items():
+        np.save(os.path.join(path, f"{name}.npy"), array)
+    for name, table in strings.items():
+        np.save(os.path.join(path, f"{name}.data.npy"), table.data)
+        np.save(os.path.join(path, f"{name}.offsets.npy"), table.offsets)
+
+    with open(manifest_path, "w") as f:
+        json.dump(manifest, f)
+
+
+def read_graph(path):
+    """
+    Returns a CSRGraph whose arrays are memory-mapped from the cache at
+    `path`, so nothing is read from disk until it is used.
+    """
+    def load(filename):
+        return np.load(os.path.join(path, filename), mmap_mode="r")
+
+    arrays = {name: load(f"{name}.npy") for name in ARRAYS}
+    strings = {
+        name: StringTable(load(f"{name}.data.npy"), load(f"{name}.offsets.npy"))
+        for name in STRINGS
+    }
+    return CSRGraph(
+        strings["person_ids"], strings["movie_ids"],
+        arrays["person_offsets"], arrays["person_movies"],
+        arrays["movie_offsets"], arrays["movie_people"],
+        person_names=strings["person_names"],
+        person_births=strings["person_births"],
+        movie_titles=strings["movie_titles"],
+        movie_years=strings["movie_years"],
+        person_index=SortedIndex(
+            strings["person_ids"], arrays["person_id_order"]
+        ),
+        movie_index=SortedIndex(
+            strings["movie_ids"], arrays["movie_id_order"]
+        ),
+        name_order=arrays["name_order"],
+        components=arrays["components"],
+    )
@@ -1,22 +1,64 @@
+import atexit
 import csv
 import sys
+import time
 
-from util import Node, StackFrontier, QueueFrontier
+from nameindex import NameIndex, normalize
+from stats import SearchStats, finish
+from treecache import BFSTreeCache, DictTreeCache
+from util import Node, DequeQueueFrontier
+from util import path_from_parents, UnionFind
 
 # Maps names to a set of corresponding person_ids
 names = {}
 
+# Index over `names` by first name and surname, built by build_name_index()
+# the first time a name is not found as a full name
+name_index = None
+
 # Maps person_ids to a dictionary of: name, birth, movies (a set of movie_ids)
 people = {}
 
 # Maps movie_ids to a dictionary of: title, year, stars (a set of person_ids)
 movies = {}
 
+# Connected components of people, labelled by load_data so that people who
+# are not connected can be told apart without searching
+components = UnionFind()
+
+# Compact CSRGraph used for searching, when loaded with backend="csr",
+# and the cache of recent search trees over it or over the dictionaries
+graph = None
+tree_cache = None
+
+# ParallelBFS over `graph` that searches use instead of graph.shortest_path
+# once started by start_parallel()
+parallel_bfs = None
+
+# Seconds taken by the last load_data, and whether searches print their stats
+load_seconds = 0.0
+verbose = False
 
-def load_data(directory):
+
+def load_data(directory, backend="dict"):
     """
     Load data from CSV files into memory.
+
+    With backend="csr" the graph is held in a compact CSRGraph instead,
+    and `names`, `people` and `movies` become read-only views over it.
+    With backend="cache" that graph is memory-mapped from an on-disk cache,
+    which is rebuilt whenever the CSV files change. With backend="stream"
+    only the graph's adjacency is loaded, and names and other details are
+    read from the CSV files when needed.
     """
+    global load_seconds, tree_cache, name_index
+    start = time.perf_counter()
+    if backend in ("csr", "cache", "stream"):
+        load_graph(directory, backend)
+        name_index = None
+        load_seconds = time.perf_counter() - start
+        return
+
     # Load people
     with open(f"{directory}/people.csv", encoding="utf-8") as f:
         reader = csv.DictReader(f)
@@ -51,16 +93,103 @@ def load_data(directory):
             except KeyError:
                 pass
 
+    # Label connected components: everyone in a movie is connected
+    for person_id in people:
+        components.add(person_id)
+    for movie in movies.values():
+        stars = iter(movie["stars"])
+        first = next(stars, None)
+        for person_id in stars:
+            components.union(first, person_id)
+    tree_cache = DictTreeCache(neighbors_for_person)
+    name_index = None
+    load_seconds = time.perf_counter() - start
+
+
+def load_graph(directory, backend="csr"):
+    """
+    Load data into a CSRGraph, from the CSV files, the on-disk cache or a
+    streaming read, pointing `names`, `people` and `movies` at views over it.
+    """
+    global graph, tree_cache, names, people, movies
+    from graph import CSRGraph, NamesView, PeopleView, MoviesView
+
+    stop_parallel()
+    if graph is not None:
+        graph.close()
+    if backend == "cache":
+        from cache import load_graph as load_cached_graph
+        graph = load_cached_graph(directory)
+        names = NamesView(graph)
+    elif backend == "stream":
+        from streaming import load_streaming, HashedNames
+        graph = load_streaming(directory)
+        names = HashedNames(graph)
+    else:
+        graph = CSRGraph.from_csv(directory)
+        names = NamesView(graph)
+    tree_cache = BFSTreeCache(graph)
+    people = PeopleView(graph)
+    movies = MoviesView(graph)
+
+
+def start_parallel(workers=None):
+    """
+    Makes searches over the loaded graph expand each level across
+    `workers` processes, as many as there are cores by default, with a
+    ParallelBFS. It is only worth it when levels reach many thousands of
+    people, as in the full IMDB dataset.
+    """
+    global parallel_bfs
+    from parallel import ParallelBFS, WORKERS
+
+    if graph is None:
+        raise ValueError("Parallel search needs a graph backend")
+    stop_parallel()
+    parallel_bfs = ParallelBFS(graph, workers or WORKERS)
+
+
+def stop_parallel():
+    """
+    Stops the worker processes of start_parallel(), if started.
+    """
+    global parallel_bfs
+    if parallel_bfs is not None:
+        parallel_bfs.close()
+        parallel_bfs = None
+
 
 def main():
-    if len(sys.argv) > 2:
-        sys.exit("Usage: python degrees.py [directory]")
-    directory = sys.argv[1] if len(sys.argv) == 2 else "large"
+    global verbose
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("-")]
+    options = [arg for arg in sys.argv[1:] if arg.startswith("--") and arg != "--parallel"]
+    parallel = "--parallel" in sys.argv[1:]
+    flags = [arg for arg in sys.argv[1:] if arg.startswith("-") and not arg.startswith("--")]
+    verbose = "-v" in flags
+    if len(args) > 1 or len(options) > 1 or \
+            any(option not in ("--csr", "--cache", "--stream") for option in options) or \
+            any(flag != "-v" for flag in flags):
+        sys.exit("Usage: python degrees.py [directory] "
+                 "[--csr | --cache | --stream] [--parallel] [-v]")
+    directory = args[0] if args else "large"
+    # Parallel search runs over a graph, the CSRGraph unless another is asked for
+    backend = options[0][2:] if options else "csr" if parallel else "dict"
 
     # Load data from files into memory
     print("Loading data...")
-    load_data(directory)
+    load_data(directory, backend)
     print("Data loaded.")
+    if parallel:
+        start_parallel()
+        atexit.register(stop_parallel)
+    if backend == "stream":
+        from streaming import peak_rss
+        print(f"Graph arrays: {graph.nbytes / 2**20:.1f} MiB, "
+              f"peak RSS: {peak_rss() / 2**20:.1f} MiB")
+    sizes = component_sizes()
+    if sizes:
+        print(f"{len(people)} people in {len(sizes)} connected components, "
+              f"the largest with {sizes[0]} people.")
 
     source = person_id_for_name(input("Name: "))
     if source is None:
@@ -69,6 +198,19 @@ def main():
     if target is None:
         sys.exit("Person not found.")
 
+    name = ""
+    if(not len(people[source]['movies'])):
+        name = people[source]['name']+' has'
+    if(not len(people[target]['movies'])):
+        if name:
+            name = "Both Persons have"
+        else:
+            name = people[target]['name']+' has'
+    if name:
+        print(f"\n{name} not acted in any movie")
+    else:
+        print("\nPlease wait, while searching for the connections...")
+
     path = shortest_path(source, target)
 
     if path is None:
@@ -91,75 +233,121 @@ def shortest_path(source_id, target_id):
 
     If no possible path, returns None.
     """
+    path, stats = search(source_id, target_id)
+    if verbose:
+        print(stats)
+    return path
 
-    # Implemented below the search method using Queue Frontier
-    # raise NotImplementedError
 
-    name = ""
-    if(not len(people[source_id]['movies'])):
-        name = people[source_id]['name']+' has'
-    if(not len(people[target_id]['movies'])):
-        if name:
-            name = "Both Persons have"
-        else:
-            name = people[target_id]['name']+' has'
-    if name:
-        print(f"\n{name} not acted in any movie")
-        return None
+def search(source_id, target_id, hooks=None):
+    """
+    Searches for the shortest path from the source to the target like
+    `shortest_path`, calling `hooks`, a SearchHooks, if given.
 
-    nodes_checked = [] #Keeps the explored nodes
-    path_to_target=[] #Summeriaze the connection
-    node_for_check = Node(source_id, None, None)
-
-    frontier = QueueFrontier()
-    node_target_in_frontier = False
-    print("\nPlease wait, while searching for the connections...")
-    while True:
-
-        nodes_checked.append(node_for_check)
-
-        #Summerise the path if the target node is found
-        if(node_for_check.state==target_id):
-            parent_id=node_for_check.state
-            for node in reversed(nodes_checked):
-                if(node.state==parent_id and node.parent is not None):
-                    path_to_target += [(node.action,node.state)]
-                    parent_id=node.parent
-            path_to_target.reverse()
-            break
-
-        #If the goal/target node is not the frontier, expand the current node
-        if not node_target_in_frontier:
-            neighbours = neighbors_for_person(node_for_check.state)
-            #Update the frontier with the connected nodes for the current node
-            for neighbour in neighbours:
-                if(not(frontier.contains_state(neighbour[1])) and\
-                    not(any(node.state==neighbour[1] for node in nodes_checked))):
-                    node = Node(neighbour[1],node_for_check.state,neighbour[0])
-                    frontier.add(node)
-                    if node.state == target_id:
-                        node_target_in_frontier = True
-                        break
-        
-        #List the new frontier for testing
-        #frontier.list_state_of_loaded_nodes()
-        try:
+    Returns the path and the SearchStats of the search.
+    """
+    stats = SearchStats(load_seconds)
+    if not people[source_id]["movies"] or not people[target_id]["movies"]:
+        return finish(None, stats, hooks)
+
+    if source_id == target_id:
+        return finish([], stats, hooks)
+    with stats.phase("connectivity"):
+        if not connected(source_id, target_id):
+            return finish(None, stats, hooks)
+
+    # A cached search tree answers repeat queries; a first query for a
+    # source is answered by a search that stops at the target
+    if tree_cache is not None:
+        with stats.phase("search"):
+            path = tree_cache.cached_path(source_id, target_id, stats, hooks)
+        stats.cache = tree_cache.info()
+        if path is not None:
+            if not stats.nodes_expanded:
+                # Read from a tree built by an earlier query, so there is
+                # no search to count
+                stats.nodes_expanded = stats.edges_scanned = stats.frontier_peak = None
+            return finish(path, stats, hooks)
+    if graph is not None:
+        with stats.phase("search"):
+            path = (parallel_bfs or graph).shortest_path(
+                source_id, target_id, stats, hooks
+            )
+        return finish(path, stats, hooks)
+
+    # Maps each reached person to the (movie_id, person_id) pair they were
+    # reached from, which is all that is needed to rebuild the path
+    came_from = {source_id: None}
+    nodes_expanded = 0
+    edges_scanned = 0
+    frontier_peak = 1
+    path = None
+
+    frontier = DequeQueueFrontier()
+    frontier.add(Node(source_id, None, None))
+
+    with stats.phase("search"):
+        while path is None and not frontier.empty():
             node_for_check = frontier.remove()
-        except Exception:
-            return None
-            #break
-    
-    print("Total checked IDs:", len(nodes_checked))
-    #print("connected nodes:")
-    #print(path_to_target)
-    return path_to_target
+            nodes_expanded += 1
+            neighbors = neighbors_for_person(node_for_check.state)
+            edges_scanned += len(neighbors)
+            if hooks is not None:
+                hooks.on_expand(node_for_check.state, neighbors)
+
+            #Expand the current node, stopping as soon as the target is reached
+            for movie_id, person_id in neighbors:
+                if person_id in came_from:
+                    continue
+                came_from[person_id] = (movie_id, node_for_check.state)
+                if person_id == target_id:
+                    path = []
+                    break
+                frontier.add(Node(person_id, node_for_check.state, movie_id))
+            frontier_peak = max(frontier_peak, len(frontier.frontier))
+
+    if path is not None:
+        with stats.phase("path"):
+            path = path_from_parents(came_from, target_id)
+    stats.nodes_expanded = nodes_expanded
+    stats.edges_scanned = edges_scanned
+    stats.frontier_peak = frontier_peak
+    return finish(path, stats, hooks)
+
+
+def connected(source_id, target_id):
+    """
+    Returns whether two people are in the same connected component,
+    in constant time.
+    """
+    if graph is not None:
+        return graph.connected(
+            graph.person_index[source_id], graph.person_index[target_id]
+        )
+    return components.connected(source_id, target_id)
+
+
+def component_sizes():
+    """
+    Returns the sizes of the connected components of people, largest first.
+    """
+    if graph is not None:
+        return graph.component_sizes.tolist()
+    return components.sizes()
+
 
 def person_id_for_name(name):
     """
     Returns the IMDB id for a person's name,
     resolving ambiguities as needed.
+
+    Names match ignoring case and extra whitespace, and a name matching no
+    full name is tried as a first name or surname.
     """
-    person_ids = list(names.get(name.lower(), set()))
+    person_ids = names.get(normalize(name))
+    if not person_ids:
+        person_ids = build_name_index().lookup(name)
+    person_ids = sorted(person_ids)
     if len(person_ids) == 0:
         return None
     elif len(person_ids) > 1:
@@ -180,11 +368,25 @@ def person_id_for_name(name):
         return person_ids[0]
 
 
+def build_name_index():
+    """
+    Returns the NameIndex over `names`, building it on first use. Exact
+    names are looked up in `names` itself, so loading the data does not
+    have to read every name.
+    """
+    global name_index
+    if name_index is None:
+        name_index = NameIndex(names)
+    return name_index
+
+
 def neighbors_for_person(person_id):
     """
     Returns (movie_id, person_id) pairs for people
     who starred with a given person.
     """
+    if graph is not None:
+        return graph.neighbors_for_person(person_id)
     movie_ids = people[person_id]["movies"]
     neighbors = set()
     for movie_id in movie_ids:
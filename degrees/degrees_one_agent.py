@@ -1,7 +1,11 @@
 import csv
 import sys
+import time
 
-from util import Node, StackFrontier, QueueFrontier
+from util import Node, DequeQueueFrontier
+from util import path_from_parents
+from nameindex import NameIndex
+from stats import SearchStats, finish
 
 # Maps names to a set of corresponding person_ids
 names = {}
@@ -12,11 +16,21 @@ people = {}
 # Maps movie_ids to a dictionary of: title, year, stars (a set of person_ids)
 movies = {}
 
+# Index of first names, surnames and name prefixes, built by load_data
+name_index = None
+
+# Seconds taken by the last load_data, and whether searches print their stats
+load_seconds = 0.0
+verbose = False
+
 
 def load_data(directory):
     """
     Load data from CSV files into memory.
     """
+    global name_index, load_seconds
+    start = time.perf_counter()
+
     # Load people
     with open(f"{directory}/people.csv", encoding="utf-8") as f:
         reader = csv.DictReader(f)
@@ -32,6 +46,8 @@ def load_data(directory):
             else:
                 names[row["name"].lower()].add(row["id"])
 
+    name_index = NameIndex(names)
+
     # Load movies
     with open(f"{directory}/movies.csv", encoding="utf-8") as f:
         reader = csv.DictReader(f)
@@ -51,6 +67,7 @@ def load_data(directory):
                 movies[row["movie_id"]]["stars"].add(row["person_id"])
             except KeyError:
                 pass
+    load_seconds = time.perf_counter() - start
 '''
     for id in people:
         print(f"{id}:", people[id])
@@ -66,9 +83,12 @@ def load_data(directory):
 
 
 def main():
-    if len(sys.argv) > 2:
-        sys.exit("Usage: python degrees.py [directory]")
-    directory = sys.argv[1] if len(sys.argv) == 2 else "large"
+    global verbose
+    args = [arg for arg in sys.argv[1:] if arg != "-v"]
+    verbose = len(args) < len(sys.argv) - 1
+    if len(args) > 1:
+        sys.exit("Usage: python degrees.py [directory] [-v]")
+    directory = args[0] if args else "large"
     print(directory)
 
     # Load data from files into memory
@@ -91,6 +111,19 @@ def main():
             print("Person not fount")
             continue
 
+        name = ""
+        if(not len(people[source_id]['movies'])):
+            name = people[source_id]['name']+' has'
+        if(not len(people[target_id]['movies'])):
+            if name:
+                name = "Both Persons have"
+            else:
+                name = people[target_id]['name']+' has'
+        if name:
+            print(f"\n{name} not acted in any movie")
+        else:
+            print("\nPlease wait, while searching for the connections...")
+
         path = shortest_path(source_id, target_id)
 
         if path is None:
@@ -112,79 +145,78 @@ def shortest_path(source_id, target_id):
 
     If no possible path, returns None.
     """
+    path, stats = search(source_id, target_id)
+    if verbose:
+        print(stats)
+        print("connected nodes:")
+        print(path)
+    return path
+
+def search(source_id, target_id, hooks=None):
+    """
+    Searches for the shortest path from the source to the target like
+    `shortest_path`, calling `hooks`, a SearchHooks, if given.
+
+    Returns the path and the SearchStats of the search.
+    """
 
     # Implemented below the search method using Queue Frontier
     # raise NotImplementedError
 
-    name = ""
-    if(not len(people[source_id]['movies'])):
-        name = people[source_id]['name']+' has'
-    if(not len(people[target_id]['movies'])):
-        if name:
-            name = "Both Persons have"
-        else:
-            name = people[target_id]['name']+' has'
-    if name:
-        print(f"\n{name} not acted in any movie")
-        return None
+    stats = SearchStats(load_seconds)
+    if not people[source_id]["movies"] or not people[target_id]["movies"]:
+        return finish(None, stats, hooks)
 
-    nodes_checked = []
-    path_to_target=[]
-    node_for_check = Node(source_id, None, None)
-
-    frontier = QueueFrontier()
-    frontier_node_count = 1
-    node_target_in_frontier = False
-    print("\nPlease wait, while searching for the connections...")
-    while True:
-
-        nodes_checked.append(node_for_check)
-
-        #Summerise the path if the target node is found
-        if(node_for_check.state==target_id):
-            parent_id=node_for_check.state
-            for node in reversed(nodes_checked):
-                if(node.state==parent_id and node.parent is not None):
-                    path_to_target += [(node.action,node.state)]
-                    parent_id=node.parent
-            path_to_target.reverse()
-            break
-
-        #If the goal/target node is not the frontier, expand the current node
-        if not node_target_in_frontier:
-            neighbours = neighbors_for_person(node_for_check.state)
-            #Update the frontier with the connected nodes for the current node
-            for neighbour in neighbours:
-                if(not(frontier.contains_state(neighbour[1])) and\
-                    not(any(node.state==neighbour[1] for node in nodes_checked))):
-                    node = Node(neighbour[1],node_for_check.state,neighbour[0])
-                    frontier.add(node)
-                    frontier_node_count += 1 #for checking & optimization purpose
-                    if node.state == target_id:
-                        node_target_in_frontier = True
-                        break
-        
-        #List the new frontier for testing
-        #frontier.list_state_of_loaded_nodes()
-        try:
+    if source_id == target_id:
+        return finish([], stats, hooks)
+
+    # Maps each reached person to the (movie_id, person_id) pair they were
+    # reached from, which is all that is needed to rebuild the path
+    came_from = {source_id: None}
+    nodes_expanded = 0
+    edges_scanned = 0
+    frontier_peak = 1
+    path = None
+
+    frontier = DequeQueueFrontier()
+    frontier.add(Node(source_id, None, None))
+
+    with stats.phase("search"):
+        while path is None and not frontier.empty():
             node_for_check = frontier.remove()
-        except Exception:
-            #return None
-            break
-    
-    print("Total checked IDs:", len(nodes_checked))
-    print("Total nodes added to the Frontier:", frontier_node_count)
-    print("connected nodes:")
-    print(path_to_target)
-    return path_to_target
+            nodes_expanded += 1
+            neighbors = neighbors_for_person(node_for_check.state)
+            edges_scanned += len(neighbors)
+            if hooks is not None:
+                hooks.on_expand(node_for_check.state, neighbors)
+
+            #Expand the current node, stopping as soon as the target is reached
+            for movie_id, person_id in neighbors:
+                if person_id in came_from:
+                    continue
+                came_from[person_id] = (movie_id, node_for_check.state)
+                if person_id == target_id:
+                    path = []
+                    break
+                frontier.add(Node(person_id, node_for_check.state, movie_id))
+            frontier_peak = max(frontier_peak, len(frontier.frontier))
+
+    if path is not None:
+        with stats.phase("path"):
+            path = path_from_parents(came_from, target_id)
+    stats.nodes_expanded = nodes_expanded
+    stats.edges_scanned = edges_scanned
+    stats.frontier_peak = frontier_peak
+    return finish(path, stats, hooks)
 
 def person_id_for_name(name):
     """
     Returns the IMDB id for a person's name,
     resolving ambiguities as needed.
     """    
-    person_ids = list(names.get(name.lower(), set()))
-    person_ids += person_ids_for_part_entry(name)
+    person_ids = list(
+        names.get(name.lower(), set()) | set(person_ids_for_part_entry(name))
+    )
     if len(person_ids) == 0:
         return None
 
@@ -221,20 +253,11 @@ def person_ids_for_part_entry(name_entered):
     """
     Returns the person ids for entry of first name or sir name.
     """
-    person_ids = []
-
     if len(name_entered) == 0:
-        return person_ids
-
-    name_entered = name_entered.lower()
-    for name in names:
-        name_splitted = name.split()
-        if name_entered == name_splitted[-1]:
-            name_list = list(names.get(name))
-            for person_id in name_list:
-                person_ids.append(person_id)
-    
-    return person_ids
+        return []
+    return list(
+        name_index.first_name(name_entered) | name_index.surname(name_entered)
+    )
 
 if __name__ == "__main__":
     main()
@@ -1,8 +1,11 @@
 import csv
 import sys
+import time
 
 
-from util import Node, StackFrontier, QueueFrontier
+from util import path_from_parents
+from nameindex import NameIndex
+from stats import SearchStats, finish
 
 # Maps names to a set of corresponding person_ids
 names = {}
@@ -13,11 +16,21 @@ people = {}
 # Maps movie_ids to a dictionary of: title, year, stars (a set of person_ids)
 movies = {}
 
+# Index of first names, surnames and name prefixes, built by load_data
+name_index = None
+
+# Seconds taken by the last load_data, and whether searches print their stats
+load_seconds = 0.0
+verbose = False
+
 
 def load_data(directory):
     """
     Load data from CSV files into memory.
     """
+    global name_index, load_seconds
+    start = time.perf_counter()
+
     # Load people
     with open(f"{directory}/people.csv", encoding="utf-8") as f:
         reader = csv.DictReader(f)
@@ -33,6 +46,8 @@ def load_data(directory):
             else:
                 names[row["name"].lower()].add(row["id"])
 
+    name_index = NameIndex(names)
+
     # Load movies
     with open(f"{directory}/movies.csv", encoding="utf-8") as f:
         reader = csv.DictReader(f)
@@ -52,6 +67,7 @@ def load_data(directory):
                 movies[row["movie_id"]]["stars"].add(row["person_id"])
             except KeyError:
                 pass
+    load_seconds = time.perf_counter() - start
     '''
     for id in people:
         print(f"{id}:", people[id])
@@ -68,9 +84,12 @@ def load_data(directory):
 
 
 def main():
-    if len(sys.argv) > 2:
-        sys.exit("Usage: python degrees.py [directory]")
-    directory = sys.argv[1] if len(sys.argv) == 2 else "large"
+    global verbose
+    args = [arg for arg in sys.argv[1:] if arg != "-v"]
+    verbose = len(args) < len(sys.argv) - 1
+    if len(args) > 1:
+        sys.exit("Usage: python degrees.py [directory] [-v]")
+    directory = args[0] if args else "large"
     print(directory)
 
     # Load data from files into memory
@@ -93,6 +112,19 @@ def main():
             print("Person not fount")
             continue
 
+        name = ""
+        if(not len(people[source_id]['movies'])):
+            name = people[source_id]['name']+' has'
+        if(not len(people[target_id]['movies'])):
+            if name:
+                name = "Both Persons have"
+            else:
+                name = people[target_id]['name']+' has'
+        if name:
+            print(f"\n{name} not acted in any movie")
+        else:
+            print("\nPlease wait, while searching for the connections...")
+
         path = shortest_path(source_id, target_id)
 
         if path is None:
@@ -114,130 +146,110 @@ def shortest_path(source_id, target_id):
 
     If no possible path, returns None.
     """
+    path, stats = search(source_id, target_id)
+    if verbose:
+        print(stats)
+    return path
 
-    # Implemented below the search method using Queue Frontier
-    # raise NotImplementedError
 
-    name = ""
-    if(not len(people[source_id]['movies'])):
-        name = people[source_id]['name']+' has'
-    if(not len(people[target_id]['movies'])):
-        if name:
-            name = "Both Persons have"
-        else:
-            name = people[target_id]['name']+' has'
-    if name:
-        print(f"\n{name} not acted in any movie")
-        return None
-    
-    path=[]
-    source_nodes_checked = []
-    target_nodes_checked = []
-    source_node_to_check = Node(source_id, None, None)
-    target_node_to_check = Node(target_id, None, None)
-
-    frontier_source = QueueFrontier()
-    frontier_target = QueueFrontier()
-    print("\nPlease wait, while searching for the connections...")
-
-    path_found = False
-    while True: #(input("Continue:").lower()=='y'):
-
-        source_nodes_checked.append(source_node_to_check)
-        #print("\tChecking Node from source",source_node_to_check.state)
-        target_nodes_checked.append(target_node_to_check)
-        #print("\n\tChecking Node from target",target_node_to_check.state)
-
-        if(len(frontier_source.frontier)>=len(frontier_target.frontier)):
-            for node in target_nodes_checked:
-                print("Target stock checked", node.state, node.parent)
-                if(source_node_to_check.state == node.state):
-                    path_found = True
-                    print("\nIntersection found by source in target")
-                    node_id = source_node_to_check.state
-                    for node in reversed(source_nodes_checked):
-                        if(node.state==node_id and node.parent is not None):
-                            path += [(node.action,node.state)]
-                            node_id=node.parent
-                            print(node.state, node.parent, node.action)
-                    path.reverse()
-                    print("\n")
-
-                    node_id = source_node_to_check.state
-                    for node in reversed(target_nodes_checked):
-                        if(node.state==node_id and node.parent is not None): 
-                            path += [(node.action,node.parent)]
-                            print(node.state, node.parent, node.action)
-                            node_id=node.parent
-
-                if path_found:
-                    break
-        
-        print("\n")
-        if (len(frontier_source.frontier)<len(frontier_target.frontier)): #not path_found:
-            for node in source_nodes_checked:
-                print("Source stock checked", node.state, node.parent)
-                if(target_node_to_check.state == node.state):
-                    path_found = True
-                    print("\nIntersection found by target in source")
-                    node_id=target_node_to_check.state
-                    for node in reversed(source_nodes_checked):
-                        if(node.state==node_id and node.parent is not None):
-                            path += [(node.action,node.state)]
-                            node_id=node.parent
-                            print(node.state, node.parent, node.action)
-                    path.reverse()
-                    print("\n")
-
-                    node_id = target_node_to_check.state
-                    for node in reversed(target_nodes_checked):
-                        if(node.state==node_id and node.parent is not None):
-                            path += [(node.action,node.parent)]
-                            print(node.state, node.parent, node.action)
-                            node_id=node.parent
-
-                if path_found:
-                    break
-
-
-        #To break outside the while loop
-        if path_found:
-            print("full path:",path)
-            break
+def search(source_id, target_id, hooks=None):
+    """
+    Searches for the shortest path from the source to the target like
+    `shortest_path`, calling `hooks`, a SearchHooks, if given.
 
-        #Identify the connected nodes for source_id
-        neighbours = neighbors_for_person(source_node_to_check.state)
-        #Expand the source frontier with the connected nodes to the current node
-        for neighbour in neighbours:
-            if(not(frontier_source.contains_state(neighbour[1])) and\
-                not(any(node.state==neighbour[1] for node in source_nodes_checked))):
-                node = Node(neighbour[1],source_node_to_check.state,neighbour[0])
-                frontier_source.add(node)
-        
-        #Identify the connected nodes for target_id
-        neighbours = neighbors_for_person(target_node_to_check.state)
-        #Expand the target frontier with the connected nodes to the current node
-        for neighbour in neighbours:
-            if(not(frontier_target.contains_state(neighbour[1])) and\
-                not(any(node.state==neighbour[1] for node in target_nodes_checked))):
-                node = Node(neighbour[1],target_node_to_check.state,neighbour[0])
-                frontier_target.add(node)
+    Returns the path and the SearchStats of the search.
+    """
+
+    # Implemented below as a bidirectional breadth-first search
+    # raise NotImplementedError
 
+    stats = SearchStats(load_seconds)
+    if not people[source_id]["movies"] or not people[target_id]["movies"]:
+        return finish(None, stats, hooks)
+    
+    if source_id == target_id:
+        return finish([], stats, hooks)
+
+    # Each side maps the people it has reached to the (movie_id, person_id)
+    # pair they were reached from, so a meeting is found by a dict lookup
+    source_came_from = {source_id: None}
+    target_came_from = {target_id: None}
+    source_frontier = [source_id]
+    target_frontier = [target_id]
+    meeting_id = None
+
+    with stats.phase("search"):
+        while meeting_id is None and source_frontier and target_frontier:
+
+            #Expand the whole of the smaller level, keeping both searches shallow
+            if len(source_frontier) <= len(target_frontier):
+                source_frontier, meeting_id = expand_level(
+                    source_frontier, source_came_from, target_came_from,
+                    stats, hooks
+                )
+                frontier = source_frontier
+            else:
+                target_frontier, meeting_id = expand_level(
+                    target_frontier, target_came_from, source_came_from,
+                    stats, hooks
+                )
+                frontier = target_frontier
+            stats.frontier_peak = max(stats.frontier_peak, len(frontier))
+            if hooks is not None:
+                hooks.on_level(frontier)
+
+    # Every meeting point found while expanding a level gives a path of
+    # the same, shortest length, so the first one can be used
+    if meeting_id is None:
+        return finish(None, stats, hooks)
+    with stats.phase("path"):
+        path = join_paths(source_came_from, target_came_from, meeting_id)
+    return finish(path, stats, hooks)
+
+
+def expand_level(frontier, came_from, other_came_from, stats=None, hooks=None):
+    """
+    Expands every person in one level of a breadth-first search, recording
+    in `came_from` how each newly reached person was reached, and counting
+    the people expanded and edges scanned in `stats` if given.
 
-        #List the new frontiers for testing
-        #print("\nSource Frontier:")
-        #frontier_source.list_state_of_loaded_nodes()
+    Returns the next level and the first person found that has already been
+    reached by the other side of the search, or None if there is none.
+    """
+    next_frontier = []
+    edges_scanned = 0
+    meeting_id = None
+    for nodes_expanded, person_id in enumerate(frontier, 1):
+        neighbors = neighbors_for_person(person_id)
+        edges_scanned += len(neighbors)
+        if hooks is not None:
+            hooks.on_expand(person_id, neighbors)
+        for movie_id, neighbour_id in neighbors:
+            if neighbour_id in came_from:
+                continue
+            came_from[neighbour_id] = (movie_id, person_id)
+            if neighbour_id in other_came_from:
+                meeting_id = neighbour_id
+                break
+            next_frontier.append(neighbour_id)
+        if meeting_id is not None:
+            break
+    if stats is not None and frontier:
+        stats.nodes_expanded += nodes_expanded
+        stats.edges_scanned += edges_scanned
+    return next_frontier, meeting_id
 
-        #print("\nTarget Frontier:")
-        #frontier_target.list_state_of_loaded_nodes()
 
-        try:
-            source_node_to_check = frontier_source.remove()
-            target_node_to_check = frontier_target.remove()
-        except Exception:
-            return None
-    
-    print("Total Nodes checked", len(source_nodes_checked)+len(target_nodes_checked))
+def join_paths(source_came_from, target_came_from, meeting_id):
+    """
+    Returns the (movie_id, person_id) pairs from the source to the target
+    through `meeting_id`, using the parents recorded by both searches.
+    """
+    path = path_from_parents(source_came_from, meeting_id)
+    person_id = meeting_id
+    while target_came_from[person_id] is not None:
+        movie_id, person_id = target_came_from[person_id]
+        path.append((movie_id, person_id))
     return path
 
 def person_id_for_name(name):
@@ -245,8 +257,9 @@ def person_id_for_name(name):
     Returns the IMDB id for a person's name,
     resolving ambiguities as needed.
     """    
-    person_ids = list(names.get(name.lower(), set()))
-    #person_ids += person_ids_for_part_entry(name)
+    person_ids = list(
+        names.get(name.lower(), set()) | set(person_ids_for_part_entry(name))
+    )
     if len(person_ids) == 0:
         return None
 
@@ -283,20 +296,11 @@ def person_ids_for_part_entry(name_entered):
     """
     Returns the person ids for entry of first name or sir name.
     """
-    person_ids = []
-
     if len(name_entered) == 0:
-        return person_ids
-
-    name_entered = name_entered.lower()
-    for name in names:
-        name_splitted = name.split()
-        if name_entered == name_splitted[-1]:
-            name_list = list(names.get(name))
-            for person_id in name_list:
-                person_ids.append(person_id)
-    
-    return person_ids
+        return []
+    return list(
+        name_index.first_name(name_entered) | name_index.surname(name_entered)
+    )
 
 if __name__ == "__main__":
     main()
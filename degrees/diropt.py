@@ -0,0 +1,238 @@
+"""
+Direction-optimizing breadth-first search for degrees.
+
+A top-down step expands every edge of the frontier, which on the co-star
+graph means re-touching huge numbers of people who were reached long
+ago once the frontier covers a large share of the graph. A bottom-up
+step instead scans the people (or movies) not yet reached and stops at
+the first neighbor that is in the frontier. Following Beamer et al., the
+search switches to bottom-up when the frontier has more than 1/ALPHA of
+the edges still unexplored, and back to top-down once the frontier
+shrinks below 1/BETA of the nodes.
+
+Each step of the person-movie bipartite graph (people to movies, and
+movies to people) chooses its direction separately, and every search
+counts the edges it examines so the two strategies can be compared. The
+same queries are then timed with degrees.shortest_path, CSRGraph.bfs and
+the direction-optimizing search.
+
+Usage: python diropt.py [directory] [queries]
+"""
+
+import random
+import sys
+import time
+
+import numpy as np
+
+import degrees
+from cache import load_graph
+from graph import gather
+
+# Beamer et al. use ALPHA = 14 on social graphs, but most people have only
+# a few credits, so a bottom-up scan seldom stops much before the end of
+# a person's movies and only pays off once the frontier is much larger
+ALPHA = 2
+BETA = 24
+SEED = 50
+
+
+def main():
+    if len(sys.argv) > 3:
+        sys.exit("Usage: python diropt.py [directory] [queries]")
+    directory = sys.argv[1] if len(sys.argv) > 1 else "large"
+    queries = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+
+    graph = load_graph(directory)
+    degrees.load_data(directory)
+    rng = random.Random(SEED)
+    # Only people with credits can be connected, as in degrees.py
+    candidates = np.flatnonzero(np.diff(graph.person_offsets)).tolist()
+    pairs = []
+    while len(pairs) < queries:
+        source = rng.choice(candidates)
+        target = rng.choice(candidates)
+        if graph.connected(source, target):
+            pairs.append((source, target))
+
+    print(f"{'source':>12}{'target':>12}{'degrees':>9}"
+          f"{'top-down edges':>17}{'optimized edges':>17}")
+    totals = [0, 0]
+    for source, target in pairs:
+        counts = []
+        for mode in ("top-down", "auto"):
+            parent_person, parent_movie, edges = direction_optimizing_bfs(
+                graph, source, target, mode=mode
+            )
+            counts.append(edges)
+        path = graph.path(parent_person, parent_movie, source, target)
+        totals = [totals[0] + counts[0], totals[1] + counts[1]]
+        print(f"{graph.person_ids[source]:>12}{graph.person_ids[target]:>12}"
+              f"{len(path):>9}{counts[0]:>17}{counts[1]:>17}")
+    if totals[1]:
+        print(f"Edges examined by the top-down search: "
+              f"{totals[0] / totals[1]:.1f}x those of the optimized search")
+
+    searches = {
+        "degrees.shortest_path": lambda source, target: degrees.shortest_path(
+            graph.person_ids[source], graph.person_ids[target]
+        ),
+        "CSRGraph.bfs": lambda source, target: graph.bfs(source, [target]),
+        "direction-optimizing": lambda source, target: direction_optimizing_bfs(
+            graph, source, target
+        ),
+    }
+    print(f"\n{'search':<24}{'ms per query':>14}")
+    for name, search in searches.items():
+        start = time.perf_counter()
+        for source, target in pairs:
+            search(source, target)
+        seconds = time.perf_counter() - start
+        print(f"{name:<24}{seconds / len(pairs) * 1000:>14.2f}")
+
+
+def direction_optimizing_bfs(graph, source, target=None, alpha=ALPHA,
+                             beta=BETA, mode="auto"):
+    """
+    Breadth-first search from person index `source` over a CSRGraph,
+    stopping after the level that reaches person index `target` if given.
+    With mode="top-down" every step expands the frontier, as CSRGraph.bfs
+    does, for comparison.
+
+    Returns `parent_person` and `parent_movie` arrays like CSRGraph.bfs,
+    and the number of edges examined.
+    """
+    person_seen = np.zeros(graph.person_count, dtype=bool)
+    movie_seen = np.zeros(graph.movie_count, dtype=bool)
+    parent_person = np.full(graph.person_count, -1, dtype=np.int32)
+    parent_movie = np.full(graph.person_count, -1, dtype=np.int32)
+    movie_parent = np.full(graph.movie_count, -1, dtype=np.int32)
+    person_degrees = np.diff(graph.person_offsets)
+    movie_degrees = np.diff(graph.movie_offsets)
+
+    # Edges of the people and movies not reached yet, which is what a
+    # bottom-up step would have to scan
+    unexplored_person_edges = int(person_degrees.sum() - person_degrees[source])
+    unexplored_movie_edges = int(movie_degrees.sum())
+    movies_bottom_up = False
+    people_bottom_up = False
+
+    person_seen[source] = True
+    frontier = np.array([source], dtype=np.int32)
+    edges = 0
+    while frontier.size:
+        if target is not None and person_seen[target]:
+            break
+
+        # People to movies
+        frontier_edges = int(person_degrees[frontier].sum())
+        movies_bottom_up = mode == "auto" and choose_bottom_up(
+            movies_bottom_up, frontier_edges, unexplored_movie_edges,
+            frontier.size, graph.person_count, alpha, beta
+        )
+        if movies_bottom_up:
+            movies, parents, examined = bottom_up_step(
+                frontier, graph.person_count, movie_seen,
+                graph.movie_offsets, graph.movie_people
+            )
+        else:
+            movies, parents, examined = top_down_step(
+                frontier, movie_seen, graph.person_offsets, graph.person_movies
+            )
+        edges += examined
+        movie_parent[movies] = parents
+        unexplored_movie_edges -= int(movie_degrees[movies].sum())
+
+        # Movies to people
+        frontier_edges = int(movie_degrees[movies].sum())
+        people_bottom_up = mode == "auto" and choose_bottom_up(
+            people_bottom_up, frontier_edges, unexplored_person_edges,
+            movies.size, graph.movie_count, alpha, beta
+        )
+        if people_bottom_up:
+            people, parents, examined = bottom_up_step(
+                movies, graph.movie_count, person_seen,
+                graph.person_offsets, graph.person_movies
+            )
+        else:
+            people, parents, examined = top_down_step(
+                movies, person_seen, graph.movie_offsets, graph.movie_people
+            )
+        edges += examined
+        parent_movie[people] = parents
+        parent_person[people] = movie_parent[parents]
+        unexplored_person_edges -= int(person_degrees[people].sum())
+        frontier = people.astype(np.int32)
+
+    return parent_person, parent_movie, edges
+
+
+def choose_bottom_up(bottom_up, frontier_edges, unexplored_edges,
+                     frontier_size, node_count, alpha, beta):
+    """
+    Returns whether the next step should run bottom-up, given whether the
+    previous step of the same kind did.
+    """
+    if bottom_up:
+        return frontier_size >= node_count / beta
+    return frontier_edges > unexplored_edges / alpha
+
+
+def top_down_step(frontier, seen, offsets, indices):
+    """
+    Expands every edge of the frontier, marking the nodes reached in `seen`.
+
+    Returns the nodes reached, the frontier node each was reached from,
+    and the number of edges examined.
+    """
+    nodes, owners = gather(offsets, indices, frontier)
+    fresh = ~seen[nodes]
+    nodes, first = np.unique(nodes[fresh], return_index=True)
+    seen[nodes] = True
+    return nodes, frontier[owners[fresh][first]], len(owners)
+
+
+def bottom_up_step(frontier, frontier_count, seen, offsets, indices):
+    """
+    Scans the neighbors of every node not yet in `seen` for one in the
+    frontier, stopping at the first one found. `offsets` and `indices`
+    list the neighbors of the nodes being reached.
+
+    The scan runs in rounds, each looking at the next neighbor of every
+    node still being scanned, so a node drops out of the scan as soon as
+    it is reached and only the edges actually looked at are counted.
+
+    Returns the nodes reached, the frontier node each was reached from,
+    and the number of edges examined.
+    """
+    in_frontier = np.zeros(frontier_count, dtype=bool)
+    in_frontier[frontier] = True
+    nodes = np.flatnonzero(~seen)
+    positions = offsets[nodes]
+    ends = offsets[nodes + 1]
+    scanning = positions < ends
+    nodes, positions, ends = nodes[scanning], positions[scanning], ends[scanning]
+
+    reached = []
+    parents = []
+    examined = 0
+    while nodes.size:
+        neighbors = indices[positions]
+        examined += nodes.size
+        hits = in_frontier[neighbors]
+        reached.append(nodes[hits])
+        parents.append(neighbors[hits])
+        positions += 1
+        scanning = ~hits & (positions < ends)
+        nodes, positions, ends = nodes[scanning], positions[scanning], ends[scanning]
+
+    # Rounds reach nodes out of order; sort them as a top-down step does
+    reached = np.concatenate(reached) if reached else np.empty(0, dtype=np.int64)
+    parents = np.concatenate(parents) if parents else np.empty(0, dtype=indices.dtype)
+    order = np.argsort(reached, kind="stable")
+    reached = reached[order]
+    seen[reached] = True
+    return reached, parents[order], examined
+
+if __name__ == "__main__":
+    main()
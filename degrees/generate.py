@@ -0,0 +1,141 @@
+"""
+Synthetic people.csv, movies.csv and stars.csv for benchmarking degrees.
+
+Cast sizes follow a power law, as in IMDB: most movies list a handful of
+stars and a few list hundreds. How often each person is cast follows a
+power law too, so a small number of prolific actors connect most of the
+graph, while many people appear once or not at all. Names are drawn from
+short lists of first names and surnames, so that names are ambiguous as
+often as in the real data. The same seed always produces the same files.
+
+Usage: python generate.py directory [credits] [seed]
+"""
+
+import os
+import sys
+
+import numpy as np
+
+SEED = 50
+CREDITS = 100_000
+
+# Exponents of the power laws for cast sizes and for how often each
+# person is cast; larger exponents mean fewer very large values
+CAST_EXPONENT = 2.1
+CASTING_EXPONENT = 0.7
+MAX_CAST = 500
+
+# Average credits per person, and the share of people with a birth year
+CREDITS_PER_PERSON = 4
+BIRTH_SHARE = 0.8
+
+FIRST_NAMES = [
+    "Adam", "Alice", "Anna", "Ben", "Chris", "Claire", "Dan", "Diane",
+    "Emma", "Eric", "Grace", "Henry", "Ivan", "Jane", "John", "Kate",
+    "Kevin", "Laura", "Lee", "Maria", "Mark", "Mary", "Nina", "Omar",
+    "Paul", "Rosa", "Sam", "Sara", "Tom", "Yuki",
+]
+SURNAMES = [
+    "Bacon", "Brown", "Chen", "Cruise", "Davis", "Garcia", "Hanks", "Ito",
+    "Jones", "Kim", "Lee", "Lopez", "Martin", "Miller", "Nguyen", "Novak",
+    "Patel", "Rossi", "Schmidt", "Silva", "Smith", "Taylor", "Walker",
+    "Wilson", "Young",
+]
+
+FIRST_YEAR = 1920
+LAST_YEAR = 2024
+
+
+def main():
+    if len(sys.argv) < 2 or len(sys.argv) > 4:
+        sys.exit("Usage: python generate.py directory [credits] [seed]")
+    directory = sys.argv[1]
+    credits = int(float(sys.argv[2])) if len(sys.argv) > 2 else CREDITS
+    seed = int(sys.argv[3]) if len(sys.argv) > 3 else SEED
+
+    counts = generate(directory, credits, seed)
+    print(f"Wrote {counts['people']} people, {counts['movies']} movies and "
+          f"{counts['credits']} credits to '{directory}'.")
+
+
+def generate(directory, credits=CREDITS, seed=SEED):
+    """
+    Writes a dataset of about `credits` credits to `directory`.
+
+    Returns the number of people, movies and credits written.
+    """
+    rng = np.random.default_rng(seed)
+    os.makedirs(directory, exist_ok=True)
+
+    cast_sizes = sample_cast_sizes(rng, credits)
+    movie_count = len(cast_sizes)
+    person_count = max(credits // CREDITS_PER_PERSON, 1)
+
+    # Casting weights fall off with a person's rank; ranks are shuffled so
+    # that the prolific actors are spread through the ids
+    weights = 1.0 / np.arange(1, person_count + 1) ** CASTING_EXPONENT
+    weights = rng.permutation(weights / weights.sum())
+    people = rng.choice(person_count, size=int(cast_sizes.sum()), p=weights)
+    movies = np.repeat(np.arange(movie_count), cast_sizes)
+
+    # Drawing the same person twice for one movie gives a single credit
+    keys = np.unique(movies.astype(np.int64) * person_count + people)
+    movies, people = keys // person_count, keys % person_count
+
+    first = rng.integers(len(FIRST_NAMES), size=person_count)
+    last = rng.integers(len(SURNAMES), size=person_count)
+    births = rng.integers(FIRST_YEAR - 80, LAST_YEAR - 10, size=person_count)
+    has_birth = rng.random(person_count) < BIRTH_SHARE
+    years = rng.integers(FIRST_YEAR, LAST_YEAR + 1, size=movie_count)
+
+    write_csv(f"{directory}/people.csv", "id,name,birth", (
+        f"{i + 1},{FIRST_NAMES[f]} {SURNAMES[s]},{b if known else ''}"
+        for i, f, s, b, known in zip(
+            range(person_count), first.tolist(), last.tolist(),
+            births.tolist(), has_birth.tolist()
+        )
+    ))
+    write_csv(f"{directory}/movies.csv", "id,title,year", (
+        f"{i + 1},Movie {i + 1},{year}" for i, year in enumerate(years.tolist())
+    ))
+    write_csv(f"{directory}/stars.csv", "person_id,movie_id", (
+        f"{p + 1},{m + 1}" for p, m in zip(people.tolist(), movies.tolist())
+    ))
+    return {"people": person_count, "movies": movie_count, "credits": len(keys)}
+
+
+def sample_cast_sizes(rng, credits):
+    """
+    Returns power-law distributed cast sizes adding up to `credits`.
+    """
+    sizes = []
+    total = 0
+    while total < credits:
+        batch = np.minimum(rng.zipf(CAST_EXPONENT, size=max(credits // 4, 16)), MAX_CAST)
+        sizes.append(batch)
+        total += int(batch.sum())
+    sizes = np.concatenate(sizes)
+    count = int(np.searchsorted(np.cumsum(sizes), credits)) + 1
+    sizes = sizes[:count]
+    sizes[-1] -= int(sizes.sum()) - credits
+    return sizes
+
+
+def write_csv(path, header, lines, batch=100_000):
+    """
+    Writes a header and lines of CSV, joining them in batches.
+    """
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(header + "\n")
+        chunk = []
+        for line in lines:
+            chunk.append(line)
+            if len(chunk) == batch:
+                f.write("\n".join(chunk) + "\n")
+                chunk = []
+        if chunk:
+            f.write("\n".join(chunk) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,599 @@
+"""
+Compact graph backend for degrees.
+
+People and movies are interned to dense integer indices, and the
+person-movie bipartite graph is stored as two CSR (compressed sparse row)
+structures: `person_offsets`/`person_movies` list the movies of each
+person, and `movie_offsets`/`movie_people` list the stars of each movie.
+Finding the co-stars of a person is then a pair of array slices rather
+than a walk over dictionaries of sets.
+"""
+
+import csv
+from bisect import bisect_left, bisect_right
+from collections.abc import Mapping, Sequence
+
+import numpy as np
+
+
+class CSRGraph():
+
+    def __init__(self, person_ids, movie_ids, person_offsets, person_movies,
+                 movie_offsets, movie_people, person_names=None,
+                 person_births=None, movie_titles=None, movie_years=None,
+                 person_index=None, movie_index=None, name_order=None,
+                 components=None):
+        """
+        Wrap already built CSR arrays.
+
+        `person_ids` and `movie_ids` map dense indices back to IMDB ids, and
+        the optional name, birth, title and year columns are indexed the
+        same way. `person_index` and `movie_index` map IMDB ids to indices
+        and are built as dictionaries unless given, and `name_order` is
+        the person indices sorted by lowercase name, computed when first
+        needed unless given, like the `components` labels.
+        """
+        self.person_ids = person_ids
+        self.movie_ids = movie_ids
+        self.person_offsets = person_offsets
+        self.person_movies = person_movies
+        self.movie_offsets = movie_offsets
+        self.movie_people = movie_people
+        self.person_names = person_names
+        self.person_births = person_births
+        self.movie_titles = movie_titles
+        self.movie_years = movie_years
+        if person_index is None:
+            person_index = {
+                person_id: i for i, person_id in enumerate(person_ids)
+            }
+        if movie_index is None:
+            movie_index = {
+                movie_id: i for i, movie_id in enumerate(movie_ids)
+            }
+        self.person_index = person_index
+        self.movie_index = movie_index
+        self._name_order = name_order
+        self._components = components
+
+    @classmethod
+    def from_edges(cls, person_ids, movie_ids, stars_people, stars_movies,
+                   **columns):
+        """
+        Build a graph from parallel arrays of person and movie indices, one
+        entry per star credit. Duplicate credits are dropped.
+        """
+        person_count = len(person_ids)
+        movie_count = len(movie_ids)
+
+        # Sorting the combined keys both removes duplicates and orders the
+        # credits by person, which is exactly the layout of person_movies
+        keys = np.unique(
+            np.asarray(stars_people, dtype=np.int64) * max(movie_count, 1)
+            + np.asarray(stars_movies, dtype=np.int64)
+        )
+        people = (keys // max(movie_count, 1)).astype(np.int32)
+        movies = (keys % max(movie_count, 1)).astype(np.int32)
+
+        person_offsets = offsets_for(people, person_count)
+        order = np.argsort(movies, kind="stable")
+        movie_offsets = offsets_for(movies, movie_count)
+        return cls(
+            person_ids, movie_ids,
+            person_offsets, movies,
+            movie_offsets, people[order],
+            **columns
+        )
+
+    @classmethod
+    def from_data(cls, people, movies):
+        """
+        Build a graph from the `people` and `movies` dictionaries that
+        degrees.load_data fills in.
+        """
+        person_ids = list(people)
+        movie_ids = list(movies)
+        person_index = {person_id: i for i, person_id in enumerate(person_ids)}
+        stars_people = []
+        stars_movies = []
+        for j, movie_id in enumerate(movie_ids):
+            for person_id in movies[movie_id]["stars"]:
+                stars_people.append(person_index[person_id])
+                stars_movies.append(j)
+        return cls.from_edges(
+            person_ids, movie_ids, stars_people, stars_movies,
+            person_names=[people[p]["name"] for p in person_ids],
+            person_births=[people[p]["birth"] for p in person_ids],
+            movie_titles=[movies[m]["title"] for m in movie_ids],
+            movie_years=[movies[m]["year"] for m in movie_ids],
+        )
+
+    @classmethod
+    def from_csv(cls, directory):
+        """
+        Build a graph straight from the CSV files in `directory`, without
+        building the per-person and per-movie dictionaries first.
+        """
+        person_ids, names, births = [], [], []
+        with open(f"{directory}/people.csv", encoding="utf-8") as f:
+            reader = csv.DictReader(f)
+            for row in reader:
+                person_ids.append(row["id"])
+                names.append(row["name"])
+                births.append(row["birth"])
+
+        movie_ids, titles, years = [], [], []
+        with open(f"{directory}/movies.csv", encoding="utf-8") as f:
+            reader = csv.DictReader(f)
+            for row in reader:
+                movie_ids.append(row["id"])
+                titles.append(row["title"])
+                years.append(row["year"])
+
+        person_index = {person_id: i for i, person_id in enumerate(person_ids)}
+        movie_index = {movie_id: i for i, movie_id in enumerate(movie_ids)}
+        stars_people = []
+        stars_movies = []
+        with open(f"{directory}/stars.csv", encoding="utf-8") as f:
+            reader = csv.DictReader(f)
+            for row in reader:
+                try:
+                    i = person_index[row["person_id"]]
+                    j = movie_index[row["movie_id"]]
+                except KeyError:
+                    continue
+                stars_people.append(i)
+                stars_movies.append(j)
+
+        return cls.from_edges(
+            person_ids, movie_ids, stars_people, stars_movies,
+            person_names=names, person_births=births,
+            movie_titles=titles, movie_years=years,
+        )
+
+    @property
+    def person_count(self):
+        return len(self.person_offsets) - 1
+
+    @property
+    def movie_count(self):
+        return len(self.movie_offsets) - 1
+
+    @property
+    def name_order(self):
+        """
+        Person indices sorted by lowercase name, for name lookups by
+        binary search.
+        """
+        if self._name_order is None:
+            names = self.person_names
+            self._name_order = np.array(
+                sorted(range(self.person_count), key=lambda i: names[i].lower()),
+                dtype=np.int32
+            )
+        return self._name_order
+
+    @property
+    def components(self):
+        """
+        Connected component label of every person: the smallest person
+        index in their component.
+        """
+        if self._components is None:
+            self._components = component_labels(self)
+        return self._components
+
+    @property
+    def component_sizes(self):
+        """
+        Sizes of all the connected components, largest first.
+        """
+        sizes = np.bincount(self.components, minlength=self.person_count)
+        sizes = sizes[sizes > 0]
+        return np.sort(sizes)[::-1]
+
+    def connected(self, source, target):
+        """
+        Returns whether person indices `source` and `target` are in the
+        same connected component.
+        """
+        return self.components[source] == self.components[target]
+
+    @property
+    def nbytes(self):
+        """
+        Size in bytes of the CSR arrays.
+        """
+        return sum(
+            array.nbytes for array in (
+                self.person_offsets, self.person_movies,
+                self.movie_offsets, self.movie_people
+            )
+        )
+
+    def close(self):
+        """
+        Closes any columns left on disk, like the CSVColumns of a streamed
+        graph.
+        """
+        for column in (self.person_names, self.person_births,
+                       self.movie_titles, self.movie_years):
+            if hasattr(column, "close"):
+                column.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def movies_of(self, person):
+        """
+        Returns the movie indices of person index `person`.
+        """
+        return self.person_movies[
+            self.person_offsets[person]:self.person_offsets[person + 1]
+        ]
+
+    def stars_of(self, movie):
+        """
+        Returns the person indices of the stars of movie index `movie`.
+        """
+        return self.movie_people[
+            self.movie_offsets[movie]:self.movie_offsets[movie + 1]
+        ]
+
+    def neighbors_for_person(self, person_id):
+        """
+        Returns (movie_id, person_id) pairs for people who starred with a
+        given person, like degrees.neighbors_for_person.
+        """
+        movie_ids = self.movie_ids
+        person_ids = self.person_ids
+        neighbors = set()
+        for movie in self.movies_of(self.person_index[person_id]):
+            for person in self.stars_of(movie):
+                neighbors.add((movie_ids[movie], person_ids[person]))
+        return neighbors
+
+    def bfs(self, source, targets=None, stats=None, hooks=None):
+        """
+        Level-synchronous breadth-first search from person index `source`,
+        expanding a whole level of people at once with array operations.
+        If `targets` is given, a sequence of person indices, stops after the
+        level that reaches the last of them; otherwise searches everything
+        reachable from the source.
+
+        People expanded, edges scanned and the largest level are added to
+        `stats`, a SearchStats, and `hooks`, a SearchHooks, is called with
+        every person expanded and every level reached, if given.
+
+        Returns `parent_person` and `parent_movie` arrays holding, for every
+        reached person, the person and movie they were first reached
+        through, and -1 for the source and for people not reached.
+        """
+        parent_person = np.full(self.person_count, -1, dtype=np.int32)
+        parent_movie = np.full(self.person_count, -1, dtype=np.int32)
+        person_seen = np.zeros(self.person_count, dtype=bool)
+        movie_seen = np.zeros(self.movie_count, dtype=bool)
+        person_seen[source] = True
+        frontier = np.array([source], dtype=np.int32)
+        if stats is not None:
+            stats.frontier_peak = max(stats.frontier_peak, 1)
+        if targets is not None:
+            # Targets in another component would only make the search
+            # exhaust the source's component before giving up
+            targets = np.asarray(targets, dtype=np.int64)
+            targets = targets[self.components[targets] == self.components[source]]
+
+        while frontier.size:
+            if targets is not None and person_seen[targets].all():
+                break
+            if hooks is not None:
+                for person in frontier:
+                    person_id = self.person_ids[person]
+                    hooks.on_expand(person_id, self.neighbors_for_person(person_id))
+            people, parents, movies = self.expand(
+                frontier, person_seen, movie_seen, stats
+            )
+            parent_person[people] = parents
+            parent_movie[people] = movies
+            frontier = people
+            if stats is not None:
+                stats.frontier_peak = max(stats.frontier_peak, int(people.size))
+            if hooks is not None and people.size:
+                hooks.on_level({self.person_ids[person] for person in people})
+
+        return parent_person, parent_movie
+
+    def distances(self, source):
+        """
+        Returns the degrees of separation from person index `source` to
+        every person, as an int32 array with -1 for people not reached.
+        """
+        distance = np.full(self.person_count, -1, dtype=np.int32)
+        person_seen = np.zeros(self.person_count, dtype=bool)
+        movie_seen = np.zeros(self.movie_count, dtype=bool)
+        person_seen[source] = True
+        distance[source] = 0
+        frontier = np.array([source], dtype=np.int32)
+        level = 0
+        while frontier.size:
+            level += 1
+            frontier, _, _ = self.expand(frontier, person_seen, movie_seen)
+            distance[frontier] = level
+        return distance
+
+    def expand(self, frontier, person_seen, movie_seen, stats=None):
+        """
+        Expands one level of a breadth-first search, marking the movies and
+        people it reaches in the `movie_seen` and `person_seen` arrays, and
+        counting the people expanded and the person-movie edges scanned in
+        `stats`, if given.
+
+        Returns the newly reached people, and for each of them the person
+        and the movie they were reached through.
+        """
+        # Movies of the current level that no earlier person has expanded;
+        # every star of an expanded movie has been reached already
+        movies, owners = gather(self.person_offsets, self.person_movies, frontier)
+        edges = len(movies)
+        fresh = ~movie_seen[movies]
+        movies, first = np.unique(movies[fresh], return_index=True)
+        movie_parents = frontier[owners[fresh][first]]
+        movie_seen[movies] = True
+
+        # Stars of those movies who have not been reached yet
+        people, owners = gather(self.movie_offsets, self.movie_people, movies)
+        if stats is not None:
+            stats.nodes_expanded += int(frontier.size)
+            stats.edges_scanned += edges + len(people)
+        fresh = ~person_seen[people]
+        people, first = np.unique(people[fresh], return_index=True)
+        owners = owners[fresh][first]
+        person_seen[people] = True
+        return people, movie_parents[owners], movies[owners]
+
+    def path(self, parent_person, parent_movie, source, target):
+        """
+        Returns the (movie_id, person_id) pairs leading from person index
+        `source` to person index `target` in a search tree returned by
+        `bfs`, or None if `target` was not reached.
+        """
+        if target != source and parent_person[target] < 0:
+            return None
+        path = []
+        person = target
+        while person != source:
+            movie = parent_movie[person]
+            path.append((self.movie_ids[movie], self.person_ids[person]))
+            person = parent_person[person]
+        path.reverse()
+        return path
+
+    def shortest_path(self, source_id, target_id, stats=None, hooks=None):
+        """
+        Returns the shortest list of (movie_id, person_id) pairs
+        that connect the source to the target, counting the search in
+        `stats` and calling `hooks` like `bfs`.
+
+        If no possible path, returns None.
+        """
+        source = self.person_index[source_id]
+        target = self.person_index[target_id]
+        if not self.connected(source, target):
+            return None
+        parent_person, parent_movie = self.bfs(source, [target], stats, hooks)
+        return self.path(parent_person, parent_movie, source, target)
+
+
+class PeopleView(Mapping):
+    """
+    Read-only view of a CSRGraph shaped like the `people` dictionary in
+    degrees.py, mapping person_ids to their name, birth and movies.
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+
+    def __getitem__(self, person_id):
+        graph = self.graph
+        person = graph.person_index[person_id]
+        return {
+            "name": graph.person_names[person],
+            "birth": graph.person_births[person],
+            "movies": {graph.movie_ids[m] for m in graph.movies_of(person)}
+        }
+
+    def __iter__(self):
+        return iter(self.graph.person_ids)
+
+    def __len__(self):
+        return self.graph.person_count
+
+
+class MoviesView(Mapping):
+    """
+    Read-only view of a CSRGraph shaped like the `movies` dictionary in
+    degrees.py, mapping movie_ids to their title, year and stars.
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+
+    def __getitem__(self, movie_id):
+        graph = self.graph
+        movie = graph.movie_index[movie_id]
+        return {
+            "title": graph.movie_titles[movie],
+            "year": graph.movie_years[movie],
+            "stars": {graph.person_ids[p] for p in graph.stars_of(movie)}
+        }
+
+    def __iter__(self):
+        return iter(self.graph.movie_ids)
+
+    def __len__(self):
+        return self.graph.movie_count
+
+
+class NamesView(Mapping):
+    """
+    Read-only view of a CSRGraph shaped like the `names` dictionary in
+    degrees.py, mapping lowercase names to sets of person_ids. Lookups
+    binary search the graph's `name_order`, so no dictionary is built.
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+
+    def _key(self, person):
+        return self.graph.person_names[person].lower()
+
+    def __getitem__(self, name):
+        order = self.graph.name_order
+        start = bisect_left(order, name, key=self._key)
+        end = bisect_right(order, name, lo=start, key=self._key)
+        if start == end:
+            raise KeyError(name)
+        return {self.graph.person_ids[p] for p in order[start:end]}
+
+    def __iter__(self):
+        previous = None
+        for person in self.graph.name_order:
+            name = self._key(person)
+            if name != previous:
+                yield name
+                previous = name
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+
+class StringTable(Sequence):
+    """
+    Immutable sequence of strings stored as one UTF-8 byte array and an
+    array of offsets into it, so it can be saved with NumPy and
+    memory-mapped back without decoding every string up front.
+    """
+
+    def __init__(self, data, offsets):
+        self.data = data
+        self.offsets = offsets
+
+    @classmethod
+    def from_strings(cls, strings):
+        encoded = [string.encode("utf-8") for string in strings]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(b) for b in encoded], out=offsets[1:])
+        data = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+        return cls(data, offsets)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        start, end = self.offsets[i], self.offsets[i + 1]
+        return self.data[start:end].tobytes().decode("utf-8")
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+
+class SortedIndex(Mapping):
+    """
+    Maps the strings of a sequence to their positions by binary search
+    over a precomputed sort order, so no dictionary has to be built.
+    """
+
+    def __init__(self, keys, order):
+        self.keys = keys
+        self.order = order
+
+    @classmethod
+    def build(cls, keys):
+        order = np.array(
+            sorted(range(len(keys)), key=keys.__getitem__), dtype=np.int32
+        )
+        return cls(keys, order)
+
+    def __getitem__(self, key):
+        k = bisect_left(self.order, key, key=self.keys.__getitem__)
+        if k < len(self.order) and self.keys[self.order[k]] == key:
+            return int(self.order[k])
+        raise KeyError(key)
+
+    def __iter__(self):
+        return iter(self.keys)
+
+    def __len__(self):
+        return len(self.keys)
+
+
+def component_labels(graph):
+    """
+    Labels the connected components of a CSRGraph by propagating the
+    smallest person index through shared movies until nothing changes,
+    with pointer jumping to shortcut long chains.
+    """
+    labels = np.arange(graph.person_count, dtype=np.int32)
+    movie_labels = np.zeros(graph.movie_count, dtype=np.int32)
+
+    # reduceat needs the start of every non-empty row
+    has_stars = np.diff(graph.movie_offsets) > 0
+    has_movies = np.diff(graph.person_offsets) > 0
+    star_starts = graph.movie_offsets[:-1][has_stars]
+    movie_starts = graph.person_offsets[:-1][has_movies]
+
+    while True:
+        # Smallest label among each movie's stars, then among each
+        # person's movies
+        movie_labels[has_stars] = np.minimum.reduceat(
+            labels[graph.movie_people], star_starts
+        )
+        updated = labels.copy()
+        updated[has_movies] = np.minimum(
+            labels[has_movies],
+            np.minimum.reduceat(movie_labels[graph.person_movies], movie_starts)
+        )
+        while True:
+            jumped = updated[updated]
+            if np.array_equal(jumped, updated):
+                break
+            updated = jumped
+        if np.array_equal(updated, labels):
+            return labels
+        labels = updated
+
+
+def offsets_for(rows, count):
+    """
+    Returns the CSR offsets for `count` rows, given the row of every entry
+    sorted in row order.
+    """
+    offsets = np.zeros(count + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=count), out=offsets[1:])
+    return offsets
+
+
+def gather(offsets, indices, rows):
+    """
+    Returns the concatenated CSR rows `rows` of `indices`, along with the
+    position in `rows` that each returned entry came from.
+    """
+    return gather_ranges(indices, offsets[rows], offsets[rows + 1])
+
+
+def gather_ranges(indices, starts, ends):
+    """
+    Returns the concatenated slices `indices[starts[i]:ends[i]]`, along
+    with the `i` that each returned entry came from.
+    """
+    lengths = ends - starts
+    owners = np.repeat(np.arange(len(starts)), lengths)
+    totals = np.cumsum(lengths)
+    positions = np.arange(totals[-1] if len(totals) else 0) + np.repeat(
+        starts - (totals - lengths), lengths
+    )
+    return indices[positions], owners
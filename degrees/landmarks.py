@@ -0,0 +1,210 @@
+"""
+Landmark-based distance oracle for degrees.
+
+Breadth-first search distances from a handful of well connected
+"landmark" actors are precomputed into one array. By the triangle
+inequality, for any landmark L the separation of two people s and t is
+at least |d(L, s) - d(L, t)| and at most d(L, s) + d(L, t), which bounds
+the separation of any pair in microseconds. The same lower bound is an
+admissible heuristic for A* search (the ALT algorithm), which lets
+`shortest_path` skip most of the graph a breadth-first search would visit.
+"""
+
+import heapq
+import math
+
+import numpy as np
+
+from graph import gather
+from util import path_from_parents
+
+LANDMARKS = 16
+
+# Distance stored for people a landmark cannot reach. Distances are kept
+# as int32, as graph.distances returns them, so that no real distance can
+# be mistaken for this one however long the graph's paths are
+UNREACHABLE = -1
+
+
+class LandmarkIndex():
+
+    def __init__(self, graph, landmarks, distances):
+        """
+        Wrap precomputed landmark distances over a CSRGraph: `landmarks`
+        holds the person index of each landmark, and `distances` is an
+        int32 array with one row per person and one column per landmark,
+        holding UNREACHABLE where the landmark cannot reach the person.
+        """
+        self.graph = graph
+        self.landmarks = landmarks
+        self.distances = distances
+
+    @classmethod
+    def build(cls, graph, count=LANDMARKS, landmark_ids=None):
+        """
+        Precompute distances from the `count` people with the most co-stars,
+        or from the people in `landmark_ids` if given.
+        """
+        if landmark_ids is not None:
+            landmarks = np.array(
+                [graph.person_index[person_id] for person_id in landmark_ids],
+                dtype=np.int32
+            )
+        else:
+            landmarks = most_connected(graph, count)
+
+        distances = np.empty((graph.person_count, len(landmarks)), dtype=np.int32)
+        for column, landmark in enumerate(landmarks):
+            distances[:, column] = graph.distances(landmark)
+        return cls(graph, landmarks, distances)
+
+    def save(self, path):
+        """
+        Saves the landmarks and their distances to the .npz file `path`.
+        """
+        np.savez(path, landmarks=self.landmarks, distances=self.distances)
+
+    @classmethod
+    def load(cls, graph, path):
+        """
+        Loads landmark distances saved by `save` for the same graph.
+        """
+        with np.load(path) as data:
+            if data["distances"].dtype != np.int32:
+                # Older files held uint8 distances, in which 255 meant both
+                # "unreachable" and "255 or more" and cannot be told apart
+                raise ValueError(f"Outdated landmark file, rebuild it: {path}")
+            return cls(graph, data["landmarks"], data["distances"])
+
+    def bounds(self, source_id, target_id):
+        """
+        Returns a (lower, upper) pair of bounds on the degrees of
+        separation between two people. The upper bound is math.inf when no
+        landmark reaches both people, and both bounds are math.inf when
+        the landmarks prove the two are not connected.
+        """
+        source = self.graph.person_index[source_id]
+        target = self.graph.person_index[target_id]
+        if source == target:
+            return 0, 0
+        return separation_bounds(self.distances[source], self.distances[target])
+
+    def shortest_path(self, source_id, target_id):
+        """
+        Returns the shortest list of (movie_id, person_id) pairs
+        that connect the source to the target, using A* search guided by
+        the landmark lower bounds.
+
+        If no possible path, returns None.
+        """
+        graph = self.graph
+        source = graph.person_index[source_id]
+        target = graph.person_index[target_id]
+        if source == target:
+            return []
+        if not graph.connected(source, target):
+            return None
+        target_distances = self.distances[target]
+        target_reached = target_distances != UNREACHABLE
+
+        def heuristic(people):
+            """
+            Returns the lower bound on the distance to the target for each
+            of `people`, or -1 for people who cannot reach it.
+            """
+            rows = self.distances[people]
+            reached = rows != UNREACHABLE
+            both = reached & target_reached
+            estimate = np.where(both, np.abs(rows - target_distances), 0).max(axis=1)
+            disconnected = (reached != target_reached).any(axis=1)
+            return np.where(disconnected, -1, estimate)
+
+        # Best known distance to each person and to each movie expanded,
+        # and the (movie, person) pair each person was reached from
+        best = {source: 0}
+        movie_best = {}
+        came_from = {source: None}
+        frontier = [(int(heuristic([source])[0]), 0, source)]
+        if frontier[0][0] < 0:
+            return None
+
+        while frontier:
+            _, distance, person = heapq.heappop(frontier)
+            distance = -distance
+            if distance > best[person]:
+                continue
+            if person == target:
+                path = path_from_parents(came_from, target)
+                return [
+                    (graph.movie_ids[movie], graph.person_ids[star])
+                    for movie, star in path
+                ]
+
+            # A movie only needs expanding again if reached more cheaply
+            movies = [
+                movie for movie in graph.movies_of(person).tolist()
+                if movie_best.get(movie, math.inf) > distance
+            ]
+            if not movies:
+                continue
+            for movie in movies:
+                movie_best[movie] = distance
+            stars, owners = gather(
+                graph.movie_offsets, graph.movie_people,
+                np.array(movies, dtype=np.int64)
+            )
+
+            # Score every newly improved co-star with one heuristic lookup
+            improved = [
+                i for i, star in enumerate(stars.tolist())
+                if best.get(star, math.inf) > distance + 1
+            ]
+            if not improved:
+                continue
+            stars = stars[improved]
+            estimates = heuristic(stars).tolist()
+            for star, owner, estimate in zip(
+                    stars.tolist(), owners[improved].tolist(), estimates):
+                if estimate < 0 or best.get(star, math.inf) <= distance + 1:
+                    continue
+                best[star] = distance + 1
+                came_from[star] = (movies[owner], person)
+                # Ties are broken towards deeper nodes, nearer the target
+                heapq.heappush(
+                    frontier, (distance + 1 + estimate, -(distance + 1), star)
+                )
+
+        return None
+
+
+def most_connected(graph, count):
+    """
+    Returns the person indices of the `count` people with the most
+    co-star credits, best connected first.
+    """
+    cast_sizes = np.diff(graph.movie_offsets)
+    owners = np.repeat(
+        np.arange(graph.person_count), np.diff(graph.person_offsets)
+    )
+    costars = np.bincount(
+        owners, weights=cast_sizes[graph.person_movies] - 1,
+        minlength=graph.person_count
+    )
+    count = min(count, graph.person_count)
+    top = np.argpartition(-costars, count - 1)[:count]
+    return top[np.argsort(-costars[top], kind="stable")].astype(np.int32)
+
+
+def separation_bounds(source_distances, target_distances):
+    """
+    Returns (lower, upper) bounds on the separation of two different
+    people, given their rows of landmark distances.
+    """
+    lower, upper = 1, math.inf
+    for s, t in zip(source_distances.tolist(), target_distances.tolist()):
+        if (s == UNREACHABLE) != (t == UNREACHABLE):
+            return math.inf, math.inf
+        if s != UNREACHABLE:
+            lower = max(lower, abs(s - t))
+            upper = min(upper, s + t)
+    return lower, upper
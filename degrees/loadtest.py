@@ -0,0 +1,134 @@
+"""
+Load test for the degrees HTTP service in server.py.
+
+Sends /path queries between random pairs of people (and optionally some
+/person queries) from many concurrent keep-alive connections, and
+reports throughput and the p50 and p99 latency of each kind of request.
+The server must already be running on the same dataset.
+
+Usage: python loadtest.py directory [requests] [concurrency] [port]
+"""
+
+import asyncio
+import json
+import random
+import sys
+import time
+from urllib.parse import urlencode
+
+from cache import load_graph
+from server import HOST, PORT
+
+SEED = 50
+
+# Share of requests that are /person lookups rather than /path searches
+PERSON_SHARE = 0.2
+
+
+def main():
+    if len(sys.argv) < 2 or len(sys.argv) > 5:
+        sys.exit("Usage: python loadtest.py directory [requests] [concurrency] [port]")
+    directory = sys.argv[1]
+    requests = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    concurrency = int(sys.argv[3]) if len(sys.argv) > 3 else 32
+    port = int(sys.argv[4]) if len(sys.argv) > 4 else PORT
+
+    graph = load_graph(directory)
+    targets = make_targets(graph, requests)
+    latencies, statuses, seconds = asyncio.run(
+        run(targets, concurrency, HOST, port)
+    )
+
+    print(f"{requests} requests from {concurrency} connections "
+          f"in {seconds:.2f} seconds ({requests / seconds:.1f} requests/s)")
+    print(f"{'endpoint':<10}{'count':>8}{'p50 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for endpoint, values in sorted(latencies.items()):
+        values.sort()
+        print(f"{endpoint:<10}{len(values):>8}"
+              f"{percentile(values, 50) * 1000:>10.1f}"
+              f"{percentile(values, 99) * 1000:>10.1f}"
+              f"{values[-1] * 1000:>10.1f}")
+    print("Responses: " + ", ".join(
+        f"{count} x {status}" for status, count in sorted(statuses.items())
+    ))
+
+
+def make_targets(graph, requests):
+    """
+    Returns (endpoint, request target) pairs for a seeded mix of queries.
+    """
+    rng = random.Random(SEED)
+    targets = []
+    for _ in range(requests):
+        if rng.random() < PERSON_SHARE:
+            name = graph.person_names[rng.randrange(graph.person_count)]
+            targets.append(("/person", "/person?" + urlencode({"name": name})))
+        else:
+            source = graph.person_ids[rng.randrange(graph.person_count)]
+            target = graph.person_ids[rng.randrange(graph.person_count)]
+            query = urlencode({"source": source, "target": target})
+            targets.append(("/path", "/path?" + query))
+    return targets
+
+
+async def run(targets, concurrency, host, port):
+    """
+    Sends every request over `concurrency` connections.
+
+    Returns the latencies of each endpoint, a count of the response
+    statuses and the total time taken.
+    """
+    queue = asyncio.Queue()
+    for target in targets:
+        queue.put_nowait(target)
+    latencies = {}
+    statuses = {}
+
+    async def client():
+        reader, writer = await asyncio.open_connection(host, port)
+        try:
+            while not queue.empty():
+                endpoint, target = queue.get_nowait()
+                start = time.perf_counter()
+                status, _ = await request(reader, writer, host, target)
+                latencies.setdefault(endpoint, []).append(
+                    time.perf_counter() - start
+                )
+                statuses[status] = statuses.get(status, 0) + 1
+        finally:
+            writer.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return latencies, statuses, time.perf_counter() - start
+
+
+async def request(reader, writer, host, target):
+    """
+    Sends one GET request on an open connection and returns the response
+    status and decoded JSON body.
+    """
+    writer.write(f"GET {target} HTTP/1.1\r\nHost: {host}\r\n\r\n".encode("latin-1"))
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        key, _, value = line.decode("latin-1").partition(":")
+        if key.strip().lower() == "content-length":
+            length = int(value)
+    return status, json.loads(await reader.readexactly(length))
+
+
+def percentile(values, p):
+    """
+    Returns the `p`th percentile of a sorted list, by the nearest rank.
+    """
+    rank = max(1, -(-len(values) * p // 100))
+    return values[int(rank) - 1]
+
+
+if __name__ == "__main__":
+    main()
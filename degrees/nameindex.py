@@ -0,0 +1,119 @@
+"""
+Name index for looking people up by full name, first name, surname or
+the start of any of them.
+
+The index is built once from the `names` dictionary (lowercase full name
+to a set of person_ids). Each word of a name goes into an inverted index
+of tokens, and the distinct full names and tokens are kept in sorted
+lists, so a prefix lookup is a binary search followed by a short scan.
+"""
+
+from bisect import bisect_left
+
+COMPLETIONS = 10
+
+
+class NameIndex():
+
+    def __init__(self, names):
+        """
+        Build the index from a mapping of lowercase full names to sets of
+        person_ids.
+        """
+        self.names = names
+        self.full_names = {}
+        self.first_names = {}
+        self.surnames = {}
+        tokens = {}
+        for name in names:
+            words = name.split()
+            if not words:
+                continue
+            self.full_names.setdefault(" ".join(words), []).append(name)
+            self.first_names.setdefault(words[0], []).append(name)
+            self.surnames.setdefault(words[-1], []).append(name)
+            for word in set(words):
+                tokens.setdefault(word, []).append(name)
+        self.tokens = tokens
+        self.sorted_names = sorted(names)
+        self.sorted_tokens = sorted(tokens)
+
+    def exact(self, name):
+        """
+        Returns the set of person_ids with exactly this full name, ignoring
+        case and extra whitespace.
+        """
+        return self.people(self.full_names.get(normalize(name), ()))
+
+    def first_name(self, word):
+        """
+        Returns the set of person_ids whose first name is `word`.
+        """
+        return self.people(self.first_names.get(normalize(word), ()))
+
+    def surname(self, word):
+        """
+        Returns the set of person_ids whose surname is `word`.
+        """
+        return self.people(self.surnames.get(normalize(word), ()))
+
+    def lookup(self, text):
+        """
+        Returns the set of person_ids whose full name, first name or
+        surname is `text`.
+        """
+        return self.exact(text) | self.first_name(text) | self.surname(text)
+
+    def complete(self, prefix, limit=COMPLETIONS):
+        """
+        Returns up to `limit` lowercase full names for autocompletion:
+        names starting with `prefix` first, in order, then names with any
+        other word starting with it.
+        """
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+
+        completions = []
+        for name in starting_with(self.sorted_names, prefix):
+            if len(completions) == limit:
+                return completions
+            completions.append(name)
+
+        seen = set(completions)
+        for token in starting_with(self.sorted_tokens, prefix):
+            for name in self.tokens[token]:
+                if name in seen:
+                    continue
+                if len(completions) == limit:
+                    return completions
+                completions.append(name)
+                seen.add(name)
+        return completions
+
+    def people(self, full_names):
+        """
+        Returns the set of person_ids having any of `full_names`.
+        """
+        person_ids = set()
+        for name in full_names:
+            person_ids |= self.names[name]
+        return person_ids
+
+
+def normalize(text):
+    """
+    Returns `text` lowercased, with runs of whitespace made single spaces
+    and none at either end, as names are keyed in the index.
+    """
+    return " ".join(text.lower().split())
+
+
+def starting_with(sorted_strings, prefix):
+    """
+    Yields the strings of a sorted list that start with `prefix`, in order.
+    """
+    for i in range(bisect_left(sorted_strings, prefix), len(sorted_strings)):
+        if not sorted_strings[i].startswith(prefix):
+            return
+        yield sorted_strings[i]
@@ -0,0 +1,232 @@
+"""
+Multi-core, level-synchronous breadth-first search for degrees.
+
+The CSR arrays of a CSRGraph are copied once into shared memory, together
+with bitmaps of the people and movies already visited. Each level of the
+search is split across a pool of worker processes: every worker expands
+its slice of the frontier against the shared arrays and bitmaps and sends
+back the people it reached, and the parent process merges the slices,
+records parents and sets the visited bits before the next level. Levels
+too small to be worth the round trip are expanded in the parent process.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from graph import gather
+
+WORKERS = os.cpu_count()
+
+# Levels with fewer people than this are expanded without the pool
+MIN_PARALLEL_FRONTIER = 4096
+
+# Shared arrays attached to by each worker process, and the blocks that
+# must stay open for as long as the arrays are used
+worker_arrays = None
+worker_blocks = []
+
+
+class ParallelBFS():
+
+    def __init__(self, graph, workers=WORKERS):
+        """
+        Copy the adjacency of a CSRGraph into shared memory and start a
+        pool of `workers` processes attached to it.
+        """
+        self.graph = graph
+        self.workers = workers
+        self.blocks = []
+        self.arrays = {}
+        specs = {}
+        for name in ("person_offsets", "person_movies", "movie_offsets", "movie_people"):
+            array = getattr(graph, name)
+            specs[name] = self.share(name, array.shape, array.dtype, array)
+        specs["person_bits"] = self.share(
+            "person_bits", ((graph.person_count + 7) // 8,), np.uint8
+        )
+        specs["movie_bits"] = self.share(
+            "movie_bits", ((graph.movie_count + 7) // 8,), np.uint8
+        )
+        specs["frontier"] = self.share(
+            "frontier", (max(graph.person_count, 1),), np.int32
+        )
+        self.pool = ProcessPoolExecutor(
+            max_workers=workers, initializer=init_worker, initargs=(specs,)
+        )
+
+    def share(self, name, shape, dtype, contents=None):
+        """
+        Allocates a shared memory block for an array, optionally copying
+        `contents` into it, and returns the spec workers use to attach.
+        """
+        size = max(int(np.prod(shape)) * np.dtype(dtype).itemsize, 1)
+        block = shared_memory.SharedMemory(create=True, size=size)
+        self.blocks.append(block)
+        array = np.ndarray(shape, dtype=dtype, buffer=block.buf)
+        if contents is None:
+            array[:] = 0
+        else:
+            array[:] = contents
+        self.arrays[name] = array
+        return (block.name, shape, np.dtype(dtype).str)
+
+    def close(self):
+        """
+        Stops the worker pool and frees the shared memory.
+        """
+        self.pool.shutdown()
+        self.arrays = None
+        for block in self.blocks:
+            block.close()
+            block.unlink()
+        self.blocks = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def bfs(self, source, target=None, stats=None, hooks=None):
+        """
+        Breadth-first search from person index `source`, stopping after
+        the level that reaches person index `target` if given, counting
+        the search in `stats` and calling `hooks` like CSRGraph.bfs.
+
+        Returns `parent_person` and `parent_movie` arrays like CSRGraph.bfs.
+        """
+        graph = self.graph
+        arrays = self.arrays
+        person_bits = arrays["person_bits"]
+        movie_bits = arrays["movie_bits"]
+        person_bits[:] = 0
+        movie_bits[:] = 0
+        parent_person = np.full(self.graph.person_count, -1, dtype=np.int32)
+        parent_movie = np.full(self.graph.person_count, -1, dtype=np.int32)
+
+        frontier = np.array([source], dtype=np.int32)
+        set_bits(person_bits, frontier)
+        if stats is not None:
+            stats.frontier_peak = max(stats.frontier_peak, 1)
+        while frontier.size:
+            if target is not None and test_bits(person_bits, [target])[0]:
+                break
+            if hooks is not None:
+                for person in frontier:
+                    person_id = graph.person_ids[person]
+                    hooks.on_expand(person_id, graph.neighbors_for_person(person_id))
+
+            if frontier.size < MIN_PARALLEL_FRONTIER or self.workers < 2:
+                slices = [expand_slice(arrays, frontier)]
+            else:
+                arrays["frontier"][:frontier.size] = frontier
+                bounds = np.linspace(0, frontier.size, self.workers + 1).astype(int)
+                slices = list(self.pool.map(
+                    expand_shared, zip(bounds[:-1], bounds[1:])
+                ))
+
+            # Slices may reach the same person; keep the first parent found
+            people = np.concatenate([s[0] for s in slices])
+            parents = np.concatenate([s[1] for s in slices])
+            movies = np.concatenate([s[2] for s in slices])
+            people, first = np.unique(people, return_index=True)
+            set_bits(person_bits, people)
+            set_bits(movie_bits, np.concatenate([s[3] for s in slices]))
+            parent_person[people] = parents[first]
+            parent_movie[people] = movies[first]
+            frontier_size = frontier.size
+            frontier = people.astype(np.int32)
+            if stats is not None:
+                stats.nodes_expanded += int(frontier_size)
+                stats.edges_scanned += sum(s[4] for s in slices)
+                stats.frontier_peak = max(stats.frontier_peak, int(frontier.size))
+            if hooks is not None and frontier.size:
+                hooks.on_level({graph.person_ids[person] for person in frontier})
+
+        return parent_person, parent_movie
+
+    def shortest_path(self, source_id, target_id, stats=None, hooks=None):
+        """
+        Returns the shortest list of (movie_id, person_id) pairs
+        that connect the source to the target, counting the search in
+        `stats` and calling `hooks` like `bfs`.
+
+        If no possible path, returns None.
+        """
+        graph = self.graph
+        source = graph.person_index[source_id]
+        target = graph.person_index[target_id]
+        if not graph.connected(source, target):
+            return None
+        parent_person, parent_movie = self.bfs(source, target, stats, hooks)
+        return graph.path(parent_person, parent_movie, source, target)
+
+
+def attach(specs, blocks):
+    """
+    Returns numpy views of the shared arrays described by `specs`,
+    appending the SharedMemory objects that back them to `blocks`.
+    """
+    arrays = {}
+    for name, (block_name, shape, dtype) in specs.items():
+        block = shared_memory.SharedMemory(name=block_name)
+        blocks.append(block)
+        arrays[name] = np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf)
+    return arrays
+
+
+def init_worker(specs):
+    """
+    Attaches a worker process to the shared arrays.
+    """
+    global worker_arrays
+    worker_arrays = attach(specs, worker_blocks)
+
+
+def expand_shared(bounds):
+    """
+    Expands the slice of the shared frontier between `bounds` in a worker.
+    """
+    start, end = bounds
+    return expand_slice(worker_arrays, worker_arrays["frontier"][start:end])
+
+
+def expand_slice(arrays, frontier):
+    """
+    Expands part of a search level against the visited bitmaps, which are
+    only read here.
+
+    Returns the people reached, the person and movie each was reached
+    through, the movies expanded and the number of edges scanned.
+    """
+    movies, owners = gather(arrays["person_offsets"], arrays["person_movies"], frontier)
+    edges = len(movies)
+    fresh = ~test_bits(arrays["movie_bits"], movies)
+    movies, first = np.unique(movies[fresh], return_index=True)
+    movie_parents = frontier[owners[fresh][first]]
+
+    people, owners = gather(arrays["movie_offsets"], arrays["movie_people"], movies)
+    edges += len(people)
+    fresh = ~test_bits(arrays["person_bits"], people)
+    people, first = np.unique(people[fresh], return_index=True)
+    owners = owners[fresh][first]
+    return people, movie_parents[owners], movies[owners], movies, edges
+
+
+def test_bits(bits, indices):
+    """
+    Returns whether the bit for each of `indices` is set.
+    """
+    indices = np.asarray(indices, dtype=np.int64)
+    return ((bits[indices >> 3] >> (indices & 7).astype(np.uint8)) & 1).astype(bool)
+
+
+def set_bits(bits, indices):
+    """
+    Sets the bit for each of `indices`.
+    """
+    indices = np.asarray(indices, dtype=np.int64)
+    np.bitwise_or.at(bits, indices >> 3, np.left_shift(1, indices & 7).astype(np.uint8))
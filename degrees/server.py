@@ -0,0 +1,260 @@
+"""
+Local HTTP/JSON query service for degrees.
+
+The graph is loaded once, from the on-disk cache, and then answers
+
+    GET /path?source=...&target=...    shortest path between two people
+    GET /person?name=...               people matching a name
+    GET /stats                         search tree cache hits and misses
+
+where people may be given by name or by person_id. Requests are handled
+concurrently on an asyncio event loop; path searches are sent to a pool of
+worker processes, each memory-mapping the same cache and keeping its own
+cache of search trees, so a long search never blocks the loop from
+serving other requests.
+
+Usage: python server.py directory [port] [workers]
+"""
+
+import asyncio
+import json
+import multiprocessing
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import parse_qs, urlsplit
+
+from batch import cached_search, init_worker, resolve
+from cache import load_graph
+from graph import NamesView
+from nameindex import NameIndex
+
+HOST = "127.0.0.1"
+PORT = 8000
+
+# Most people returned for one /person query
+MAX_PEOPLE = 50
+
+REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    500: "Internal Server Error",
+}
+
+
+def main():
+    if len(sys.argv) < 2 or len(sys.argv) > 4:
+        sys.exit("Usage: python server.py directory [port] [workers]")
+    directory = sys.argv[1]
+    port = int(sys.argv[2]) if len(sys.argv) > 2 else PORT
+    workers = int(sys.argv[3]) if len(sys.argv) > 3 else os.cpu_count()
+
+    print("Loading data...")
+    service = DegreesService(directory, workers)
+    print(f"Data loaded. Serving on http://{HOST}:{port}")
+    try:
+        asyncio.run(service.serve(HOST, port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.close()
+
+
+class DegreesService():
+
+    def __init__(self, directory, workers=None):
+        """
+        Load the graph in `directory`, building its cache if needed, and
+        start a pool of `workers` search processes over the same cache.
+        """
+        self.graph = load_graph(directory)
+        self.names = NamesView(self.graph)
+        self.name_index = NameIndex(self.names)
+        # Workers are started on demand; forked ones would inherit the
+        # sockets of open connections and keep them open after they close
+        self.pool = ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+            initializer=init_worker, initargs=(directory,)
+        )
+
+        # Latest search tree cache info reported by each worker process
+        self.cache_info = {}
+
+    def close(self):
+        self.pool.shutdown(cancel_futures=True)
+
+    async def serve(self, host=HOST, port=PORT):
+        server = await asyncio.start_server(self.handle, host, port)
+        async with server:
+            await server.serve_forever()
+
+    async def handle(self, reader, writer):
+        """
+        Serves the requests of one connection, keeping it open between
+        requests unless the client asks to close it.
+        """
+        try:
+            while True:
+                try:
+                    request = await read_request(reader)
+                except ValueError as error:
+                    writer.write(encode_response(400, {"error": str(error)}, False))
+                    await writer.drain()
+                    break
+                if request is None:
+                    break
+                method, target, headers = request
+                try:
+                    status, body = await self.respond(method, target)
+                except Exception as error:
+                    # Such as a BrokenProcessPool; later requests may succeed
+                    status, body = 500, {"error": f"{type(error).__name__}: {error}"}
+                keep_alive = headers.get("connection", "").lower() != "close"
+                writer.write(encode_response(status, body, keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def respond(self, method, target):
+        """
+        Returns the status and JSON body answering one request.
+        """
+        if method != "GET":
+            return 405, {"error": f"Method not allowed: {method}"}
+        url = urlsplit(target)
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        if url.path == "/path":
+            return await self.path(query)
+        if url.path == "/person":
+            return await self.person(query)
+        if url.path == "/stats":
+            return self.stats()
+        return 404, {"error": f"Not found: {url.path}"}
+
+    async def path(self, query):
+        """
+        Answers /path, searching in the worker pool.
+        """
+        if "source" not in query or "target" not in query:
+            return 400, {"error": "Expected source and target"}
+        source, error = resolve(self.graph, self.names, query["source"])
+        if error is None:
+            target, error = resolve(self.graph, self.names, query["target"])
+        if error is not None:
+            return 404, {"error": error}
+
+        loop = asyncio.get_running_loop()
+        path, worker, info = await loop.run_in_executor(
+            self.pool, cached_search, (source, target)
+        )
+        self.cache_info[worker] = info
+        return 200, {
+            "source": self.graph.person_ids[source],
+            "target": self.graph.person_ids[target],
+            "degrees": None if path is None else len(path),
+            "path": path,
+        }
+
+    async def person(self, query):
+        """
+        Answers /person with the people whose full name, first name or
+        surname matches, falling back to names starting with it.
+        """
+        name = query.get("name", "").strip()
+        if not name:
+            return 400, {"error": "Expected name"}
+
+        # Common names match many people, so the lookup runs in a thread
+        # to keep the loop serving other requests
+        loop = asyncio.get_running_loop()
+        person_ids = await loop.run_in_executor(None, self.find_people, name)
+        if not person_ids:
+            return 404, {"error": f"Person not found: {name}"}
+
+        graph = self.graph
+        people = []
+        for person_id in person_ids[:MAX_PEOPLE]:
+            person = graph.person_index[person_id]
+            people.append({
+                "id": person_id,
+                "name": graph.person_names[person],
+                "birth": graph.person_births[person],
+                "movies": len(graph.movies_of(person)),
+            })
+        return 200, {"count": len(person_ids), "people": people}
+
+    def find_people(self, name):
+        """
+        Returns the sorted person_ids of the people matching `name`.
+        """
+        person_ids = self.name_index.lookup(name)
+        if not person_ids:
+            person_ids = self.name_index.people(self.name_index.complete(name))
+        return sorted(person_ids)
+
+    def stats(self):
+        """
+        Answers /stats with the search tree cache counts summed over the
+        workers that have answered a query so far.
+        """
+        totals = {"hits": 0, "misses": 0, "size": 0, "maxsize": 0}
+        for info in self.cache_info.values():
+            for key in totals:
+                totals[key] += info[key]
+        return 200, {"tree_cache": totals, "workers": len(self.cache_info)}
+
+
+async def read_request(reader):
+    """
+    Reads the request line and headers of one HTTP request.
+
+    Returns (method, target, headers), or None once the client has closed
+    the connection. Raises ValueError if the request is malformed.
+    """
+    line = await reader.readline()
+    if not line:
+        return None
+    parts = line.decode("latin-1").split()
+    if len(parts) != 3:
+        raise ValueError("Malformed request line")
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        key, _, value = line.decode("latin-1").partition(":")
+        headers[key.strip().lower()] = value.strip()
+
+    # Bodies are not used, but must be read past to reach the next request
+    length = headers.get("content-length", "0") or "0"
+    if not length.isdigit():
+        raise ValueError(f"Malformed Content-Length: {length}")
+    length = int(length)
+    if length:
+        await reader.readexactly(length)
+    return parts[0], parts[1], headers
+
+
+def encode_response(status, body, keep_alive=True):
+    """
+    Returns the bytes of an HTTP response with a JSON body.
+    """
+    content = json.dumps(body).encode("utf-8")
+    head = (
+        f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+        f"Content-Type: application/json\r\n"
+        f"Content-Length: {len(content)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n"
+        f"\r\n"
+    )
+    return head.encode("latin-1") + content
+
+
+if __name__ == "__main__":
+    main()
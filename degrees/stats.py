@@ -0,0 +1,107 @@
+"""
+Instrumentation for the degrees searches.
+
+Every search fills in a SearchStats with what it did, and returns it next
+to the path. Code that wants to watch a search as it runs can pass a
+SearchHooks subclass; searches call it only when one is given, so an
+uninstrumented search pays nothing more than a check against None.
+"""
+
+import time
+from contextlib import contextmanager
+
+
+class SearchStats():
+
+    def __init__(self, load_seconds=0.0):
+        """
+        Counters for one search. `load_seconds` is the time taken to load
+        the data the search ran over. The search counters are None for an
+        answer read from a cached search tree, where nothing was searched.
+        """
+        self.nodes_expanded = 0
+        self.edges_scanned = 0
+        self.frontier_peak = 0
+        self.phases = {}
+        self.load_seconds = load_seconds
+
+        # BFSTreeCache.info() of the search tree cache, if one was consulted
+        self.cache = None
+
+    @contextmanager
+    def phase(self, name):
+        """
+        Adds the wall time spent in a `with` block to phase `name`.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = (
+                self.phases.get(name, 0.0) + time.perf_counter() - start
+            )
+
+    def as_dict(self):
+        return {
+            "nodes_expanded": self.nodes_expanded,
+            "edges_scanned": self.edges_scanned,
+            "frontier_peak": self.frontier_peak,
+            "phases": dict(self.phases),
+            "load_seconds": self.load_seconds,
+            "cache": self.cache,
+        }
+
+    def __str__(self):
+        lines = [
+            f"Nodes expanded: {count(self.nodes_expanded)}",
+            f"Edges scanned: {count(self.edges_scanned)}",
+            f"Largest frontier: {count(self.frontier_peak)}",
+        ]
+        for name, seconds in self.phases.items():
+            lines.append(f"Time in {name}: {seconds * 1000:.2f} ms")
+        lines.append(f"Load time: {self.load_seconds:.2f} s")
+        if self.cache is not None:
+            lines.append(
+                f"Tree cache: {self.cache['hits']} hits, {self.cache['misses']} misses, "
+                f"{self.cache['size']}/{self.cache['maxsize']} trees"
+            )
+        return "\n".join(lines)
+
+
+def count(value):
+    """
+    Formats a search counter, which is None when it could not be counted.
+    """
+    return "n/a" if value is None else value
+
+
+def finish(path, stats, hooks):
+    """
+    Hands the result of a search to `hooks`, if any, and returns it.
+    """
+    if hooks is not None:
+        hooks.on_finish(path, stats)
+    return path, stats
+
+
+class SearchHooks():
+    """
+    Callbacks a search makes as it runs. Subclass and override the ones
+    of interest; the defaults do nothing.
+    """
+
+    def on_expand(self, person_id, neighbors):
+        """
+        Called when a person is expanded, with their (movie_id, person_id)
+        neighbors.
+        """
+
+    def on_level(self, frontier):
+        """
+        Called by level-by-level searches with each new level of people.
+        """
+
+    def on_finish(self, path, stats):
+        """
+        Called once with the path found, or None, and the final stats.
+        """
@@ -0,0 +1,368 @@
+"""
+Streaming, low-memory loader for very large degrees datasets.
+
+Only the adjacency needed for searching is held in memory. people.csv
+and movies.csv are read once to intern their ids, remembering the byte
+offset of every row; names, births, titles and years stay on disk and are
+parsed from those offsets only when a path is printed. The same read of
+people.csv hashes every lowercase name, so that a name is found by binary
+search over the sorted hashes rather than by rescanning the file. stars.csv is read
+in chunks, each converted to integer arrays at once, and the chunks are
+compiled into a CSRGraph at the end.
+
+When every id in a file is numeric, as in the IMDB exports, ids are kept
+as one sorted int64 array and looked up by binary search instead of
+through a dictionary of strings, which is most of the memory saved.
+
+Usage: python streaming.py [directory]
+"""
+
+import csv
+import resource
+import sys
+import time
+from array import array
+from collections.abc import Mapping, Sequence
+
+import numpy as np
+
+from graph import CSRGraph
+
+CHUNK_SIZE = 1_000_000
+
+
+def main():
+    if len(sys.argv) > 2:
+        sys.exit("Usage: python streaming.py [directory]")
+    directory = sys.argv[1] if len(sys.argv) == 2 else "large"
+
+    start = time.perf_counter()
+    graph = load_streaming(directory)
+    seconds = time.perf_counter() - start
+    print(f"Loaded {graph.person_count} people, {graph.movie_count} movies "
+          f"and {len(graph.person_movies)} credits in {seconds:.2f} seconds.")
+    print(f"Graph arrays: {graph.nbytes / 2**20:.1f} MiB, "
+          f"peak RSS: {peak_rss() / 2**20:.1f} MiB")
+
+
+def load_streaming(directory, chunk_size=CHUNK_SIZE):
+    """
+    Returns a CSRGraph for the CSV files in `directory`, holding only the
+    adjacency arrays and id lookups in memory and reading stars.csv
+    `chunk_size` rows at a time.
+    """
+    person_ids, person_offsets, name_hashes = read_ids(
+        f"{directory}/people.csv", "id", hashed="name"
+    )
+    movie_ids, movie_offsets, _ = read_ids(f"{directory}/movies.csv", "id")
+
+    stars_people = []
+    stars_movies = []
+    with open(f"{directory}/stars.csv", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        person_column = header.index("person_id")
+        movie_column = header.index("movie_id")
+        while True:
+            rows = [row for _, row in zip(range(chunk_size), reader)]
+            if not rows:
+                break
+            people = person_ids.lookup([row[person_column] for row in rows])
+            movies = movie_ids.lookup([row[movie_column] for row in rows])
+
+            # Credits naming unknown people or movies are skipped
+            known = (people >= 0) & (movies >= 0)
+            stars_people.append(people[known].astype(np.int32))
+            stars_movies.append(movies[known].astype(np.int32))
+
+    return CSRGraph.from_edges(
+        person_ids, movie_ids,
+        np.concatenate(stars_people) if stars_people else [],
+        np.concatenate(stars_movies) if stars_movies else [],
+        person_names=CSVColumn(
+            f"{directory}/people.csv", person_offsets, "name", hashes=name_hashes
+        ),
+        person_births=CSVColumn(f"{directory}/people.csv", person_offsets, "birth"),
+        movie_titles=CSVColumn(f"{directory}/movies.csv", movie_offsets, "title"),
+        movie_years=CSVColumn(f"{directory}/movies.csv", movie_offsets, "year"),
+        person_index=person_ids,
+        movie_index=movie_ids,
+    )
+
+
+def read_ids(path, column, hashed=None):
+    """
+    Reads one CSV file, returning an Ids lookup of its `column` in row
+    order, the byte offset at which each row starts and, if `hashed` names
+    another column, the hash of each row's lowercase value in it.
+    """
+    # Ids are collected as integers for as long as they are all numeric
+    numbers = array("q")
+    strings = None
+    offsets = array("q")
+    hashes = array("q")
+    for offset, row in csv_rows(path):
+        if hashed is not None:
+            hashes.append(hash(row[hashed].lower()))
+        value = row[column]
+        if strings is None and is_number(value):
+            numbers.append(int(value))
+        else:
+            if strings is None:
+                strings = [str(number) for number in numbers]
+            strings.append(value)
+        offsets.append(offset)
+
+    offsets = np.frombuffer(offsets, dtype=np.int64)
+    hashes = np.frombuffer(hashes, dtype=np.int64) if hashed is not None else None
+    if strings is not None:
+        return Ids.from_strings(strings), offsets, hashes
+    return Ids.from_numbers(np.frombuffer(numbers, dtype=np.int64)), offsets, hashes
+
+
+def csv_rows(path):
+    """
+    Yields (byte offset, row dictionary) for every record of a CSV file.
+    """
+    with open(path, "rb") as f:
+        position = 0
+
+        def lines():
+            nonlocal position
+            for line in f:
+                position += len(line)
+                yield line.decode("utf-8")
+
+        reader = csv.reader(lines())
+        header = next(reader)
+        start = position
+        for row in reader:
+            yield start, dict(zip(header, row))
+            start = position
+
+
+class Ids(Sequence):
+    """
+    Ids of the people or movies of a dataset, as a sequence in row order
+    that can also be indexed by id to find its row, like a dictionary.
+
+    Numeric ids are stored as a sorted int64 array with the row of each;
+    other ids fall back to a list and a dictionary.
+    """
+
+    def __init__(self, values, rows=None, index=None):
+        self.values = values
+        self.rows = rows
+        self.index = index
+        self.positions = None
+
+    @classmethod
+    def from_numbers(cls, numbers):
+        rows = np.argsort(numbers, kind="stable")
+        return cls(numbers[rows], rows=rows)
+
+    @classmethod
+    def from_strings(cls, strings):
+        return cls(strings, index={value: i for i, value in enumerate(strings)})
+
+    def __len__(self):
+        return len(self.values)
+
+    def __getitem__(self, key):
+        # Strings are looked up as ids, anything else is a row index
+        if isinstance(key, str):
+            row = self.get(key)
+            if row is None:
+                raise KeyError(key)
+            return row
+        if self.index is not None:
+            return self.values[key]
+        if self.positions is None:
+            self.positions = np.empty(len(self.rows), dtype=np.int64)
+            self.positions[self.rows] = np.arange(len(self.rows))
+        return str(self.values[self.positions[key]])
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+    def get(self, key, default=None):
+        """
+        Returns the row of id `key`, or `default` if it is not known.
+        """
+        if self.index is not None:
+            return self.index.get(key, default)
+        if not is_number(key):
+            return default
+        number = int(key)
+        k = np.searchsorted(self.values, number)
+        if k < len(self.values) and self.values[k] == number:
+            return int(self.rows[k])
+        return default
+
+    def lookup(self, keys):
+        """
+        Returns the row of each id in `keys` as an int64 array, with -1
+        for ids that are not known.
+        """
+        if self.index is not None:
+            return np.array([self.index.get(key, -1) for key in keys], dtype=np.int64)
+
+        numbers = np.array(
+            [int(key) if is_number(key) else -1 for key in keys], dtype=np.int64
+        )
+        if not len(self.values):
+            return np.full(len(keys), -1, dtype=np.int64)
+        k = np.searchsorted(self.values, numbers)
+        k[k == len(self.values)] = 0
+        found = (self.values[k] == numbers) & (numbers >= 0)
+        return np.where(found, self.rows[k], -1)
+
+
+class CSVColumn(Sequence):
+    """
+    One column of a CSV file, left on disk and parsed on demand from the
+    byte offset of each row. The file is opened on the first such read
+    and kept open until `close`, which CSRGraph.close calls for its
+    columns; a column can also be used as a context manager.
+
+    Given the hash of every row's lowercase value, as from `read_ids`, the
+    rows holding a value can be found with `rows_of`.
+    """
+
+    def __init__(self, path, offsets, column, hashes=None):
+        self.path = path
+        self.offsets = offsets
+        self.column = column
+        self.file = None
+        with open(path, encoding="utf-8", newline="") as f:
+            self.position = next(csv.reader(f)).index(column)
+
+        self.hashes = None
+        if hashes is not None:
+            self.hash_rows = np.argsort(hashes, kind="stable")
+            self.hashes = hashes[self.hash_rows]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if self.file is None:
+            self.file = open(self.path, "rb")
+        f = self.file
+        f.seek(self.offsets[i])
+        line = f.readline().decode("utf-8")
+        # Quoted fields may continue over several lines
+        while line.count('"') % 2:
+            line += f.readline().decode("utf-8")
+        return next(csv.reader([line]))[self.position]
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def __iter__(self):
+        with open(self.path, encoding="utf-8") as f:
+            reader = csv.reader(f)
+            next(reader)
+            for row in reader:
+                yield row[self.position]
+
+    def rows_of(self, value):
+        """
+        Returns the rows whose value matches `value` ignoring case.
+        """
+        value = value.lower()
+        key = hash(value)
+        start, stop = np.searchsorted(self.hashes, [key, key + 1])
+        # Different values may share a hash, so each candidate is read back
+        return [
+            int(row) for row in self.hash_rows[start:stop]
+            if self[row].lower() == value
+        ]
+
+    def first_rows(self):
+        """
+        Returns a boolean array marking, for every distinct hash, the first
+        row holding it, so that each distinct value is seen once by a
+        single pass over the column.
+        """
+        first = np.zeros(len(self), dtype=bool)
+        if len(self.hashes):
+            new = np.ones(len(self.hashes), dtype=bool)
+            new[1:] = self.hashes[1:] != self.hashes[:-1]
+            # The argsort is stable, so the first of each run is its lowest row
+            first[self.hash_rows[new]] = True
+        return first
+
+    def close(self):
+        """
+        Closes the file handle, if a read has opened one.
+        """
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+
+class HashedNames(Mapping):
+    """
+    Read-only `names` mapping for a streamed graph: each lookup searches
+    the sorted name hashes of its people.csv column and reads back only
+    the matching rows, instead of keeping every name in memory.
+
+    Iterating reads the column once, yielding the name of the first row
+    of each hash, so no set of names is built; two different names with
+    the same 64-bit hash would be iterated as one, though both are found
+    by lookup.
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+        self._first_rows = None
+
+    @property
+    def first_rows(self):
+        if self._first_rows is None:
+            self._first_rows = self.graph.person_names.first_rows()
+        return self._first_rows
+
+    def __getitem__(self, name):
+        person_ids = {
+            self.graph.person_ids[i]
+            for i in self.graph.person_names.rows_of(name)
+        }
+        if not person_ids:
+            raise KeyError(name)
+        return person_ids
+
+    def __iter__(self):
+        for first, name in zip(self.first_rows, self.graph.person_names):
+            if first:
+                yield name.lower()
+
+    def __len__(self):
+        return int(self.first_rows.sum())
+
+
+def is_number(value):
+    """
+    Returns whether `value` is an id that can be stored as an integer and
+    turned back into the same string.
+    """
+    return value.isdigit() and (value[0] != "0" or value == "0")
+
+
+def peak_rss():
+    """
+    Returns the peak resident set size of this process, in bytes.
+    """
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,642 @@
+import importlib
+import asyncio
+import heapq
+import itertools
+import json
+import os
+
+import numpy as np
+import pytest
+
+import batch
+import cache
+import degrees
+import diropt
+import parallel
+import server
+import streaming
+from graph import CSRGraph
+from landmarks import LandmarkIndex
+from stats import SearchHooks, SearchStats
+from nameindex import NameIndex
+from treecache import BFSTreeCache, DictTreeCache
+from util import Node, QueueFrontier
+from years import YearIndex
+
+# The small dataset of the CS50 distribution
+PEOPLE = """id,name,birth
+102,"Kevin Bacon",1958
+129,"Tom Cruise",1962
+144,"Cary Elwes",1962
+158,"Tom Hanks",1956
+1597,"Mandy Patinkin",1952
+163,"Dustin Hoffman",1937
+1697,"Chris Sarandon",1942
+193,"Demi Moore",1962
+197,"Jack Nicholson",1937
+200,"Bill Paxton",1955
+398,"Sally Field",1946
+420,"Valeria Golino",1965
+596520,"Gerald R. Molen",1935
+641,"Gary Sinise",1955
+705,"Robin Wright",1966
+914612,"Emma Watson",1990
+"""
+MOVIES = """id,title,year
+112384,"Apollo 13",1995
+104257,"A Few Good Men",1992
+109830,"Forrest Gump",1994
+93779,"The Princess Bride",1987
+95953,"Rain Man",1988
+"""
+STARS = """person_id,movie_id
+102,104257
+102,112384
+129,104257
+129,95953
+144,93779
+158,109830
+158,112384
+1597,93779
+163,95953
+1697,93779
+193,104257
+197,104257
+200,112384
+398,109830
+420,95953
+596520,95953
+641,109830
+641,112384
+705,109830
+705,93779
+"""
+
+
+def write_dataset(directory, people, movies, stars):
+    os.makedirs(directory, exist_ok=True)
+    for filename, text in (
+        ("people.csv", people), ("movies.csv", movies), ("stars.csv", stars)
+    ):
+        with open(os.path.join(directory, filename), "w", encoding="utf-8") as f:
+            f.write(text)
+    return str(directory)
+
+
+@pytest.fixture
+def small(tmp_path):
+    return write_dataset(tmp_path / "small", PEOPLE, MOVIES, STARS)
+
+
+@pytest.fixture
+def chain(tmp_path):
+    """
+    A dataset of 300 people in a line, each in one movie with the next,
+    so that the two ends are 299 degrees apart.
+    """
+    count = 300
+    people = "id,name,birth\n" + "".join(f"{i},Person {i},\n" for i in range(count))
+    movies = "id,title,year\n" + "".join(f"{i},Movie {i},\n" for i in range(count - 1))
+    stars = "person_id,movie_id\n" + "".join(
+        f"{i},{i}\n{i + 1},{i}\n" for i in range(count - 1)
+    )
+    return write_dataset(tmp_path / "chain", people, movies, stars)
+
+
+def baseline_distance(source_id, target_id):
+    """
+    Degrees of separation found by the distribution's breadth-first search
+    over degrees.neighbors_for_person, or None if not connected.
+    """
+    frontier = QueueFrontier()
+    frontier.add(Node(source_id, None, None))
+    depths = {source_id: 0}
+    while not frontier.empty():
+        node = frontier.remove()
+        if node.state == target_id:
+            return depths[target_id]
+        for _, person_id in degrees.neighbors_for_person(node.state):
+            if person_id not in depths:
+                depths[person_id] = depths[node.state] + 1
+                frontier.add(Node(person_id, node, None))
+    return None
+
+
+def check_path(source_id, path):
+    """
+    Asserts that every step of `path` is a movie both people starred in.
+    """
+    person_id = source_id
+    for movie_id, next_id in path:
+        stars = degrees.movies[movie_id]["stars"]
+        assert person_id in stars and next_id in stars
+        person_id = next_id
+
+
+def baseline_distances(directory):
+    """
+    Returns the baseline degrees of separation between every ordered pair
+    of people in `directory`, with None for pairs where either person has
+    no credits, as degrees.py answers them.
+    """
+    importlib.reload(degrees)
+    degrees.load_data(directory)
+    credited = {person_id for person_id in degrees.people if degrees.people[person_id]["movies"]}
+    return {
+        (source_id, target_id):
+            baseline_distance(source_id, target_id)
+            if source_id in credited and target_id in credited else None
+        for source_id, target_id in itertools.product(degrees.people, repeat=2)
+    }
+
+
+@pytest.mark.parametrize("backend", ["dict", "csr", "cache", "stream"])
+def test_paths_match_baseline_search(small, backend):
+    expected = baseline_distances(small)
+    importlib.reload(degrees)
+    degrees.load_data(small, backend)
+    for (source_id, target_id), distance in expected.items():
+        path = degrees.shortest_path(source_id, target_id)
+        assert (None if path is None else len(path)) == distance
+        if path:
+            check_path(source_id, path)
+            assert path[-1][1] == target_id
+
+
+def test_cache_rebuilds_when_sources_change(small):
+    graph = cache.load_graph(small)
+    assert len(graph.person_movies) == 20
+    assert isinstance(cache.load_graph(small).person_offsets, np.memmap)
+
+    # A different size
+    with open(os.path.join(small, "stars.csv"), "a", encoding="utf-8") as f:
+        f.write("914612,112384\n")
+    assert len(cache.load_graph(small).person_movies) == 21
+
+    # The same size, with only the modification time to tell them apart
+    path = os.path.join(small, "people.csv")
+    stat = os.stat(path)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(PEOPLE.replace("Kevin Bacon", "Kevin Bacom"))
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert os.stat(path).st_size == stat.st_size
+    graph = cache.load_graph(small)
+    assert graph.person_names[graph.person_index["102"]] == "Kevin Bacom"
+
+
+@pytest.mark.parametrize("dataset", ["small", "chain"])
+@pytest.mark.parametrize("mode, alpha, beta", [
+    ("top-down", diropt.ALPHA, diropt.BETA),
+    ("auto", diropt.ALPHA, diropt.BETA),
+    # Every step bottom-up
+    ("auto", 1e-9, 1e9),
+])
+def test_direction_optimizing_bfs_matches_csr_bfs(dataset, mode, alpha, beta, request):
+    graph = CSRGraph.from_csv(request.getfixturevalue(dataset))
+    for source in range(0, graph.person_count, 37):
+        expected = graph.distances(source)
+        parent_person, parent_movie, _ = diropt.direction_optimizing_bfs(
+            graph, source, mode=mode, alpha=alpha, beta=beta
+        )
+        for target in range(graph.person_count):
+            path = graph.path(parent_person, parent_movie, source, target)
+            assert (-1 if path is None else len(path)) == expected[target]
+
+
+def test_bottom_up_step_stops_at_first_frontier_neighbor():
+    # Node 0 has neighbors 2, 1 and 3, node 1 has neighbor 3, node 2 none
+    offsets = np.array([0, 3, 4, 4])
+    indices = np.array([2, 1, 3, 3], dtype=np.int32)
+    seen = np.zeros(3, dtype=bool)
+    nodes, parents, examined = diropt.bottom_up_step(
+        np.array([1, 3]), 4, seen, offsets, indices
+    )
+    assert nodes.tolist() == [0, 1]
+    assert parents.tolist() == [1, 3]
+    # Two edges of node 0, up to neighbor 1, and the one edge of node 1
+    assert examined == 3
+    assert seen.tolist() == [True, True, False]
+
+
+@pytest.mark.parametrize("dataset", ["small", "chain"])
+def test_parallel_bfs_matches_csr_bfs(dataset, request, monkeypatch):
+    # Every level is split across the workers, however small
+    monkeypatch.setattr(parallel, "MIN_PARALLEL_FRONTIER", 1)
+    graph = CSRGraph.from_csv(request.getfixturevalue(dataset))
+    with parallel.ParallelBFS(graph, workers=2) as search:
+        for source in range(0, graph.person_count, 37):
+            expected = graph.distances(source)
+            parent_person, parent_movie = search.bfs(source)
+            for target in range(graph.person_count):
+                path = graph.path(parent_person, parent_movie, source, target)
+                assert (-1 if path is None else len(path)) == expected[target]
+
+
+def test_degrees_searches_in_parallel(small):
+    expected = baseline_distances(small)
+    importlib.reload(degrees)
+    degrees.load_data(small, "csr")
+    degrees.start_parallel(workers=2)
+    try:
+        # Without the tree cache, every query goes to the ParallelBFS
+        degrees.tree_cache = None
+        for (source_id, target_id), distance in expected.items():
+            path = degrees.shortest_path(source_id, target_id)
+            assert (None if path is None else len(path)) == distance
+            if path:
+                check_path(source_id, path)
+    finally:
+        degrees.stop_parallel()
+    assert degrees.parallel_bfs is None
+
+
+def test_streamed_columns_open_files_only_while_reading(small):
+    with streaming.load_streaming(small) as graph:
+        columns = (graph.person_names, graph.person_births, graph.movie_titles, graph.movie_years)
+        assert all(column.file is None for column in columns)
+        assert graph.person_names[graph.person_index["102"]] == "Kevin Bacon"
+        assert graph.movie_years[graph.movie_index["93779"]] == "1987"
+        assert not graph.person_names.file.closed
+    assert all(column.file is None for column in columns)
+
+
+def test_hashed_names_iterate_each_name_once(tmp_path):
+    people = PEOPLE + '2000,"kevin bacon",1970\n3000,"Tom Hanks",1980\n'
+    directory = write_dataset(tmp_path / "twins", people, MOVIES, STARS)
+    graph = streaming.load_streaming(directory)
+    names = streaming.HashedNames(graph)
+
+    expected = sorted({name.lower() for name in graph.person_names})
+    assert sorted(names) == expected
+    assert len(names) == len(expected) == 16
+    assert names["kevin bacon"] == {"102", "2000"}
+    assert "nobody" not in names
+    graph.close()
+
+
+def test_batch_answers_every_pair(small):
+    expected = baseline_distances(small)
+    pairs = [
+        ("Kevin Bacon", "Tom Hanks"),
+        ("102", "914612"),
+        ("Nobody", "102"),
+    ] + list(expected)
+    graph = cache.load_graph(small)
+    results = list(batch.run_batch(graph, small, pairs, workers=2))
+
+    assert results[0]["degrees"] == 1
+    assert results[1]["degrees"] is None
+    assert results[2]["error"] == "Person not found: Nobody"
+    for result in results[3:]:
+        distance = expected[result["source"], result["target"]]
+        # Unlike degrees.py, a batch query from a person to themselves is
+        # answered even if they have no credits
+        if result["source"] == result["target"]:
+            distance = 0
+        assert result["degrees"] == distance
+        if result["path"]:
+            assert result["path"][-1][1] == result["target"]
+
+
+def test_cached_search_reports_worker_cache(small):
+    batch.init_worker(small)
+    graph = batch.worker_graph
+    source = graph.person_index["102"]
+    target = graph.person_index["420"]
+    for _ in range(3):
+        path, worker, info = batch.cached_search((source, target))
+        assert len(path) == 2 and path[-1][1] == "420"
+        assert worker == os.getpid()
+    assert info["hits"] >= 1
+    assert info["hits"] + info["misses"] == 3
+
+
+def test_tree_cache_builds_trees_for_repeat_people(small):
+    expected = baseline_distances(small)
+    graph = CSRGraph.from_csv(small)
+    tree_cache = BFSTreeCache(graph, maxsize=2)
+
+    # A first query is a miss answered without a tree
+    assert tree_cache.cached_path("102", "420") is None
+    assert tree_cache.info() == {"hits": 0, "misses": 1, "size": 0, "maxsize": 2}
+
+    # Kevin Bacon earns a tree the second time, which then answers
+    # queries from him and, in reverse, to him
+    assert len(tree_cache.cached_path("102", "1597")) == expected["102", "1597"]
+    path = tree_cache.cached_path("1597", "102")
+    assert len(path) == expected["1597", "102"] and path[-1][1] == "102"
+    assert tree_cache.info()["hits"] == 1
+
+    # Older trees are evicted beyond `maxsize`
+    for source_id, target_id in (("129", "144"), ("129", "163"), ("158", "193"), ("158", "197")):
+        tree_cache.cached_path(source_id, target_id)
+    assert list(tree_cache.trees) == ["129", "158"]
+
+    for (source_id, target_id), distance in expected.items():
+        if distance is not None:
+            assert len(tree_cache.shortest_path(source_id, target_id)) == distance
+
+
+def test_dict_tree_cache_matches_baseline(small):
+    expected = baseline_distances(small)
+    tree_cache = DictTreeCache(degrees.neighbors_for_person)
+    for _ in range(2):
+        for (source_id, target_id), distance in expected.items():
+            if distance is not None and source_id != target_id:
+                path = tree_cache.cached_path(source_id, target_id)
+                if path is not None:
+                    assert len(path) == distance
+                    check_path(source_id, path)
+    assert tree_cache.info()["hits"] > 0
+
+
+@pytest.mark.parametrize("dataset", ["small", "chain"])
+def test_landmark_bounds_hold(dataset, request):
+    graph = CSRGraph.from_csv(request.getfixturevalue(dataset))
+    index = LandmarkIndex.build(graph, count=3)
+    for source in range(graph.person_count):
+        distances = graph.distances(source)
+        for target in range(graph.person_count):
+            lower, upper = index.bounds(graph.person_ids[source], graph.person_ids[target])
+            if distances[target] < 0:
+                assert upper == float("inf")
+            else:
+                assert lower <= distances[target] <= upper
+
+
+def test_landmark_bounds_reach_long_paths(chain):
+    graph = CSRGraph.from_csv(chain)
+    index = LandmarkIndex.build(graph, landmark_ids=["0"])
+    assert index.bounds("0", "299") == (299, 299)
+    assert len(index.shortest_path("0", "299")) == 299
+
+
+@pytest.mark.parametrize("backend", ["dict", "csr", "cache"])
+def test_names_resolve_without_building_index_for_full_names(small, backend):
+    importlib.reload(degrees)
+    degrees.load_data(small, backend)
+    assert degrees.person_id_for_name("  kevin   BACON ") == "102"
+    assert degrees.name_index is None
+    assert degrees.person_id_for_name("Sinise") == "641"
+    assert degrees.name_index is not None
+    assert degrees.person_id_for_name("Nobody") is None
+
+
+def test_name_index_lookups_and_completions(small):
+    importlib.reload(degrees)
+    degrees.load_data(small)
+    index = NameIndex(degrees.names)
+
+    assert index.exact(" TOM  hanks") == {"158"}
+    assert index.first_name("tom") == {"129", "158"}
+    assert index.surname("Wright") == {"705"}
+    assert index.lookup("Tom") == {"129", "158"}
+    assert index.lookup("Gerald R. Molen") == {"596520"}
+
+    assert index.complete("tom") == ["tom cruise", "tom hanks"]
+    # Names starting with the prefix come before names with a later word
+    # starting with it, in the order of those words
+    assert index.complete("s") == ["sally field", "chris sarandon", "gary sinise"]
+    assert index.complete("  ") == []
+    assert index.complete("c", limit=1) == ["cary elwes"]
+    assert index.people(index.complete("golino")) == {"420"}
+
+
+class RecordingHooks(SearchHooks):
+
+    def __init__(self):
+        self.expanded = []
+        self.levels = []
+        self.finished = []
+
+    def on_expand(self, person_id, neighbors):
+        self.expanded.append(person_id)
+
+    def on_level(self, frontier):
+        self.levels.append(set(frontier))
+
+    def on_finish(self, path, stats):
+        self.finished.append((path, stats))
+
+
+@pytest.mark.parametrize("backend", ["dict", "csr", "cache", "stream"])
+def test_searches_count_their_work_and_call_hooks(chain, backend):
+    importlib.reload(degrees)
+    degrees.load_data(chain, backend)
+    degrees.tree_cache = None
+    hooks = RecordingHooks()
+    path, stats = degrees.search("0", "5", hooks)
+
+    assert len(path) == 5
+    # People 0 to 4 are expanded, the last of them reaching the target
+    assert stats.nodes_expanded == 5
+    assert hooks.expanded == ["0", "1", "2", "3", "4"]
+    assert stats.edges_scanned > 0
+    assert stats.frontier_peak == 1
+    assert hooks.finished == [(path, stats)]
+    if backend != "dict":
+        assert hooks.levels == [{"1"}, {"2"}, {"3"}, {"4"}, {"5"}]
+
+
+@pytest.mark.parametrize("backend", ["dict", "csr"])
+def test_tree_cache_hits_report_no_search(small, backend):
+    importlib.reload(degrees)
+    degrees.load_data(small, backend)
+    hooks = RecordingHooks()
+
+    # Bounded search, then a search building Kevin Bacon's tree
+    _, first = degrees.search("102", "641", hooks)
+    _, second = degrees.search("102", "420", hooks)
+    assert 0 < first.nodes_expanded < second.nodes_expanded
+    expanded = len(hooks.expanded)
+
+    path, stats = degrees.search("102", "1597", hooks)
+    assert len(path) == 3
+    assert stats.nodes_expanded is stats.edges_scanned is stats.frontier_peak is None
+    assert "Nodes expanded: n/a" in str(stats)
+    assert stats.as_dict()["nodes_expanded"] is None
+    assert len(hooks.expanded) == expanded
+
+
+def test_parallel_bfs_counts_its_work(chain, monkeypatch):
+    monkeypatch.setattr(parallel, "MIN_PARALLEL_FRONTIER", 1)
+    graph = CSRGraph.from_csv(chain)
+    hooks = RecordingHooks()
+    with parallel.ParallelBFS(graph, workers=2) as search:
+        expected = SearchStats()
+        graph.shortest_path("0", "5", expected)
+        stats = SearchStats()
+        assert len(search.shortest_path("0", "5", stats, hooks)) == 5
+    assert stats.as_dict() == expected.as_dict()
+    assert stats.nodes_expanded == 5
+    assert hooks.expanded == ["0", "1", "2", "3", "4"]
+
+
+@pytest.fixture
+def service(small):
+    service = server.DegreesService(small, workers=1)
+    yield service
+    service.close()
+
+
+def test_service_answers_queries(service):
+    async def respond(target, method="GET"):
+        return await service.respond(method, target)
+
+    status, body = asyncio.run(respond("/path?source=Kevin+Bacon&target=420"))
+    assert status == 200
+    assert body["source"] == "102" and body["degrees"] == 2
+    assert body["path"][-1][1] == "420"
+
+    status, body = asyncio.run(respond("/person?name=tom"))
+    assert status == 200 and body["count"] == 2
+    assert {person["name"] for person in body["people"]} == {"Tom Cruise", "Tom Hanks"}
+    # Falls back to names starting with the text
+    assert asyncio.run(respond("/person?name=Patin"))[1]["people"][0]["id"] == "1597"
+
+    status, body = asyncio.run(respond("/stats"))
+    assert status == 200 and body["workers"] == 1
+    assert body["tree_cache"]["misses"] == 1
+
+    assert asyncio.run(respond("/path?source=102"))[0] == 400
+    assert asyncio.run(respond("/path?source=102&target=Nobody"))[0] == 404
+    assert asyncio.run(respond("/person?name=Nobody"))[0] == 404
+    assert asyncio.run(respond("/person"))[0] == 400
+    assert asyncio.run(respond("/nowhere"))[0] == 404
+    assert asyncio.run(respond("/stats", "POST"))[0] == 405
+
+
+def test_service_keeps_connections_open(service):
+    async def exchange():
+        listener = await asyncio.start_server(service.handle, "127.0.0.1", 0)
+        port = listener.sockets[0].getsockname()[1]
+        async with listener:
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            responses = []
+            for request in (
+                "GET /path?source=102&target=158 HTTP/1.1\r\n\r\n",
+                "POST /stats HTTP/1.1\r\nContent-Length: 2\r\n\r\n{}",
+                "GET /stats HTTP/1.1\r\nConnection: close\r\n\r\n",
+            ):
+                writer.write(request.encode("latin-1"))
+                await writer.drain()
+                status = int((await reader.readline()).split()[1])
+                length = 0
+                while (line := await reader.readline()) != b"\r\n":
+                    key, _, value = line.decode("latin-1").partition(":")
+                    if key.lower() == "content-length":
+                        length = int(value)
+                responses.append((status, json.loads(await reader.readexactly(length))))
+            # The last request asked for the connection to be closed
+            assert await reader.read() == b""
+            writer.close()
+        return responses
+
+    (status, path), (post, _), (_, stats) = asyncio.run(exchange())
+    assert status == 200 and path["degrees"] == 1
+    assert post == 405
+    assert stats["tree_cache"]["misses"] == 1
+
+
+def test_service_rejects_malformed_requests(service):
+    async def exchange():
+        listener = await asyncio.start_server(service.handle, "127.0.0.1", 0)
+        port = listener.sockets[0].getsockname()[1]
+        async with listener:
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.write(b"GARBAGE\r\n\r\n")
+            await writer.drain()
+            response = await reader.read()
+            writer.close()
+        return response
+
+    response = asyncio.run(exchange())
+    assert response.startswith(b"HTTP/1.1 400 Bad Request")
+    assert b"Malformed request line" in response
+
+
+def year_neighbors(person_id, first, last):
+    """
+    The neighbors of a person through movies released from year `first`
+    to year `last`, either of which may be None.
+    """
+    return [
+        (movie_id, neighbor_id)
+        for movie_id, neighbor_id in degrees.neighbors_for_person(person_id)
+        if (first is None or int(degrees.movies[movie_id]["year"]) >= first)
+        and (last is None or int(degrees.movies[movie_id]["year"]) <= last)
+    ]
+
+
+def dijkstra_cost(source_id, target_id, weight, first, last):
+    """
+    Least cost from the source to the target, where a hop through a movie
+    costs `weight(movie_id)`, or None if the target is not reached.
+    """
+    costs = {source_id: 0.0}
+    queue = [(0.0, source_id)]
+    while queue:
+        cost, person_id = heapq.heappop(queue)
+        if person_id == target_id:
+            return cost
+        if cost > costs[person_id]:
+            continue
+        for movie_id, neighbor_id in year_neighbors(person_id, first, last):
+            new_cost = cost + weight(movie_id)
+            if new_cost < costs.get(neighbor_id, float("inf")):
+                costs[neighbor_id] = new_cost
+                heapq.heappush(queue, (new_cost, neighbor_id))
+    return None
+
+
+@pytest.mark.parametrize("first, last", [
+    (None, None), (1990, None), (None, 1993), (1988, 1994), (1996, None),
+])
+def test_year_searches_match_filtered_searches(small, first, last):
+    importlib.reload(degrees)
+    degrees.load_data(small, "csr")
+    index = YearIndex(degrees.graph)
+    years = {movie_id: int(degrees.movies[movie_id]["year"]) for movie_id in degrees.movies}
+    # 1 for the newest movie up to 1.5 for the oldest
+    def weight(movie_id):
+        return 1 + 0.5 * (1995 - years[movie_id]) / (1995 - 1987)
+
+    credited = [person_id for person_id in degrees.people if degrees.people[person_id]["movies"]]
+    for source_id, target_id in itertools.product(credited, repeat=2):
+        if source_id == target_id:
+            continue
+        # Every hop costing 1, the least cost is the degrees of separation
+        path = index.shortest_path(source_id, target_id, first, last)
+        assert (None if path is None else len(path)) == \
+            dijkstra_cost(source_id, target_id, lambda movie_id: 1, first, last)
+
+        path = index.weighted_path(source_id, target_id, first, last, recency=0.5)
+        cost = dijkstra_cost(source_id, target_id, weight, first, last)
+        if path is None:
+            assert cost is None
+            continue
+        check_path(source_id, path)
+        assert path[-1][1] == target_id
+        assert all(
+            (first is None or years[movie_id] >= first) and (last is None or years[movie_id] <= last)
+            for movie_id, _ in path
+        )
+        assert sum(weight(movie_id) for movie_id, _ in path) == pytest.approx(cost)
+
+
+def test_weighted_path_prefers_recent_movies(small):
+    importlib.reload(degrees)
+    degrees.load_data(small, "csr")
+    index = YearIndex(degrees.graph)
+
+    # Gary Sinise starred with Tom Hanks in Forrest Gump (1994) and
+    # Apollo 13 (1995)
+    assert index.weighted_path("641", "158") == [("112384", "158")]
+    assert index.shortest_path("641", "158", last=1994) == [("109830", "158")]
+    assert index.weighted_path("641", "158", last=1994) == [("109830", "158")]
+
+    # Cary Elwes only starred in The Princess Bride (1987)
+    assert index.shortest_path("144", "158") == [("93779", "705"), ("109830", "158")]
+    assert index.shortest_path("144", "158", first=1990) is None
+    assert index.weighted_path("144", "158", first=1990) is None
+    assert index.shortest_path("102", "158", first=1996) is None
@@ -0,0 +1,182 @@
+"""
+Least-recently-used cache of complete breadth-first search trees.
+
+A search tree from a source answers the shortest path from that source to
+every other person, and because co-starring is symmetric it answers paths
+*to* that person as well, read backwards. Keeping the trees of recently
+used people means repeat queries against a popular actor are a walk up a
+parent array instead of a new search.
+
+A complete tree costs a search of the source's whole component, several
+times the cost of a search that stops at its target, so a tree is only
+built for a person the second time they appear in a query, at either
+end. Until then, queries are answered by a search bounded by the target,
+as without the cache.
+"""
+
+from collections import OrderedDict
+
+from util import DequeQueueFrontier, Node, path_from_parents
+
+MAXSIZE = 16
+
+# People remembered as seen once, waiting for a repeat to earn a tree
+PENDING_SIZE = 1024
+
+# Trees over the dictionaries of degrees.py hold a dictionary entry per
+# person rather than two int32s, so fewer of them are kept
+DICT_MAXSIZE = 4
+
+
+class BFSTreeCache():
+
+    def __init__(self, graph, maxsize=MAXSIZE):
+        """
+        Cache up to `maxsize` search trees over a CSRGraph. Each tree holds
+        two int32 arrays with one entry per person.
+        """
+        self.graph = graph
+        self.maxsize = maxsize
+        self.trees = OrderedDict()
+        self.pending = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def shortest_path(self, source_id, target_id):
+        """
+        Returns the shortest list of (movie_id, person_id) pairs
+        that connect the source to the target.
+
+        If no possible path, returns None.
+        """
+        graph = self.graph
+        source = graph.person_index[source_id]
+        target = graph.person_index[target_id]
+        if not graph.connected(source, target):
+            return None
+        path = self.cached_path(source_id, target_id)
+        if path is None:
+            parent_person, parent_movie = graph.bfs(source, [target])
+            path = graph.path(parent_person, parent_movie, source, target)
+        return path
+
+    def cached_path(self, source_id, target_id, stats=None, hooks=None):
+        """
+        Returns the path between two connected people from the cached tree
+        of either of them, building the tree of one who has been asked
+        about before. Returns None on a miss that should be answered by a
+        search bounded by the target.
+
+        A tree built here is counted in `stats` and reported to `hooks`
+        like any other search, if they are given; reading a path from a
+        cached tree does not search, and leaves them untouched.
+        """
+        # A cached tree of the target answers the query in reverse
+        if target_id in self.trees and source_id not in self.trees:
+            self.hits += 1
+            self.trees.move_to_end(target_id)
+            path = self.tree_path(self.trees[target_id], target_id, source_id)
+            return reverse_path(path, target_id)
+
+        if source_id in self.trees:
+            self.hits += 1
+            self.trees.move_to_end(source_id)
+            return self.tree_path(self.trees[source_id], source_id, target_id)
+
+        # A person asked about before, at either end, earns a tree
+        self.misses += 1
+        for person_id in (source_id, target_id):
+            if self.pending.pop(person_id, None) is not None:
+                tree = self.trees[person_id] = self.build_tree(person_id, stats, hooks)
+                if len(self.trees) > self.maxsize:
+                    self.trees.popitem(last=False)
+                if person_id == source_id:
+                    return self.tree_path(tree, source_id, target_id)
+                return reverse_path(self.tree_path(tree, target_id, source_id), target_id)
+
+        for person_id in (source_id, target_id):
+            self.pending[person_id] = True
+            self.pending.move_to_end(person_id)
+        while len(self.pending) > PENDING_SIZE:
+            self.pending.popitem(last=False)
+        return None
+
+    def build_tree(self, source_id, stats=None, hooks=None):
+        """
+        Returns the complete search tree rooted at `source_id`.
+        """
+        return self.graph.bfs(self.graph.person_index[source_id], stats=stats, hooks=hooks)
+
+    def tree_path(self, tree, source_id, target_id):
+        """
+        Returns the (movie_id, person_id) pairs leading from the root of
+        `tree`, `source_id`, to `target_id`.
+        """
+        graph = self.graph
+        parent_person, parent_movie = tree
+        return graph.path(
+            parent_person, parent_movie,
+            graph.person_index[source_id], graph.person_index[target_id]
+        )
+
+    def clear(self):
+        self.trees.clear()
+        self.pending.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def info(self):
+        """
+        Returns the hit and miss counts and the current and maximum size.
+        """
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self.trees),
+            "maxsize": self.maxsize,
+        }
+
+
+class DictTreeCache(BFSTreeCache):
+    """
+    BFSTreeCache over the dictionaries of degrees.py, whose trees are
+    `came_from` dictionaries built with `neighbors_for_person`.
+    """
+
+    def __init__(self, neighbors_for_person, maxsize=DICT_MAXSIZE):
+        super().__init__(None, maxsize)
+        self.neighbors_for_person = neighbors_for_person
+
+    def build_tree(self, source_id, stats=None, hooks=None):
+        came_from = {source_id: None}
+        frontier = DequeQueueFrontier()
+        frontier.add(Node(source_id, None, None))
+        while not frontier.empty():
+            person_id = frontier.remove().state
+            neighbors = self.neighbors_for_person(person_id)
+            if stats is not None:
+                stats.nodes_expanded += 1
+                stats.edges_scanned += len(neighbors)
+            if hooks is not None:
+                hooks.on_expand(person_id, neighbors)
+            for movie_id, neighbor_id in neighbors:
+                if neighbor_id not in came_from:
+                    came_from[neighbor_id] = (movie_id, person_id)
+                    frontier.add(Node(neighbor_id, None, None))
+            if stats is not None:
+                stats.frontier_peak = max(stats.frontier_peak, len(frontier.frontier))
+        return came_from
+
+    def tree_path(self, tree, source_id, target_id):
+        return path_from_parents(tree, target_id)
+
+
+def reverse_path(path, start_id):
+    """
+    Given the (movie_id, person_id) pairs leading from `start_id` to some
+    person, returns the pairs leading from that person back to `start_id`.
+    """
+    people = [start_id] + [person_id for _, person_id in path]
+    return [
+        (path[i][0], people[i]) for i in reversed(range(len(path)))
+    ]
@@ -1,3 +1,6 @@
+from collections import deque
+
+
 class Node():
     def __init__(self, state, parent, action):
         self.state = state
@@ -44,3 +47,105 @@ class QueueFrontier(StackFrontier):
             node = self.frontier[0]
             self.frontier = self.frontier[1:]
             return node
+
+
+class DequeStackFrontier(StackFrontier):
+    """
+    Stack frontier backed by a deque, with a companion set of the states
+    it holds so that `contains_state` is O(1) instead of a linear scan.
+
+    States are assumed to be unique within the frontier, which holds for
+    the searches in this package since they check `contains_state`
+    before adding a node.
+    """
+
+    def __init__(self):
+        self.frontier = deque()
+        self.states = set()
+
+    def add(self, node):
+        self.frontier.append(node)
+        self.states.add(node.state)
+
+    def contains_state(self, state):
+        return state in self.states
+
+    def remove(self):
+        if self.empty():
+            raise Exception("empty frontier")
+        else:
+            node = self.frontier.pop()
+            self.states.discard(node.state)
+            return node
+
+
+class DequeQueueFrontier(DequeStackFrontier):
+
+    def remove(self):
+        if self.empty():
+            raise Exception("empty frontier")
+        else:
+            node = self.frontier.popleft()
+            self.states.discard(node.state)
+            return node
+
+
+def path_from_parents(came_from, state):
+    """
+    Rebuild the list of (action, state) pairs that lead to `state`,
+    given a `came_from` dictionary mapping each reached state to an
+    (action, parent_state) pair and the start state to None.
+
+    Runs in time proportional to the length of the path.
+    """
+    path = []
+    while came_from[state] is not None:
+        action, parent = came_from[state]
+        path.append((action, state))
+        state = parent
+    path.reverse()
+    return path
+
+
+class UnionFind():
+    """
+    Disjoint sets of states, for labelling connected components.
+    """
+
+    def __init__(self):
+        self.parent = {}
+        self.size = {}
+
+    def add(self, state):
+        if state not in self.parent:
+            self.parent[state] = state
+            self.size[state] = 1
+
+    def find(self, state):
+        """
+        Returns the representative state of the set containing `state`.
+        """
+        parent = self.parent
+        while parent[state] != state:
+            parent[state] = parent[parent[state]]
+            state = parent[state]
+        return state
+
+    def union(self, a, b):
+        a = self.find(a)
+        b = self.find(b)
+        if a == b:
+            return
+        if self.size[a] < self.size[b]:
+            a, b = b, a
+        self.parent[b] = a
+        self.size[a] += self.size.pop(b)
+
+    def connected(self, a, b):
+        return self.find(a) == self.find(b)
+
+    def sizes(self):
+        """
+        Returns the sizes of all the sets, largest first.
+        """
+        return sorted(self.size.values(), reverse=True)
@@ -0,0 +1,287 @@
+"""
+Year-constrained and year-weighted searches for degrees.
+
+A YearIndex partitions the credits of a CSRGraph by year: each person's
+movies are stored sorted by the year of the movie, and every credit is
+keyed by (person, year). The credits of a frontier of people within a
+range of years are then found by binary search on those keys, one slice
+per person, so a filtered search never looks at the year of an edge it
+will not follow.
+
+Two kinds of query share the (movie_id, person_id) output of
+degrees.shortest_path:
+
+- `shortest_path`, a breadth-first search through movies released
+  between two years, either bound optional;
+- `weighted_path`, a Dijkstra search in which a hop through a movie costs
+  1 plus up to `recency` more the older the movie is, which prefers paths
+  through recent movies over older paths of the same or similar length.
+
+Usage: python years.py [directory] [--from=YEAR] [--to=YEAR] [--recent[=WEIGHT]]
+"""
+
+import sys
+
+import numpy as np
+
+from graph import gather_ranges
+
+# Extra cost of a hop through the oldest movie, relative to the newest
+RECENCY = 1.0
+
+
+def main():
+    import degrees
+
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    options = dict(
+        arg[2:].partition("=")[::2] for arg in sys.argv[1:] if arg.startswith("--")
+    )
+    if len(args) > 1 or any(option not in ("from", "to", "recent") for option in options):
+        sys.exit("Usage: python years.py [directory] "
+                 "[--from=YEAR] [--to=YEAR] [--recent[=WEIGHT]]")
+    directory = args[0] if args else "large"
+    first = int(options["from"]) if options.get("from") else None
+    last = int(options["to"]) if options.get("to") else None
+
+    print("Loading data...")
+    degrees.load_data(directory, "cache")
+    index = YearIndex(degrees.graph)
+    print("Data loaded.")
+
+    source = degrees.person_id_for_name(input("Name: "))
+    if source is None:
+        sys.exit("Person not found.")
+    target = degrees.person_id_for_name(input("Name: "))
+    if target is None:
+        sys.exit("Person not found.")
+
+    if "recent" in options:
+        recency = float(options["recent"]) if options["recent"] else RECENCY
+        path = index.weighted_path(source, target, first, last, recency)
+    else:
+        path = index.shortest_path(source, target, first, last)
+
+    if path is None:
+        print("Not connected.")
+    else:
+        count = len(path)
+        print(f"{count} degrees of separation.")
+        path = [(None, source)] + path
+        for i in range(count):
+            person1 = degrees.people[path[i][1]]["name"]
+            person2 = degrees.people[path[i + 1][1]]["name"]
+            movie = degrees.movies[path[i + 1][0]]
+            print(f"{i + 1}: {person1} and {person2} starred in "
+                  f"{movie['title']} ({movie['year']})")
+
+
+class YearIndex():
+
+    def __init__(self, graph):
+        """
+        Partition the credits of a CSRGraph by the year of their movie.
+        Movies without a year are kept apart and only followed by searches
+        with no year bounds.
+        """
+        self.graph = graph
+        years = np.array(
+            [int(year) if year.isdigit() else 0 for year in graph.movie_years],
+            dtype=np.int32,
+        )
+        known = years > 0
+        self.movie_years = years
+        self.oldest = int(years[known].min()) if known.any() else 0
+        self.newest = int(years[known].max()) if known.any() else 0
+
+        # Years are coded from 1 for the oldest movie, with 0 for unknown
+        codes = np.where(known, years - self.oldest + 1, 0).astype(np.int64)
+        self.span = self.newest - self.oldest + 2
+
+        rows = np.repeat(
+            np.arange(graph.person_count, dtype=np.int64),
+            np.diff(graph.person_offsets),
+        )
+        credit_codes = codes[graph.person_movies]
+        order = np.lexsort((credit_codes, rows))
+        self.person_movies = graph.person_movies[order]
+        self.keys = rows * self.span + credit_codes[order]
+
+    def codes_between(self, first=None, last=None):
+        """
+        Returns the smallest and largest year codes of movies released
+        from year `first` to year `last`, where None leaves a bound open.
+        """
+        if first is None and last is None:
+            return 0, self.span - 1
+        low = 1 if first is None else max(first - self.oldest + 1, 1)
+        high = self.span - 1 if last is None else min(last - self.oldest + 1, self.span - 1)
+        return low, high
+
+    def movies_of(self, frontier, low, high):
+        """
+        Returns the movies with year codes from `low` to `high` of every
+        person in `frontier`, and the position in `frontier` each came from.
+        """
+        frontier = np.asarray(frontier, dtype=np.int64)
+        starts = np.searchsorted(self.keys, frontier * self.span + low)
+        ends = np.searchsorted(self.keys, frontier * self.span + high, side="right")
+        return gather_ranges(self.person_movies, starts, ends)
+
+    def bfs(self, source, target=None, first=None, last=None):
+        """
+        Breadth-first search from person index `source` through movies
+        released from year `first` to year `last`, stopping after the
+        level that reaches person index `target` if given.
+
+        Returns `parent_person` and `parent_movie` arrays like CSRGraph.bfs.
+        """
+        graph = self.graph
+        low, high = self.codes_between(first, last)
+        parent_person = np.full(graph.person_count, -1, dtype=np.int32)
+        parent_movie = np.full(graph.person_count, -1, dtype=np.int32)
+        person_seen = np.zeros(graph.person_count, dtype=bool)
+        movie_seen = np.zeros(graph.movie_count, dtype=bool)
+        person_seen[source] = True
+        frontier = np.array([source], dtype=np.int32)
+        if low > high:
+            return parent_person, parent_movie
+
+        while frontier.size:
+            if target is not None and person_seen[target]:
+                break
+            movies, owners = self.movies_of(frontier, low, high)
+            fresh = ~movie_seen[movies]
+            movies, first_seen = np.unique(movies[fresh], return_index=True)
+            movie_parents = frontier[owners[fresh][first_seen]]
+            movie_seen[movies] = True
+
+            people, owners = gather_ranges(
+                graph.movie_people,
+                graph.movie_offsets[movies], graph.movie_offsets[movies + 1],
+            )
+            fresh = ~person_seen[people]
+            people, first_seen = np.unique(people[fresh], return_index=True)
+            owners = owners[fresh][first_seen]
+            person_seen[people] = True
+            parent_person[people] = movie_parents[owners]
+            parent_movie[people] = movies[owners]
+            frontier = people.astype(np.int32)
+
+        return parent_person, parent_movie
+
+    def shortest_path(self, source_id, target_id, first=None, last=None):
+        """
+        Returns the shortest list of (movie_id, person_id) pairs that
+        connect the source to the target through movies released from
+        year `first` to year `last`.
+
+        If no possible path, returns None.
+        """
+        graph = self.graph
+        source = graph.person_index[source_id]
+        target = graph.person_index[target_id]
+        if not graph.connected(source, target):
+            return None
+        parent_person, parent_movie = self.bfs(source, target, first, last)
+        return graph.path(parent_person, parent_movie, source, target)
+
+    def weights(self, recency=RECENCY):
+        """
+        Returns the cost of a hop through each movie: 1 for the newest
+        movies, rising linearly to 1 + `recency` for the oldest and for
+        movies without a year.
+        """
+        age = (self.newest - self.movie_years) / max(self.newest - self.oldest, 1)
+        age[self.movie_years == 0] = 1.0
+        return 1.0 + recency * age
+
+    def dijkstra(self, source, target=None, first=None, last=None,
+                 recency=RECENCY):
+        """
+        Dijkstra search from person index `source` under
+        `weights(recency)`, through movies released from year `first` to
+        year `last`, stopping once person index `target` is settled if
+        given.
+
+        Every hop costs at least the lightest weight, so all the people
+        within that much of the cheapest unsettled person are settled
+        together and expanded as one batch with array operations, as
+        in delta-stepping.
+
+        Returns `parent_person` and `parent_movie` arrays like CSRGraph.bfs.
+        """
+        graph = self.graph
+        low, high = self.codes_between(first, last)
+        weights = self.weights(recency)
+        delta = weights.min() if len(weights) else 1.0
+        parent_person = np.full(graph.person_count, -1, dtype=np.int32)
+        parent_movie = np.full(graph.person_count, -1, dtype=np.int32)
+        distance = np.full(graph.person_count, np.inf)
+        settled = np.zeros(graph.person_count, dtype=bool)
+        movie_seen = np.zeros(graph.movie_count, dtype=bool)
+        distance[source] = 0.0
+        unsettled = np.array([source], dtype=np.int64)
+        if low > high:
+            return parent_person, parent_movie
+
+        while unsettled.size:
+            costs = distance[unsettled]
+            ready = costs < costs.min() + delta
+            batch, unsettled = unsettled[ready], unsettled[~ready]
+            settled[batch] = True
+            if target is not None and settled[target]:
+                break
+
+            # A hop costs the same from whichever person takes it, so a
+            # movie is only expanded from the cheapest person reaching it,
+            # and every later batch is dearer
+            movies, owners = self.movies_of(batch, low, high)
+            fresh = ~movie_seen[movies]
+            movies, owners = movies[fresh], owners[fresh]
+            order = np.lexsort((distance[batch][owners], movies))
+            movies, first_seen = np.unique(movies[order], return_index=True)
+            movie_parents = batch[owners[order][first_seen]]
+            movie_seen[movies] = True
+            movie_costs = distance[movie_parents] + weights[movies]
+
+            # Stars of several of those movies keep the cheapest
+            stars, owners = gather_ranges(
+                graph.movie_people,
+                graph.movie_offsets[movies], graph.movie_offsets[movies + 1],
+            )
+            star_costs = movie_costs[owners]
+            better = star_costs < distance[stars]
+            stars, owners, star_costs = stars[better], owners[better], star_costs[better]
+            order = np.lexsort((star_costs, stars))
+            stars, first_seen = np.unique(stars[order], return_index=True)
+            owners = owners[order][first_seen]
+            distance[stars] = star_costs[order][first_seen]
+            parent_person[stars] = movie_parents[owners]
+            parent_movie[stars] = movies[owners]
+            unsettled = np.union1d(unsettled, stars)
+
+        return parent_person, parent_movie
+
+    def weighted_path(self, source_id, target_id, first=None, last=None,
+                      recency=RECENCY):
+        """
+        Returns the list of (movie_id, person_id) pairs that connects the
+        source to the target at the least cost under `weights(recency)`,
+        through movies released from year `first` to year `last`.
+
+        If no possible path, returns None.
+        """
+        graph = self.graph
+        source = graph.person_index[source_id]
+        target = graph.person_index[target_id]
+        if not graph.connected(source, target):
+            return None
+        parent_person, parent_movie = self.dijkstra(
+            source, target, first, last, recency
+        )
+        return graph.path(parent_person, parent_movie, source, target)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Benchmarks pagerank on synthetic corpora of several sizes.
+
+Each corpus is written once by generate.py under .benchmark/, then
+crawled with pagerank.crawl and with crawler.crawl_parallel and ranked
+with every solver in solvers.py. sample_pagerank is run with a range of
+sample counts and its L1 error measured against ranks from power
+iteration to a tight tolerance. Results are printed and saved to
+benchmark.json.
+
+Usage: python benchmark.py [pages...]
+"""
+
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+import generate
+from crawler import crawl_parallel
+from pagerank import DAMPING, crawl, link_graph, sample_pagerank
+from solvers import SOLVERS, solve
+
+SIZES = (1_000, 10_000, 100_000)
+SAMPLES = (1_000, 10_000, 100_000, 1_000_000)
+DIRECTORY = ".benchmark"
+REPORT = "benchmark.json"
+
+
+def main():
+    sizes = [int(float(arg)) for arg in sys.argv[1:]] or SIZES
+    results = [benchmark(pages) for pages in sizes]
+    with open(REPORT, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nReport written to {REPORT}")
+
+
+def benchmark(pages):
+    """
+    Benchmarks the corpus of `pages` pages, generating it if needed, and
+    returns the results.
+    """
+    directory = os.path.join(DIRECTORY, str(pages))
+    if not os.path.exists(os.path.join(directory, f"{pages - 1}.html")):
+        generate.generate(directory, pages)
+
+    seconds = {}
+    seconds["crawl"], corpus = timed(crawl, directory)
+    seconds["crawl_parallel"], _ = timed(crawl_parallel, directory)
+    seconds["link_graph"], graph = timed(link_graph, corpus)
+    print(f"\n{pages} pages, {len(graph.links)} links, "
+          f"{int(graph.dangling.sum())} without links")
+    for step, step_seconds in seconds.items():
+        print(f"{step:<16}{step_seconds:>10.3f} s")
+    crawl_speedup = seconds["crawl"] / seconds["crawl_parallel"]
+    print(f"crawl_parallel speedup {crawl_speedup:.2f}x "
+          f"({os.cpu_count()} worker processes)")
+
+    solvers = {}
+    for name in SOLVERS:
+        solver_seconds, (_, history) = timed(solve, graph, DAMPING, name)
+        solvers[name] = {"seconds": solver_seconds, "iterations": len(history)}
+        print(f"{name:<16}{solver_seconds:>10.3f} s{len(history):>6} iterations")
+
+    expected = solve(graph, DAMPING, "power", 1e-10)[0]
+    sampling = []
+    for samples in SAMPLES:
+        sample_seconds, sampled = timed(
+            sample_pagerank, graph, DAMPING, samples, seed=generate.SEED
+        )
+        error = np.abs(np.array([sampled[page] for page in graph.pages]) - expected).sum()
+        sampling.append({"samples": samples, "seconds": sample_seconds, "l1_error": error})
+        print(f"{samples:>10} samples{sample_seconds:>10.3f} s  L1 error {error:.4f}")
+
+    return {
+        "pages": pages,
+        "links": len(graph.links),
+        "seconds": seconds,
+        "crawl_speedup": crawl_speedup,
+        "solvers": solvers,
+        "sampling": sampling,
+    }
+
+
+def timed(function, *args, **kwargs):
+    """
+    Returns the seconds taken by `function(*args, **kwargs)`, and its result.
+    """
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,266 @@
+"""
+Parallel, streaming crawler for large pagerank corpora.
+
+Each HTML file is read in fixed-size chunks and scanned for links with
+the same pattern as `pagerank.crawl`, compiled once and run over the raw
+bytes, so no file is ever held in memory whole. A tag cut in two by a
+chunk boundary is carried over into the next chunk. Files are spread
+across a pool of worker processes in a few contiguous ranges each, and
+every worker turns the hrefs it finds into page indices itself, so only
+arrays of integers come back. The link graph they make is written to a
+compact edge-list file that pagerank.py loads directly instead of
+crawling again.
+
+An edge-list file is a NumPy .npz archive holding the page names, joined
+by newlines and encoded as UTF-8, and the source and target page index
+of every link as int32 arrays.
+
+A graph file written by graphfile.py can be produced instead, by giving
+an output name ending in .graph.
+
+Usage: python crawler.py corpus output.edges|output.graph [workers]
+"""
+
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from itertools import repeat
+
+import numpy as np
+
+from graphfile import GRAPH_SUFFIX, write_graph
+from linkgraph import LinkGraph
+
+CHUNK_SIZE = 1 << 20
+HREF = re.compile(rb"<a\s+(?:[^>]*?)href=\"([^\"]*)\"")
+EDGES_SUFFIX = ".edges"
+
+# Ranges of files handed to each worker process over a crawl
+TASKS_PER_WORKER = 4
+
+# The corpus being crawled, set in each worker process by init_worker
+worker_directory = None
+worker_filenames = None
+worker_index = None
+
+
+def main():
+    if len(sys.argv) < 3 or len(sys.argv) > 4:
+        sys.exit("Usage: python crawler.py corpus output.edges|output.graph [workers]")
+    directory, output = sys.argv[1], sys.argv[2]
+    workers = int(sys.argv[3]) if len(sys.argv) > 3 else os.cpu_count()
+
+    start = time.perf_counter()
+    graph = crawl_parallel(directory, workers)
+    if output.endswith(GRAPH_SUFFIX):
+        write_graph(output, graph)
+    else:
+        write_edges(output, graph)
+    print(f"Crawled {graph.page_count} pages and {len(graph.links)} links "
+          f"in {time.perf_counter() - start:.2f} seconds, written to {output}")
+
+
+def crawl_parallel(directory, workers=None, chunk_size=CHUNK_SIZE):
+    """
+    Crawls the HTML pages of `directory` across `workers` processes.
+
+    Returns a LinkGraph with the same pages and links `pagerank.crawl`
+    would find.
+    """
+    filenames = html_filenames(directory)
+    workers = workers or os.cpu_count()
+
+    # Workers are given the filenames once, and each task is a range of
+    # them; the links of a range come back as page indices in int arrays
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=init_worker, initargs=(directory, filenames)
+    ) as executor:
+        results = list(executor.map(
+            link_task, batches(len(filenames), workers), repeat(chunk_size)
+        ))
+
+    offsets = np.zeros(len(filenames) + 1, dtype=np.int64)
+    if results:
+        np.cumsum(np.concatenate([counts for counts, _ in results]), out=offsets[1:])
+        links = np.concatenate([links for _, links in results])
+    else:
+        links = []
+    return LinkGraph(filenames, offsets, links)
+
+
+def scan_corpus(directory, workers=None, chunk_size=CHUNK_SIZE, filenames=None):
+    """
+    Scans the HTML pages of `directory`, or only `filenames` if given,
+    across `workers` processes.
+
+    Returns the sorted page filenames and the set of hrefs found in each.
+    """
+    if filenames is None:
+        filenames = html_filenames(directory)
+    filenames = sorted(filenames)
+    workers = workers or os.cpu_count()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        found = [
+            hrefs
+            for batch in executor.map(
+                scan_task,
+                ((directory, filenames[start:stop], chunk_size)
+                 for start, stop in batches(len(filenames), workers))
+            )
+            for hrefs in batch
+        ]
+    return filenames, found
+
+
+def html_filenames(directory):
+    """
+    Returns the sorted names of the HTML pages in `directory`.
+    """
+    return sorted(
+        filename for filename in os.listdir(directory)
+        if filename.endswith(".html")
+    )
+
+
+def batches(count, workers):
+    """
+    Returns (start, stop) ranges splitting `count` files into a few
+    batches for each of `workers` processes, so that each task is worth
+    the round trip to a worker but the last ones still balance the load.
+    """
+    tasks = min(count, workers * TASKS_PER_WORKER)
+    bounds = np.linspace(0, count, tasks + 1).astype(int).tolist()
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def init_worker(directory, filenames):
+    """
+    Gives a worker process the corpus to crawl, with the index of every
+    page keyed by its UTF-8 name so hrefs never need decoding.
+    """
+    global worker_directory, worker_filenames, worker_index
+    worker_directory = directory
+    worker_filenames = filenames
+    worker_index = {filename.encode("utf-8"): i for i, filename in enumerate(filenames)}
+
+
+def link_task(bounds, chunk_size):
+    """
+    Scans the pages from `bounds[0]` up to `bounds[1]` in a worker.
+
+    Returns the number of links of each page to other pages of the corpus,
+    and the indices of those pages, sorted for each page.
+    """
+    start, stop = bounds
+    index = worker_index
+    counts = np.zeros(stop - start, dtype=np.int64)
+    links = []
+    with open_directory(worker_directory) as (dir_fd, prefix):
+        for i in range(start, stop):
+            hrefs = scan_hrefs(prefix + worker_filenames[i], chunk_size, dir_fd)
+            targets = sorted({index[href] for href in hrefs if href in index} - {i})
+            counts[i - start] = len(targets)
+            links.extend(targets)
+    return counts, np.array(links, dtype=np.int32)
+
+
+def scan_task(task):
+    directory, filenames, chunk_size = task
+    with open_directory(directory) as (dir_fd, prefix):
+        return [scan_links(prefix + filename, chunk_size, dir_fd) for filename in filenames]
+
+
+@contextmanager
+def open_directory(directory):
+    """
+    Yields a file descriptor of `directory` for opening its files
+    relative to, and the prefix to give their names, which is empty
+    unless the platform cannot open files relative to a directory.
+    """
+    if os.open not in os.supports_dir_fd:
+        yield None, os.path.join(directory, "")
+        return
+    dir_fd = os.open(directory, os.O_RDONLY)
+    try:
+        yield dir_fd, ""
+    finally:
+        os.close(dir_fd)
+
+
+def scan_links(path, chunk_size=CHUNK_SIZE, dir_fd=None):
+    """
+    Returns the set of hrefs of the <a> tags in one HTML file, reading it
+    `chunk_size` bytes at a time.
+    """
+    return {
+        href.decode("utf-8", errors="replace")
+        for href in scan_hrefs(path, chunk_size, dir_fd)
+    }
+
+
+def scan_hrefs(path, chunk_size=CHUNK_SIZE, dir_fd=None):
+    """
+    Returns the set of hrefs of the <a> tags in one HTML file as raw
+    bytes, reading it `chunk_size` bytes at a time through a bare file
+    descriptor, opened relative to `dir_fd` if given.
+    """
+    hrefs = set()
+    carry = b""
+    fd = os.open(path, os.O_RDONLY, dir_fd=dir_fd)
+    try:
+        while True:
+            chunk = os.read(fd, chunk_size)
+            buffer = carry + chunk
+            if not chunk:
+                scanned, carry = buffer, b""
+            else:
+                # A tag still open at the end of the buffer may continue in
+                # the next chunk, so it is left to be scanned with it
+                cut = buffer.rfind(b"<")
+                if cut >= 0 and buffer.find(b">", cut) < 0:
+                    scanned, carry = buffer[:cut], buffer[cut:]
+                else:
+                    scanned, carry = buffer, b""
+            hrefs.update(HREF.findall(scanned))
+            if not chunk:
+                return hrefs
+    finally:
+        os.close(fd)
+
+
+def write_edges(path, graph):
+    """
+    Writes the pages and links of a LinkGraph to the edge-list file `path`.
+    """
+    sources = np.repeat(np.arange(graph.page_count, dtype=np.int32), graph.out_degrees)
+    with open(path, "wb") as f:
+        np.savez(
+            f,
+            names=np.frombuffer("\n".join(graph.pages).encode("utf-8"), dtype=np.uint8),
+            sources=sources,
+            targets=graph.links.astype(np.int32),
+        )
+
+
+def read_edges(path):
+    """
+    Returns the LinkGraph stored in the edge-list file `path`.
+    """
+    with np.load(path) as edges:
+        names = edges["names"].tobytes().decode("utf-8")
+        sources = edges["sources"]
+        targets = edges["targets"]
+    pages = names.split("\n") if names else []
+
+    # Edges are grouped by source page to make the CSR arrays
+    order = np.argsort(sources, kind="stable")
+    offsets = np.zeros(len(pages) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(sources, minlength=len(pages)), out=offsets[1:])
+    return LinkGraph(pages, offsets, targets[order])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Writes synthetic corpora of HTML pages for pagerank.py and benchmark.py.
+
+Pages are named 0.html, 1.html, ... and laid out like the pages of the
+distribution corpora. The number of links on a page and how often a page
+is linked to both follow Zipf-like laws, so that a few hubs collect most
+of the links. Some pages have no links, some link to themselves and some
+link to pages outside the corpus, which crawl has to ignore.
+
+Usage: python generate.py directory [pages] [seed]
+"""
+
+import os
+import sys
+
+import numpy as np
+
+SEED = 50
+PAGES = 1000
+
+OUT_EXPONENT = 2.1
+TARGET_EXPONENT = 0.7
+MAX_LINKS = 500
+
+DANGLING_SHARE = 0.1
+SELF_LINK_SHARE = 0.05
+MISSING_LINK_SHARE = 0.05
+
+PAGE = """<!DOCTYPE html>
+<html lang="en">
+    <head>
+        <title>{name}</title>
+    </head>
+    <body>
+        <h1>{name}</h1>
+        <div>Links:</div>
+        <ul>
+{links}
+        </ul>
+    </body>
+</html>
+"""
+LINK = """            <li><a href="{href}">{href}</a></li>"""
+
+
+def main():
+    if len(sys.argv) < 2 or len(sys.argv) > 4:
+        sys.exit("Usage: python generate.py directory [pages] [seed]")
+    directory = sys.argv[1]
+    pages = int(float(sys.argv[2])) if len(sys.argv) > 2 else PAGES
+    seed = int(sys.argv[3]) if len(sys.argv) > 3 else SEED
+
+    counts = generate(directory, pages, seed)
+    print(f"Wrote {counts['pages']} pages with {counts['links']} links, "
+          f"{counts['dangling']} of them with none, to '{directory}'.")
+
+
+def generate(directory, pages=PAGES, seed=SEED):
+    """
+    Writes a corpus of `pages` pages to `directory`.
+
+    Returns the number of pages, of links between two different pages of
+    the corpus, and of pages with no such links.
+    """
+    rng = np.random.default_rng(seed)
+    os.makedirs(directory, exist_ok=True)
+
+    counts = np.minimum(rng.zipf(OUT_EXPONENT, size=pages), MAX_LINKS)
+    counts[rng.random(pages) < DANGLING_SHARE] = 0
+    weights = rng.permutation(1.0 / np.arange(1, pages + 1) ** TARGET_EXPONENT)
+    targets = rng.choice(pages, size=int(counts.sum()), p=weights / weights.sum())
+    starts = np.concatenate([[0], np.cumsum(counts)]).tolist()
+    targets = targets.tolist()
+
+    links = 0
+    dangling = 0
+    for page in range(pages):
+        linked = set(targets[starts[page]:starts[page + 1]]) - {page}
+        links += len(linked)
+        dangling += not linked
+        hrefs = [f"{target}.html" for target in sorted(linked)]
+        if linked and rng.random() < SELF_LINK_SHARE:
+            hrefs.append(f"{page}.html")
+        if linked and rng.random() < MISSING_LINK_SHARE:
+            hrefs.append(f"{pages + page}.html")
+        with open(os.path.join(directory, f"{page}.html"), "w", encoding="utf-8") as f:
+            f.write(PAGE.format(
+                name=page, links="\n".join(LINK.format(href=href) for href in hrefs)
+            ))
+
+    return {"pages": pages, "links": links, "dangling": dangling}
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+"""
+Compact binary file format for link graphs.
+
+A graph file holds a LinkGraph exactly as it is laid out in memory, so
+loading one memory-maps its arrays instead of parsing anything, and no
+Python object is made per page or per link until it is used:
+
+    header        64 bytes: magic, version, page, link and name byte counts
+    offsets       int64 * (pages + 1), the CSR offsets of each page's links
+    links         int32 * links, the index of the page each link goes to
+    name offsets  int64 * (pages + 1), where each page name starts
+    names         UTF-8 bytes of every page name, in page order
+
+Every section starts on an 8-byte boundary. Page names are sorted, as in
+every LinkGraph, so a page's index is found by binary search over the
+name table rather than from a dictionary of every name.
+
+PageNames and PageIndex are the pagerank counterparts of StringTable and
+SortedIndex in degrees/graph.py, which is a separate project; they
+support only what LinkGraph and its users need.
+
+Usage: python graphfile.py corpus|corpus.edges output.graph
+"""
+
+import os
+import struct
+import sys
+from bisect import bisect_left
+
+import numpy as np
+
+from linkgraph import LinkGraph
+
+GRAPH_SUFFIX = ".graph"
+MAGIC = b"PRGRAPH\0"
+VERSION = 1
+HEADER = struct.Struct("<8sIIQQQ")
+HEADER_SIZE = 64
+
+
+def main():
+    if len(sys.argv) != 3:
+        sys.exit("Usage: python graphfile.py corpus|corpus.edges output.graph")
+    from pagerank import link_graph, load_corpus
+    graph = link_graph(load_corpus(sys.argv[1]))
+    write_graph(sys.argv[2], graph)
+    print(f"Wrote {graph.page_count} pages and {len(graph.links)} links "
+          f"to {sys.argv[2]} ({os.path.getsize(sys.argv[2])} bytes)")
+
+
+class PageNames():
+    """
+    Page names stored as one UTF-8 byte array and an array of offsets into
+    it, decoding each name only when it is read.
+    """
+
+    def __init__(self, data, offsets):
+        self.data = data
+        self.offsets = offsets
+
+    @classmethod
+    def from_strings(cls, strings):
+        encoded = [string.encode("utf-8") for string in strings]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(b) for b in encoded], out=offsets[1:])
+        data = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+        return cls(data, offsets)
+
+    def __getitem__(self, i):
+        start, end = self.offsets[i], self.offsets[i + 1]
+        return self.data[start:end].tobytes().decode("utf-8")
+
+    def __iter__(self):
+        # Reading every name, decode them from one copy of the bytes
+        data = self.data.tobytes()
+        offsets = self.offsets.tolist()
+        for start, end in zip(offsets, offsets[1:]):
+            yield data[start:end].decode("utf-8")
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+
+class PageIndex():
+    """
+    Maps the names of a sorted sequence of pages to their indices by
+    binary search, so no dictionary has to be built.
+    """
+
+    def __init__(self, pages):
+        self.pages = pages
+
+    def __getitem__(self, page):
+        i = bisect_left(self.pages, page)
+        if i < len(self.pages) and self.pages[i] == page:
+            return i
+        raise KeyError(page)
+
+    def __contains__(self, page):
+        i = bisect_left(self.pages, page)
+        return i < len(self.pages) and self.pages[i] == page
+
+
+def write_graph(path, graph):
+    """
+    Writes a LinkGraph to the graph file `path`. The file is written
+    under a temporary name and renamed into place, so an interrupted
+    write never leaves a truncated graph behind.
+    """
+    names = graph.pages
+    if not isinstance(names, PageNames):
+        names = PageNames.from_strings(names)
+    sections = [
+        np.asarray(graph.offsets, dtype=np.int64),
+        np.asarray(graph.links, dtype=np.int32),
+        np.asarray(names.offsets, dtype=np.int64),
+        np.asarray(names.data, dtype=np.uint8),
+    ]
+
+    temporary = f"{path}.tmp"
+    with open(temporary, "wb") as f:
+        header = HEADER.pack(
+            MAGIC, VERSION, 0, graph.page_count, len(graph.links), len(names.data)
+        )
+        f.write(header.ljust(HEADER_SIZE, b"\0"))
+        for section in sections:
+            section.tofile(f)
+            f.write(b"\0" * (-section.nbytes % 8))
+    os.replace(temporary, path)
+
+
+def read_graph(path):
+    """
+    Returns the LinkGraph in the graph file `path`, with its arrays and
+    page names memory-mapped from the file.
+    """
+    with open(path, "rb") as f:
+        header = f.read(HEADER_SIZE)
+    if len(header) < HEADER_SIZE:
+        raise ValueError(f"Not a graph file: {path}")
+    magic, version, _, page_count, link_count, name_bytes = HEADER.unpack_from(header)
+    if magic != MAGIC:
+        raise ValueError(f"Not a graph file: {path}")
+    if version != VERSION:
+        raise ValueError(f"Unsupported graph file version {version}: {path}")
+
+    layout = []
+    position = HEADER_SIZE
+    for dtype, count in (
+        (np.int64, page_count + 1),
+        (np.int32, link_count),
+        (np.int64, page_count + 1),
+        (np.uint8, name_bytes),
+    ):
+        layout.append((dtype, count, position))
+        nbytes = np.dtype(dtype).itemsize * count
+        position += nbytes + (-nbytes % 8)
+    if os.path.getsize(path) < position:
+        raise ValueError(f"Truncated graph file: {path}")
+
+    # A memory map cannot be empty, so empty sections are plain arrays
+    sections = [
+        np.memmap(path, dtype=dtype, mode="r", offset=offset, shape=(count,))
+        if count else np.zeros(0, dtype=dtype)
+        for dtype, count, offset in layout
+    ]
+    offsets, links, name_offsets, names = sections
+    pages = PageNames(names, name_offsets)
+    return LinkGraph(pages, offsets, links, PageIndex(pages))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+"""
+Compact link graph and vectorized PageRank for pagerank.py.
+
+A LinkGraph numbers the pages of a corpus in sorted order and stores the
+links of every page as one CSR pair of arrays: `offsets[i]:offsets[i + 1]`
+is the slice of `links` holding the pages linked to by page i. From it,
+`transition_matrix` builds the sparse column-stochastic matrix M in which
+M[j, i] is the chance of following a link from page i to page j, and
+`power_iteration` solves for PageRank with one sparse matrix-vector
+product per iteration instead of a loop over every link in Python.
+
+A page with no links is treated as linking to every page, itself
+included, as pagerank.py specifies. Its column of M is left empty and the
+rank it holds is instead spread evenly over all pages on each iteration,
+so the matrix never needs the dense columns those links would make.
+
+`random_surfers` estimates the same ranks by sampling, advancing many
+independent random surfers a step at a time with array operations.
+"""
+
+import math
+
+import numpy as np
+from scipy import sparse
+
+# Iteration stops once the ranks change by less than this in total
+TOLERANCE = 1e-6
+MAX_ITERATIONS = 1000
+
+# Surfers walked in lockstep by random_surfers, and how close to the
+# PageRank distribution their positions must be before they are counted
+SURFERS = 10_000
+BURN_IN_ERROR = 1e-6
+
+# Pages visited per bincount, bounding the memory of a batch of steps
+BLOCK_SIZE = 1 << 22
+
+
+class LinkGraph():
+
+    def __init__(self, pages, offsets, links, index=None):
+        """
+        Wrap a link graph over `pages`, a list of page names, where the
+        pages linked to by page i are `links[offsets[i]:offsets[i + 1]]`.
+        `index` maps page names to their indices, and is built if not given.
+        """
+        self.pages = pages
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.links = np.asarray(links, dtype=np.int32)
+        if index is None:
+            index = {page: i for i, page in enumerate(pages)}
+        self.index = index
+        self._matrix = None
+
+    @classmethod
+    def from_corpus(cls, corpus):
+        """
+        Build a LinkGraph from a corpus returned by `crawl`, a dictionary
+        mapping each page to the set of pages it links to.
+        """
+        pages = sorted(corpus)
+        index = {page: i for i, page in enumerate(pages)}
+        counts = np.fromiter(
+            (len(corpus[page]) for page in pages), dtype=np.int64, count=len(pages)
+        )
+        offsets = np.zeros(len(pages) + 1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+        links = np.fromiter(
+            (index[link] for page in pages for link in corpus[page]),
+            dtype=np.int32, count=int(offsets[-1]),
+        )
+        return cls(pages, offsets, links, index)
+
+    @property
+    def page_count(self):
+        return len(self.pages)
+
+    @property
+    def out_degrees(self):
+        return np.diff(self.offsets)
+
+    @property
+    def dangling(self):
+        """
+        Boolean array marking the pages with no links.
+        """
+        return self.out_degrees == 0
+
+    def links_of(self, page):
+        """
+        Returns the indices of the pages linked to by page index `page`.
+        """
+        return self.links[self.offsets[page]:self.offsets[page + 1]]
+
+    def transition_matrix(self):
+        """
+        Returns the sparse column-stochastic link matrix, in CSR form for
+        fast products with a rank vector. Columns of pages with no links
+        are empty.
+        """
+        if self._matrix is None:
+            degrees = self.out_degrees
+            sources = np.repeat(np.arange(self.page_count, dtype=np.int32), degrees)
+            weights = 1.0 / degrees[sources]
+            self._matrix = sparse.csr_matrix(
+                (weights, (self.links, sources)),
+                shape=(self.page_count, self.page_count),
+            )
+        return self._matrix
+
+    def ranks_by_page(self, ranks):
+        """
+        Returns a dictionary mapping each page name to its rank.
+        """
+        return dict(zip(self.pages, np.asarray(ranks).tolist()))
+
+
+def power_iteration(graph, damping_factor, tolerance=TOLERANCE,
+                    max_iterations=MAX_ITERATIONS, start=None, history=None):
+    """
+    Returns the PageRank of every page of a LinkGraph, as an array summing
+    to 1, by repeatedly applying
+
+        PR = (1 - d) / N + d * (M @ PR + dangling rank / N)
+
+    from a uniform start, or from the ranks `start` if given, until the L1
+    change in ranks is below `tolerance` or `max_iterations` is reached.
+    If `history` is a list, the change made by each iteration is appended
+    to it.
+    """
+    n = graph.page_count
+    if n == 0:
+        return np.zeros(0)
+    matrix = graph.transition_matrix()
+    dangling = graph.dangling
+    if start is None:
+        ranks = np.full(n, 1.0 / n)
+    else:
+        ranks = np.asarray(start, dtype=np.float64) / np.sum(start)
+    for _ in range(max_iterations):
+        new_ranks = step(matrix, dangling, damping_factor, ranks)
+        change = np.abs(new_ranks - ranks).sum()
+        ranks = new_ranks
+        if history is not None:
+            history.append(change)
+        if change < tolerance:
+            break
+    return ranks / ranks.sum()
+
+
+def step(matrix, dangling, damping_factor, ranks):
+    """
+    Returns the ranks after one step of the random surfer from `ranks`,
+    given the transition matrix and dangling pages of a LinkGraph.
+    """
+    n = len(ranks)
+    spread = damping_factor * ranks[dangling].sum() / n
+    return damping_factor * (matrix @ ranks) + ((1 - damping_factor) / n + spread)
+
+
+def random_surfers(graph, damping_factor, samples, surfers=SURFERS, seed=None):
+    """
+    Returns PageRank estimated from `samples` pages visited by random
+    surfers, as an array summing to 1.
+
+    Each surfer starts on a page chosen at random and at every step
+    follows a random link of its page with probability `damping_factor`,
+    or jumps to a random page otherwise or if its page has no links. The
+    surfers move in lockstep, one array operation per step for all of
+    them, and are only counted once they have walked long enough to
+    forget where they started. `seed` seeds the random number generator,
+    so that the same seed gives the same estimate.
+    """
+    n = graph.page_count
+    if n == 0 or samples <= 0:
+        return np.zeros(n)
+    rng = np.random.default_rng(seed)
+    surfers = max(min(surfers, samples), 1)
+    offsets = graph.offsets
+    degrees = graph.out_degrees
+    links = graph.links
+
+    # A surfer's chance of still being influenced by its start shrinks by
+    # the damping factor with every step
+    if damping_factor <= 0:
+        burn_in = 0
+    elif damping_factor >= 1:
+        burn_in = MAX_ITERATIONS
+    else:
+        burn_in = math.ceil(math.log(BURN_IN_ERROR) / math.log(damping_factor))
+
+    last_link = max(len(links) - 1, 0)
+    if not len(links):
+        links = np.zeros(1, dtype=np.int32)
+
+    def move(pages):
+        # One uniform draw per surfer decides whether it follows a link,
+        # and rescaled to [0, 1) also picks the link or the page jumped to
+        draws = rng.random(len(pages))
+        follow = draws < damping_factor
+        scaled = np.where(
+            follow, draws / (damping_factor or 1),
+            (draws - damping_factor) / (1 - damping_factor or 1),
+        )
+        degree = degrees[pages]
+        link = links[np.minimum(offsets[pages] + (scaled * degree).astype(np.int64), last_link)]
+        jump = (scaled * n).astype(np.int64)
+        return np.where(follow & (degree > 0), link, jump)
+
+    pages = rng.integers(n, size=surfers)
+    for _ in range(burn_in):
+        pages = move(pages)
+
+    counts = np.zeros(n, dtype=np.int64)
+    block = []
+    remaining = samples
+    while remaining > 0:
+        visited = pages[:remaining]
+        block.append(visited)
+        remaining -= len(visited)
+        if remaining > 0:
+            pages = move(pages)
+        if len(block) * surfers >= BLOCK_SIZE or remaining <= 0:
+            counts += np.bincount(np.concatenate(block), minlength=n)
+            block = []
+    return counts / samples
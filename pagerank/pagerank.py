@@ -1,16 +1,26 @@
 import os
-import random
 import re
 import sys
 
+from crawler import EDGES_SUFFIX, read_edges
+from graphfile import GRAPH_SUFFIX, read_graph, write_graph
+from linkgraph import LinkGraph, random_surfers
+from solvers import solve
+
 DAMPING = 0.85
 SAMPLES = 10000
 
 
 def main():
-    if len(sys.argv) != 2:
-        sys.exit("Usage: python pagerank.py corpus")
-    corpus = crawl(sys.argv[1])
+    if len(sys.argv) not in (2, 3):
+        sys.exit("Usage: python pagerank.py corpus|corpus.edges|corpus.graph [output.graph]")
+
+    corpus = load_corpus(sys.argv[1])
+
+    # Saving the graph lets later runs memory-map it instead of crawling
+    if len(sys.argv) == 3:
+        corpus = link_graph(corpus)
+        write_graph(sys.argv[2], corpus)
     ranks = sample_pagerank(corpus, DAMPING, SAMPLES)
     print(f"PageRank Results from Sampling (n = {SAMPLES})")
     for page in sorted(ranks):
@@ -21,6 +31,19 @@ def main():
         print(f"  {page}: {ranks[page]:.4f}")
 
 
+def load_corpus(path):
+    """
+    Returns the corpus at `path`, crawling it if it is a directory.
+    """
+    # Graph files are memory-mapped, and edge-list files written by
+    # crawler.py are loaded, without crawling
+    if path.endswith(GRAPH_SUFFIX):
+        return read_graph(path)
+    if path.endswith(EDGES_SUFFIX):
+        return read_edges(path)
+    return crawl(path)
+
+
 def crawl(directory):
     """
     Parse a directory of HTML pages and check for links to other pages.
@@ -57,10 +80,19 @@ def transition_model(corpus, page, damping_factor):
     linked to by `page`. With probability `1 - damping_factor`, choose
     a link at random chosen from all pages in the corpus.
     """
-    raise NotImplementedError
+    links = corpus[page]
+
+    # A page with no links is treated as linking to every page
+    if not links:
+        return {other: 1 / len(corpus) for other in corpus}
 
+    probabilities = {other: (1 - damping_factor) / len(corpus) for other in corpus}
+    for link in links:
+        probabilities[link] += damping_factor / len(links)
+    return probabilities
 
-def sample_pagerank(corpus, damping_factor, n):
+
+def sample_pagerank(corpus, damping_factor, n, seed=None):
     """
     Return PageRank values for each page by sampling `n` pages
     according to transition model, starting with a page at random.
@@ -68,11 +100,16 @@ def sample_pagerank(corpus, damping_factor, n):
     Return a dictionary where keys are page names, and values are
     their estimated PageRank value (a value between 0 and 1). All
     PageRank values should sum to 1.
+
+    Samples are taken from many random surfers at once, following the
+    same transition model as `transition_model`; `seed` makes the
+    estimate reproducible. `corpus` may also be a LinkGraph.
     """
-    raise NotImplementedError
+    graph = link_graph(corpus)
+    return graph.ranks_by_page(random_surfers(graph, damping_factor, n, seed=seed))
 
 
-def iterate_pagerank(corpus, damping_factor):
+def iterate_pagerank(corpus, damping_factor, solver="power", history=None):
     """
     Return PageRank values for each page by iteratively updating
     PageRank values until convergence.
@@ -80,8 +117,25 @@ def iterate_pagerank(corpus, damping_factor):
     Return a dictionary where keys are page names, and values are
     their estimated PageRank value (a value between 0 and 1). All
     PageRank values should sum to 1.
+
+    `corpus` may also be a LinkGraph, such as one read from an edge-list
+    file. `solver` names one of the methods in `solvers.SOLVERS`, and if
+    `history` is a list, the ConvergenceLog of the solve is appended to it.
+    """
+    graph = link_graph(corpus)
+    ranks, log = solve(graph, damping_factor, solver)
+    if history is not None:
+        history.append(log)
+    return graph.ranks_by_page(ranks)
+
+
+def link_graph(corpus):
+    """
+    Returns `corpus` as a LinkGraph, building one from a crawled corpus.
     """
-    raise NotImplementedError
+    if isinstance(corpus, LinkGraph):
+        return corpus
+    return LinkGraph.from_corpus(corpus)
 
 
 if __name__ == "__main__":
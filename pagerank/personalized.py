@@ -0,0 +1,238 @@
+"""
+Personalized PageRank for many seed sets over one corpus.
+
+Personalized PageRank replaces the random jump to any page with a jump
+to a chosen distribution over pages, the teleport vector, so that pages
+close to the seeds rank highest. A page with no links still leads to
+every page, as in pagerank.py, which keeps the ranks of a uniform
+teleport vector equal to the ordinary PageRank.
+
+`PersonalizedPageRank.solve` takes many teleport vectors as the columns
+of one dense matrix and iterates them together as a block,
+
+    R = (1 - d) * T + d * (M @ R + dangling rank / N)
+
+so each iteration is one sparse-times-dense product over the shared
+transition matrix M instead of one sparse product per seed set. Columns
+that have converged are dropped from the block.
+
+`PersonalizedPageRank.push` approximates the ranks of a single seed page
+by forward push, moving rank outward from the seed only while the
+residual left on a page is large compared to its number of links, so it
+only visits pages near the seed. Rank reaching a page with no links is
+spread over every page, and is accounted for at the end by the ordinary
+PageRank, computed once and shared by every query.
+
+Usage: python personalized.py corpus|corpus.edges [--push] page.html...
+"""
+
+import sys
+from collections import deque
+
+import numpy as np
+
+from linkgraph import MAX_ITERATIONS, TOLERANCE, power_iteration
+
+DAMPING = 0.85
+
+# Teleport vectors iterated together, bounding the memory of the block
+BATCH = 16
+
+# Forward push stops once no page holds more residual than this per link
+PUSH_EPSILON = 1e-7
+
+# Pages printed for each seed
+TOP = 10
+
+
+def main():
+    args = [arg for arg in sys.argv[1:] if arg != "--push"]
+    if len(args) < 2:
+        sys.exit("Usage: python personalized.py corpus|corpus.edges [--push] page.html...")
+    push = "--push" in sys.argv[1:]
+
+    from pagerank import link_graph, load_corpus
+    graph = link_graph(load_corpus(args[0]))
+    seeds = args[1:]
+    for seed in seeds:
+        if seed not in graph.index:
+            sys.exit(f"Page not found: {seed}")
+
+    personalized = PersonalizedPageRank(graph)
+    if push:
+        columns = [personalized.push(seed) for seed in seeds]
+    else:
+        ranks = personalized.rank_seeds([[seed] for seed in seeds])
+        columns = list(ranks.T)
+
+    for seed, ranks in zip(seeds, columns):
+        print(f"Personalized PageRank for {seed}")
+        for i in np.argsort(-ranks, kind="stable")[:TOP]:
+            print(f"  {graph.pages[i]}: {ranks[i]:.4f}")
+
+
+class PersonalizedPageRank():
+
+    def __init__(self, graph, damping_factor=DAMPING, tolerance=TOLERANCE,
+                 max_iterations=MAX_ITERATIONS):
+        """
+        Solve personalized PageRank over a LinkGraph. `tolerance` bounds
+        the L1 change of each rank vector on its last iteration.
+        """
+        self.graph = graph
+        self.damping_factor = damping_factor
+        self.tolerance = tolerance
+        self.max_iterations = max_iterations
+        self._global_ranks = None
+        self._scaled_matrix = None
+
+    @property
+    def global_ranks(self):
+        """
+        The ordinary PageRank of every page, computed on first use.
+        """
+        if self._global_ranks is None:
+            self._global_ranks = power_iteration(
+                self.graph, self.damping_factor, self.tolerance, self.max_iterations
+            )
+        return self._global_ranks
+
+    def scaled_matrix(self):
+        """
+        Returns the transition matrix times the damping factor, computed
+        on first use.
+        """
+        if self._scaled_matrix is None:
+            self._scaled_matrix = self.graph.transition_matrix() * self.damping_factor
+        return self._scaled_matrix
+
+    def teleports(self, seed_sets):
+        """
+        Returns the teleport matrix for a list of seed sets, each a
+        collection of page names, with one column per set spreading the
+        jump evenly over its pages.
+        """
+        teleports = np.zeros((self.graph.page_count, len(seed_sets)))
+        for column, seeds in enumerate(seed_sets):
+            pages = [self.graph.index[seed] for seed in set(seeds)]
+            if not pages:
+                raise ValueError(f"Seed set {column} is empty")
+            teleports[pages, column] = 1 / len(pages)
+        return teleports
+
+    def rank_seeds(self, seed_sets, batch=BATCH):
+        """
+        Returns the personalized ranks of every page for each seed set,
+        as an array with one column per set.
+        """
+        ranks = np.empty((self.graph.page_count, len(seed_sets)))
+        for start in range(0, len(seed_sets), batch):
+            stop = min(start + batch, len(seed_sets))
+            ranks[:, start:stop] = self.solve(self.teleports(seed_sets[start:stop]), batch)
+        return ranks
+
+    def solve(self, teleports, batch=BATCH):
+        """
+        Returns the personalized ranks for each column of `teleports`, an
+        array with one row per page whose columns each sum to 1, solving
+        up to `batch` columns at a time.
+        """
+        teleports = np.asarray(teleports, dtype=np.float64)
+        ranks = np.empty_like(teleports)
+        for start in range(0, teleports.shape[1], batch):
+            stop = min(start + batch, teleports.shape[1])
+            ranks[:, start:stop] = self.solve_block(teleports[:, start:stop])
+        return ranks
+
+    def solve_block(self, teleports):
+        """
+        Iterates every column of `teleports` together until each one's
+        ranks change by less than the tolerance.
+        """
+        n, count = teleports.shape
+        if n == 0 or count == 0:
+            return np.zeros((n, count))
+        d = self.damping_factor
+        matrix = self.scaled_matrix()
+        dangling = self.graph.dangling.astype(np.float64) * (d / n)
+        ranks = np.empty((n, count))
+
+        # Teleport vectors are mostly zero, so the jumps are added only
+        # where they land
+        rows, columns = np.nonzero(teleports)
+        jumps = (1 - d) * teleports[rows, columns]
+        block = np.array(teleports, dtype=np.float64, order="C")
+        active = np.arange(count)
+        for _ in range(self.max_iterations):
+            new_block = matrix @ block
+            new_block += dangling @ block
+            new_block[rows, columns] += jumps
+            block -= new_block
+            change = np.abs(block, out=block).sum(axis=0)
+            block = new_block
+
+            # Converged columns are set aside, keeping the block contiguous
+            done = change < self.tolerance
+            if done.any():
+                ranks[:, active[done]] = block[:, done]
+                active = active[~done]
+                if not len(active):
+                    break
+                block = np.ascontiguousarray(block[:, ~done])
+                renumber = np.cumsum(~done) - 1
+                keep = ~done[columns]
+                rows, columns, jumps = rows[keep], renumber[columns[keep]], jumps[keep]
+        else:
+            ranks[:, active] = block
+        return ranks / ranks.sum(axis=0)
+
+    def push(self, seed, epsilon=PUSH_EPSILON):
+        """
+        Returns approximate personalized ranks of every page for the single
+        seed page named `seed`, by forward push.
+
+        Pushing stops once every page's residual is below `epsilon` times
+        its number of links (or 1, for a page with none), and the residual
+        still left, at most `epsilon` times the links and pages in total,
+        is the rank missing from the result.
+        """
+        graph = self.graph
+        d = self.damping_factor
+        offsets = graph.offsets
+        links = graph.links
+        source = graph.index[seed]
+
+        # Invariant: the exact ranks are `estimate` plus, for every page,
+        # its residual times the ranks personalized to it, plus `spread`
+        # times the ranks of a uniform jump
+        estimate = {}
+        residual = {source: 1.0}
+        spread = 0.0
+        queue = deque([source])
+        queued = {source}
+        while queue:
+            page = queue.popleft()
+            queued.discard(page)
+            mass = residual.pop(page)
+            estimate[page] = estimate.get(page, 0.0) + (1 - d) * mass
+            start, end = offsets[page], offsets[page + 1]
+            if start == end:
+                spread += d * mass
+                continue
+            share = d * mass / (end - start)
+            for link in links[start:end].tolist():
+                total = residual.get(link, 0.0) + share
+                residual[link] = total
+                if link not in queued and \
+                        total >= epsilon * max(offsets[link + 1] - offsets[link], 1):
+                    queue.append(link)
+                    queued.add(link)
+
+        ranks = spread * self.global_ranks if spread else np.zeros(graph.page_count)
+        pages = np.fromiter(estimate, dtype=np.int64, count=len(estimate))
+        ranks[pages] += np.fromiter(estimate.values(), dtype=np.float64, count=len(estimate))
+        return ranks
+
+
+if __name__ == "__main__":
+    main()
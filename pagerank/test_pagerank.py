@@ -0,0 +1,301 @@
+import os
+import random
+
+import numpy as np
+import pytest
+
+from crawler import crawl_parallel, read_edges, scan_corpus, write_edges
+from graphfile import read_graph, write_graph
+from incremental import RankState
+from linkgraph import step
+from pagerank import (
+    DAMPING, crawl, iterate_pagerank, link_graph, load_corpus, sample_pagerank, transition_model,
+)
+from personalized import PersonalizedPageRank
+from solvers import SOLVERS, solve
+
+# corpus0 of the CS50 distribution, and the exact solution of its
+# PageRank equations to six places
+CORPUS0 = {
+    "1.html": {"2.html"},
+    "2.html": {"1.html", "3.html"},
+    "3.html": {"2.html", "4.html"},
+    "4.html": {"2.html"},
+}
+RANKS0 = {"1.html": 0.219914, "2.html": 0.429209, "3.html": 0.219914, "4.html": 0.130963}
+
+
+def random_hrefs(pages=60, seed=0):
+    """
+    Returns a dictionary mapping each page to a set of hrefs, with pages
+    that have none, pages linking to themselves and hrefs to pages that
+    are not in the corpus.
+    """
+    rng = random.Random(seed)
+    names = [f"{i}.html" for i in range(pages)]
+    hrefs = {}
+    for name in names:
+        if rng.random() < 0.15:
+            hrefs[name] = set()
+        else:
+            hrefs[name] = set(rng.sample(names, rng.randint(1, 6)))
+            if rng.random() < 0.2:
+                hrefs[name].add(f"missing{rng.randint(0, 4)}.html")
+    return hrefs
+
+
+def corpus_of(hrefs):
+    """
+    Returns the corpus `crawl` would find for pages holding `hrefs`.
+    """
+    return {
+        page: {href for href in page_hrefs if href in hrefs and href != page}
+        for page, page_hrefs in hrefs.items()
+    }
+
+
+def links_of(graph):
+    """
+    Returns a LinkGraph as a dictionary mapping each page to its links.
+    """
+    return {
+        page: {graph.pages[j] for j in graph.links[graph.offsets[i]:graph.offsets[i + 1]]}
+        for i, page in enumerate(graph.pages)
+    }
+
+
+def write_corpus(directory, hrefs):
+    """
+    Writes a page for each of `hrefs`, linking to its hrefs.
+    """
+    directory.mkdir()
+    for page, page_hrefs in hrefs.items():
+        links = "".join(f'<li><a href="{href}">{href}</a></li>\n' for href in sorted(page_hrefs))
+        (directory / page).write_text(f"<html><body><ul>\n{links}</ul></body></html>\n")
+    return str(directory)
+
+
+def baseline_ranks(corpus, damping_factor, iterations=200):
+    """
+    PageRank by the distribution's iterative formula over the corpus
+    dictionary, with pages without links treated as linking to every page.
+    """
+    count = len(corpus)
+    ranks = {page: 1 / count for page in corpus}
+    for _ in range(iterations):
+        ranks = {
+            page: (1 - damping_factor) / count + damping_factor * sum(
+                ranks[other] / (len(corpus[other]) or count)
+                for other in corpus
+                if page in corpus[other] or not corpus[other]
+            )
+            for page in corpus
+        }
+    return ranks
+
+
+def test_power_iteration_matches_distribution_ranks():
+    ranks = iterate_pagerank(CORPUS0, DAMPING)
+    assert ranks == pytest.approx(RANKS0, abs=1e-5)
+
+
+def test_power_iteration_matches_baseline_with_dangling_pages():
+    corpus = corpus_of(random_hrefs())
+    assert any(not links for links in corpus.values())
+    ranks = iterate_pagerank(corpus, DAMPING)
+    assert sum(ranks.values()) == pytest.approx(1.0)
+    assert ranks == pytest.approx(baseline_ranks(corpus, DAMPING), abs=1e-6)
+
+
+def test_transition_model_spreads_damping():
+    model = transition_model(CORPUS0, "1.html", DAMPING)
+    assert model == pytest.approx(
+        {"1.html": 0.0375, "2.html": 0.8875, "3.html": 0.0375, "4.html": 0.0375}
+    )
+    model = transition_model(CORPUS0, "3.html", DAMPING)
+    assert model == pytest.approx(
+        {"1.html": 0.0375, "2.html": 0.4625, "3.html": 0.0375, "4.html": 0.4625}
+    )
+    # A page without links links to every page
+    corpus = dict(CORPUS0, **{"4.html": set()})
+    assert transition_model(corpus, "4.html", DAMPING) == pytest.approx(
+        dict.fromkeys(corpus, 0.25)
+    )
+
+
+@pytest.mark.parametrize("corpus", [CORPUS0, corpus_of(random_hrefs())], ids=["corpus0", "random"])
+def test_sampling_approaches_iterated_ranks(corpus):
+    ranks = sample_pagerank(corpus, DAMPING, 400_000, seed=1)
+    assert set(ranks) == set(corpus)
+    assert sum(ranks.values()) == pytest.approx(1.0)
+    expected = iterate_pagerank(corpus, DAMPING)
+    assert sum(abs(ranks[page] - expected[page]) for page in corpus) < 0.02
+
+
+def test_sampling_is_reproducible():
+    corpus = corpus_of(random_hrefs())
+    assert sample_pagerank(corpus, DAMPING, 10_000, seed=5) == \
+        sample_pagerank(corpus, DAMPING, 10_000, seed=5)
+    assert sample_pagerank(corpus, DAMPING, 10_000, seed=5) != \
+        sample_pagerank(corpus, DAMPING, 10_000, seed=6)
+    # Without links to follow, every page is as likely as any other
+    ranks = sample_pagerank(corpus, 0.0, 120_000, seed=5)
+    assert max(ranks.values()) - min(ranks.values()) < 0.01
+
+
+@pytest.mark.parametrize("solver", SOLVERS)
+def test_solvers_match_power_iteration(solver):
+    graph = link_graph(corpus_of(random_hrefs(pages=2000, seed=3)))
+    expected = solve(graph, DAMPING, "power", 1e-12)[0]
+    ranks, history = solve(graph, DAMPING, solver, 1e-9)
+    assert ranks.sum() == pytest.approx(1.0)
+    assert abs(ranks - expected).sum() < 1e-7
+    assert history.residual < 1e-8
+
+
+def test_quadratic_extrapolation_returns_converged_ranks():
+    graph = link_graph(corpus_of(random_hrefs(pages=2000, seed=3)))
+    ranks, history = solve(graph, DAMPING, "quadratic", 1e-9)
+    # The ranks returned are those whose change was last recorded
+    new_ranks = step(graph.transition_matrix(), graph.dangling, DAMPING, ranks)
+    assert abs(new_ranks - ranks).sum() < history.residual
+
+
+def personalized_ranks(graph, teleport):
+    """
+    Personalized PageRank for `teleport` by a dense solve of its linear
+    system, with pages without links linking to every page.
+    """
+    n = graph.page_count
+    transitions = graph.transition_matrix().toarray() + np.outer(np.ones(n), graph.dangling) / n
+    return np.linalg.solve(np.identity(n) - DAMPING * transitions, (1 - DAMPING) * teleport)
+
+
+def test_block_solve_matches_linear_solve():
+    graph = link_graph(corpus_of(random_hrefs()))
+    personalized = PersonalizedPageRank(graph, tolerance=1e-12)
+    seed_sets = [["0.html"], ["1.html", "7.html"], list(graph.pages)] + \
+        [[page] for page in graph.pages[10:40]]
+    # Batches of 16 columns, and columns converging at different iterations
+    ranks = personalized.rank_seeds(seed_sets)
+    teleports = personalized.teleports(seed_sets)
+    for column in range(len(seed_sets)):
+        expected = personalized_ranks(graph, teleports[:, column])
+        assert ranks[:, column] == pytest.approx(expected, abs=1e-10)
+    # A uniform teleport vector gives the ordinary PageRank
+    assert ranks[:, 2] == pytest.approx(personalized.global_ranks, abs=1e-10)
+    assert ranks[:, 2] == pytest.approx(solve(graph, DAMPING, "power", 1e-12)[0], abs=1e-10)
+
+
+def test_push_approaches_block_solve():
+    graph = link_graph(corpus_of(random_hrefs()))
+    personalized = PersonalizedPageRank(graph, tolerance=1e-12)
+    for seed in ["0.html", "3.html", "12.html"]:
+        expected = personalized.rank_seeds([[seed]])[:, 0]
+        ranks = personalized.push(seed, epsilon=1e-9)
+        # Only the residual left behind is missing
+        assert 1 - 1e-9 * (len(graph.links) + graph.page_count) <= ranks.sum() <= 1 + 1e-12
+        assert np.abs(ranks - expected).sum() < 1e-6
+        assert np.abs(personalized.push(seed) - expected).sum() < 1e-3
+    with pytest.raises(ValueError):
+        personalized.teleports([["0.html"], []])
+
+
+@pytest.mark.parametrize("workers", [1, 3, 100])
+def test_crawl_parallel_and_edge_files_match_crawl(tmp_path, workers):
+    hrefs = random_hrefs()
+    directory = write_corpus(tmp_path / "corpus", hrefs)
+    corpus = crawl(directory)
+    assert corpus == corpus_of(hrefs)
+
+    # Small chunks cut tags in two
+    graph = crawl_parallel(directory, workers=workers, chunk_size=16)
+    assert links_of(graph) == corpus
+    assert graph.index["7.html"] == sorted(corpus).index("7.html")
+
+    path = os.path.join(tmp_path, "corpus.edges")
+    write_edges(path, graph)
+    assert links_of(read_edges(path)) == corpus
+
+    pages, found = scan_corpus(directory, workers=workers, chunk_size=16)
+    assert pages == sorted(hrefs)
+    assert found == [hrefs[page] for page in pages]
+
+
+def test_crawl_parallel_of_empty_corpus(tmp_path):
+    (tmp_path / "notes.txt").write_text("<a href=\"1.html\">")
+    graph = crawl_parallel(str(tmp_path), workers=2)
+    assert graph.page_count == 0 and len(graph.links) == 0
+
+
+def test_graph_file_round_trip(tmp_path):
+    corpus = corpus_of(random_hrefs())
+    corpus["caf\u00e9.html"] = {"1.html"}
+    path = os.path.join(tmp_path, "corpus.graph")
+    write_graph(path, link_graph(corpus))
+    assert not os.path.exists(f"{path}.tmp")
+
+    graph = load_corpus(path)
+    assert links_of(graph) == corpus
+    assert list(graph.pages) == sorted(corpus)
+    assert graph.index["caf\u00e9.html"] == sorted(corpus).index("caf\u00e9.html")
+    assert "missing0.html" not in graph.index
+    with pytest.raises(KeyError):
+        graph.index["missing0.html"]
+    assert iterate_pagerank(graph, DAMPING) == pytest.approx(
+        iterate_pagerank(corpus, DAMPING), abs=1e-9
+    )
+
+    # Written again from its memory-mapped arrays, it is the same file
+    copy = os.path.join(tmp_path, "copy.graph")
+    write_graph(copy, graph)
+    with open(path, "rb") as f, open(copy, "rb") as g:
+        assert f.read() == g.read()
+
+
+def test_graph_file_rejects_bad_files(tmp_path):
+    path = os.path.join(tmp_path, "corpus.graph")
+    write_graph(path, link_graph({}))
+    assert read_graph(path).page_count == 0
+    write_graph(path, link_graph(CORPUS0))
+    with open(path, "rb") as f:
+        data = f.read()
+    with open(path, "wb") as f:
+        f.write(data[:-8])
+    with pytest.raises(ValueError, match="Truncated"):
+        read_graph(path)
+    with open(path, "wb") as f:
+        f.write(b"<html>" + data[6:])
+    with pytest.raises(ValueError, match="Not a graph file"):
+        read_graph(path)
+
+
+def test_incremental_update_matches_cold_recompute(tmp_path):
+    hrefs = random_hrefs()
+    state = RankState.from_hrefs(hrefs)
+    state.rank()
+    path = os.path.join(tmp_path, "state.npz")
+    state.save(path)
+    state = RankState.load(path)
+
+    # One page removed, one changed, and a page added under a name that
+    # was already linked to
+    changes = {
+        "3.html": None,
+        "5.html": {"1.html", "2.html"},
+        "missing0.html": {"5.html", "elsewhere.html"},
+    }
+    state = state.apply(changes)
+    history = []
+    ranks = state.rank(tolerance=1e-12, history=history)
+
+    hrefs.pop("3.html")
+    hrefs.update({page: links for page, links in changes.items() if links is not None})
+    cold = RankState.from_hrefs(hrefs)
+    cold_history = []
+    expected = cold.rank(tolerance=1e-12, history=cold_history)
+
+    assert ranks == pytest.approx(expected, abs=1e-10)
+    assert ranks == pytest.approx(iterate_pagerank(corpus_of(hrefs), DAMPING), abs=1e-6)
+    assert len(history) <= len(cold_history)
+    assert set(state.names) == set(cold.names)